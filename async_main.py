@@ -0,0 +1,53 @@
+"""
+AsyncApp entry point for long-running deployments, mirroring `main.py`, with
+the listeners of `symone_bot.async_slack_app`. Handlers await the database
+through `AsyncDatabaseClient`, so one process serves many Slack events
+concurrently. Run with `python async_main.py`.
+"""
+
+import os
+
+from aiohttp import web
+
+from symone_bot.async_data import AsyncDatabaseClient
+from symone_bot.async_slack_app import create_async_app
+from symone_bot.identity import resolve_identity
+from symone_bot.logging_setup import setup_logging
+
+DEPLOYMENT_ENVIRONMENT = os.environ.get("DEPLOYMENT_ENVIRONMENT", "local")
+
+setup_logging(DEPLOYMENT_ENVIRONMENT)
+
+_token = os.environ.get("SLACK_BOT_TOKEN")
+app = create_async_app(
+    identity=resolve_identity(_token),
+    token=_token,
+    signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+)
+
+
+async def warm_up_database(web_app: web.Application):
+    """Connects to the database before the first event arrives."""
+    await AsyncDatabaseClient.get_client().warm_up()
+
+
+async def close_database(web_app: web.Application):
+    """Closes the database connection pool on shutdown."""
+    AsyncDatabaseClient.get_client().close()
+
+
+def web_app() -> web.Application:
+    """
+    Builds the aiohttp application serving Slack events, with the database
+    connected on start up and closed on shutdown.
+
+    return: aiohttp Application.
+    """
+    application = app.web_app()
+    application.on_startup.append(warm_up_database)
+    application.on_cleanup.append(close_database)
+    return application
+
+
+if __name__ == "__main__":
+    web.run_app(web_app(), port=int(os.environ.get("PORT", 3000)))
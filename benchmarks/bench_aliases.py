@@ -0,0 +1,65 @@
+"""
+Measures resolving a multi-word aspect alias as the number of registered aliases
+grows, with the aliases spread over a few aspects per game system.
+
+Run with `make bench` or `python -m benchmarks.bench_aliases`.
+"""
+
+import timeit
+
+from symone_bot.aspects import Aspect, aspect_dict
+from symone_bot.commands import command_dict
+from symone_bot.parser import QueryEvaluator
+from symone_bot.prepositions import preposition_dict
+from symone_bot.registry import RegistryDict
+
+ALIAS_COUNTS = [10, 100, 1000, 5000]
+ALIASES_PER_ASPECT = 10
+SYSTEMS = ["starfinder", "5e", "pathfinder"]
+ITERATIONS = 2000
+
+
+def build_evaluator(alias_count: int) -> QueryEvaluator:
+    aspects = RegistryDict(aspect_dict)
+    for i in range(alias_count // ALIASES_PER_ASPECT):
+        system = SYSTEMS[i % len(SYSTEMS)]
+        name = f"{system}_aspect_{i}"
+        aspects[name] = Aspect(
+            name,
+            "",
+            "bench",
+            value_type=int,
+            aliases=[
+                f"{system} phrase {i} number {j}" for j in range(ALIASES_PER_ASPECT)
+            ],
+        )
+    return QueryEvaluator(command_dict, preposition_dict, aspects)
+
+
+def time_parse(evaluator: QueryEvaluator, query: str) -> float:
+    def parse():
+        evaluator.cache_clear()
+        evaluator.parse(query)
+
+    return timeit.timeit(parse, number=ITERATIONS) / ITERATIONS
+
+
+def main():
+    print(f"{'aliases':>8} {'alias (us)':>12} {'name (us)':>12}")
+    for alias_count in ALIAS_COUNTS:
+        evaluator = build_evaluator(alias_count)
+        last = alias_count // ALIASES_PER_ASPECT - 1
+        system = SYSTEMS[last % len(SYSTEMS)]
+        alias_query = (
+            f"add 100 to {system} phrase {last} number {ALIASES_PER_ASPECT - 1}"
+        )
+        name_query = f"add 100 to {system}_aspect_{last}"
+        assert evaluator.parse(alias_query).aspect.name == f"{system}_aspect_{last}"
+        print(
+            f"{alias_count:>8} {time_parse(evaluator, alias_query) * 1e6:>12.1f}"
+            f" {time_parse(evaluator, name_query) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compares message throughput of the synchronous handler path against the asyncio
+one, against a local MongoDB, e.g.
+
+    docker run -d -p 27017:27017 -e MONGO_INITDB_ROOT_USERNAME=test \\
+        -e MONGO_INITDB_ROOT_PASSWORD=test mongo:6.0.1
+
+The queries are read-only. A campaign is added only when the database has none.
+Set MONGO_HOST, MONGO_USER and MONGO_PASSWORD to point somewhere else.
+
+Run with `python -m benchmarks.bench_async`; it is not part of `make bench`, as it
+needs the database.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bson import DBRef
+
+from symone_bot import async_ingress, bot_ingress
+from symone_bot.async_data import AsyncDatabaseClient
+from symone_bot.data import DatabaseClient
+from symone_bot.handler_source import HandlerSource
+
+MESSAGES = 500
+CONCURRENCY = 50
+QUERY = "current xp"
+GAME_MASTER = "U72P1S26N"
+
+
+def connection_settings() -> dict:
+    return {
+        "mongo_password": os.getenv("MONGO_PASSWORD", "test"),
+        "mongo_user": os.getenv("MONGO_USER", "test"),
+        "mongo_host": os.getenv("MONGO_HOST", "localhost:27017"),
+        "mongo_scheme": "mongodb",
+        "maxPoolSize": CONCURRENCY,
+    }
+
+
+def seed(database_client: DatabaseClient):
+    db = database_client.db
+    if db.current_game_context.find_one({"tracking_context": True}):
+        return
+    result = db.game_context.insert_one(
+        {
+            "kind": "campaign",
+            "name": "Benchmark Campaign",
+            "game_master": GAME_MASTER,
+            "currency": {"quantity": 0, "type": "gold"},
+            "party": {"name": "", "size": 4, "level": 1, "xp": 0},
+        }
+    )
+    db.current_game_context.insert_one(
+        {
+            "tracking_context": True,
+            "active_context": DBRef(
+                "game_context", result.inserted_id, "symone_knowledge"
+            ),
+        }
+    )
+
+
+def sync_message(_=None):
+    return bot_ingress.symone_message(QUERY, GAME_MASTER, HandlerSource.ASPECT_QUERY)
+
+
+def time_sync_serial() -> float:
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        sync_message()
+    return time.perf_counter() - start
+
+
+def time_sync_threads() -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        list(executor.map(sync_message, range(MESSAGES)))
+    return time.perf_counter() - start
+
+
+async def time_async() -> float:
+    AsyncDatabaseClient.instance = AsyncDatabaseClient(**connection_settings())
+    await AsyncDatabaseClient.instance.warm_up()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def message():
+        async with semaphore:
+            return await async_ingress.symone_message(
+                QUERY, GAME_MASTER, HandlerSource.ASPECT_QUERY
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(message() for _ in range(MESSAGES)))
+    elapsed = time.perf_counter() - start
+    AsyncDatabaseClient.instance.close()
+    return elapsed
+
+
+def main():
+    database_client = DatabaseClient(**connection_settings())
+    database_client.ping()
+    seed(database_client)
+    sync_message()
+
+    results = {
+        "sync, one worker": time_sync_serial(),
+        f"sync, {CONCURRENCY} threads": time_sync_threads(),
+        f"async, {CONCURRENCY} in flight": asyncio.run(time_async()),
+    }
+
+    print(f"{MESSAGES} x `{QUERY}`")
+    print(f"{'':<24} {'messages/s':>12}")
+    for name, elapsed in results.items():
+        print(f"{name:<24} {MESSAGES / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares answering `what can you do Symone?` by rebuilding the help text from the
+registries against the precomputed text, in time and in memory allocated per call.
+Logging is disabled, so only the help path itself is measured.
+
+Run with `make bench` or `python -m benchmarks.bench_help`.
+"""
+
+import logging
+import timeit
+import tracemalloc
+
+from symone_bot.aspects import aspect_dict
+from symone_bot.commands import (
+    MESSAGE_RESPONSE_EPHEMERAL,
+    command_dict,
+    default_response,
+    help_message,
+)
+from symone_bot.metadata import QueryMetaData
+
+ITERATIONS = 20000
+
+
+def rebuilt_help_message(metadata: QueryMetaData, **kwargs) -> dict:
+    """`help_message` as it was before the text was precomputed."""
+    text = """"""
+    for command in command_dict.values():
+        if command.callable != default_response:
+            text += f"{command.help()}\n"
+    text += f"\nI am also tracking the following aspects: {', '.join([aspect.name for aspect in aspect_dict.values()])}"
+    return {
+        "response_type": MESSAGE_RESPONSE_EPHEMERAL,
+        "text": text,
+    }
+
+
+def allocated_per_call(function, metadata: QueryMetaData) -> float:
+    responses = [None] * 100
+    function(metadata)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(len(responses)):
+        responses[i] = function(metadata)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / len(responses)
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    metadata = QueryMetaData("U72P1S26N")
+    assert rebuilt_help_message(metadata) == help_message(metadata)
+
+    print(f"{'':<12} {'us/call':>10} {'bytes/call':>12}")
+    for name, function in (
+        ("rebuilt", rebuilt_help_message),
+        ("precomputed", help_message),
+    ):
+        seconds = timeit.timeit(lambda: function(metadata), number=ITERATIONS)
+        micros = seconds / ITERATIONS * 1e6
+        print(
+            f"{name:<12} {micros:>10.2f} {allocated_per_call(function, metadata):>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Reports the memory held per registry entry and allocated per parsed query, for
+the slotted value objects against dict-backed equivalents (subclasses without
+`__slots__`, which is what the classes were before).
+
+Run with `make bench` or `python -m benchmarks.bench_memory`.
+"""
+
+import gc
+import logging
+import tracemalloc
+from typing import Callable, Tuple
+from unittest import mock
+
+from symone_bot import parser
+from symone_bot.aspects import Aspect
+from symone_bot.commands import Command, command_dict
+from symone_bot.parser import QueryEvaluator
+from symone_bot.prepositions import Preposition, PrepositionType, preposition_dict
+from symone_bot.registry import RegistryDict
+from symone_bot.response import SymoneResponse
+
+ENTRIES = 2000
+QUERIES = 200
+
+
+class DictAspect(Aspect):
+    pass
+
+
+class DictCommand(Command):
+    pass
+
+
+class DictPreposition(Preposition):
+    pass
+
+
+class DictSymoneResponse(SymoneResponse):
+    pass
+
+
+def measure(allocate: Callable[[], list], count: int) -> Tuple[float, float]:
+    """Bytes and memory blocks still held per item after allocate() returns."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = allocate()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del kept
+    return size / count, blocks / count
+
+
+def registry_entries(aspect_class, command_class, preposition_class) -> list:
+    return [
+        (
+            aspect_class(
+                f"aspect_{i}", "", "bench", value_type=int, aliases=[f"alias {i}"]
+            ),
+            command_class(f"command_{i}", "", print),
+            preposition_class(f"prep_{i}", PrepositionType.OTHER),
+        )
+        for i in range(ENTRIES)
+    ]
+
+
+def parsed_queries(evaluator: QueryEvaluator, response_class, fresh: bool) -> list:
+    with mock.patch.object(parser, "SymoneResponse", response_class):
+        return [
+            evaluator.parse(f"add xp {i}" if fresh else "add xp 5")
+            for i in range(QUERIES)
+        ]
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    evaluator = QueryEvaluator(command_dict, preposition_dict, RegistryDict())
+    evaluator.aspects.update(QueryEvaluator.get_evaluator().aspects)
+    evaluator.parse("add xp 5")
+
+    rows = {
+        "bytes per registry entry": (
+            lambda: registry_entries(DictAspect, DictCommand, DictPreposition),
+            lambda: registry_entries(Aspect, Command, Preposition),
+            ENTRIES,
+        ),
+        "bytes per memoized query": (
+            lambda: parsed_queries(evaluator, DictSymoneResponse, fresh=False),
+            lambda: parsed_queries(evaluator, SymoneResponse, fresh=False),
+            QUERIES,
+        ),
+        "bytes per fresh query": (
+            lambda: (
+                evaluator.cache_clear(),
+                parsed_queries(evaluator, DictSymoneResponse, True),
+            ),
+            lambda: (
+                evaluator.cache_clear(),
+                parsed_queries(evaluator, SymoneResponse, True),
+            ),
+            QUERIES,
+        ),
+    }
+    print(f"{'':<26} {'dict':>16} {'slots':>16}")
+    for name, (before, after, count) in rows.items():
+        dict_size, dict_blocks = measure(before, count)
+        slots_size, slots_blocks = measure(after, count)
+        print(
+            f"{name:<26} {dict_size:>7.0f} ({dict_blocks:>4.1f} blk)"
+            f" {slots_size:>7.0f} ({slots_blocks:>4.1f} blk)"
+        )
+
+
+if __name__ == "__main__":
+    main()
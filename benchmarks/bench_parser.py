@@ -0,0 +1,60 @@
+"""
+Measures the per-parse cost of QueryEvaluator with a few hundred registered aspects.
+
+Run with `make bench` or `python -m benchmarks.bench_parser`.
+"""
+
+import timeit
+
+from symone_bot.aspects import Aspect
+from symone_bot.commands import command_dict
+from symone_bot.parser import QueryEvaluator, build_tokenizer
+from symone_bot.prepositions import preposition_dict
+from symone_bot.registry import RegistryDict
+
+ASPECT_COUNT = 300
+ITERATIONS = 2000
+
+
+def build_evaluator(aspect_count: int = ASPECT_COUNT) -> QueryEvaluator:
+    aspects = RegistryDict(
+        {
+            f"aspect_{i}": Aspect(f"aspect_{i}", "", "bench", value_type=int)
+            for i in range(aspect_count)
+        }
+    )
+    return QueryEvaluator(command_dict, preposition_dict, aspects)
+
+
+def time_parse(evaluator: QueryEvaluator, query: str, setup=None) -> float:
+    def parse():
+        if setup:
+            setup()
+        evaluator.parse(query)
+
+    evaluator.parse(query)
+    return timeit.timeit(parse, number=ITERATIONS) / ITERATIONS
+
+
+def main():
+    evaluator = build_evaluator()
+    query = f"current aspect_{ASPECT_COUNT - 1}"
+
+    def clear_all():
+        build_tokenizer.cache_clear()
+        # any change to a registry recompiles it
+        evaluator.aspects.update()
+        evaluator.cache_clear()
+
+    rebuilt = time_parse(evaluator, query, clear_all)
+    tokenizer_cached = time_parse(evaluator, query, evaluator.cache_clear)
+    memoized = time_parse(evaluator, query)
+
+    print(f"aspects registered: {ASPECT_COUNT}")
+    print(f"parse, registry rebuilt:  {rebuilt * 1e6:10.1f} us")
+    print(f"parse, registry cached:   {tokenizer_cached * 1e6:10.1f} us")
+    print(f"parse, query memoized:    {memoized * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
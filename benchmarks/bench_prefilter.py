@@ -0,0 +1,115 @@
+"""
+Measures what the pre-dispatch filter saves on ordinary chat messages: full Bolt
+dispatch of a signed event against `is_for_symone`, and the combined trigger
+pattern against searching with each listener pattern in turn.
+
+Run with `make bench` or `python -m benchmarks.bench_prefilter`.
+"""
+
+import json
+import time
+import timeit
+
+from slack_bolt import App
+from slack_bolt.request import BoltRequest
+from slack_sdk import WebClient
+from slack_sdk.signature import SignatureVerifier
+
+from symone_bot.identity import BotIdentity
+from symone_bot.slack_app import create_app
+from symone_bot.triggers import LISTENER_PATTERNS, TRIGGER_PATTERN, is_for_symone
+
+SIGNING_SECRET = "secret"
+ITERATIONS = 2000
+CHAT = [
+    "anyone up for tacos tonight?",
+    "I'll be 10 minutes late, start without me",
+    "did you see the new episode",
+    "lol",
+    "can someone bring the dice bag, mine is at Sam's",
+    "the wizard definitely should have rolled for that",
+    "brb",
+    "who's hosting next week?",
+]
+
+
+def message_body(text: str) -> str:
+    return json.dumps(
+        {
+            "type": "event_callback",
+            "team_id": "T1",
+            "api_app_id": "A1",
+            "event_id": "Ev1",
+            "event_time": int(time.time()),
+            "event": {
+                "type": "message",
+                "channel": "C1",
+                "channel_type": "channel",
+                "user": "U1",
+                "text": text,
+                "ts": "1666000000.000100",
+            },
+        }
+    )
+
+
+def signed_headers(body: str) -> dict:
+    timestamp = str(int(time.time()))
+    signature = SignatureVerifier(SIGNING_SECRET).generate_signature(
+        timestamp=timestamp, body=body
+    )
+    return {
+        "content-type": ["application/json"],
+        "x-slack-signature": [signature],
+        "x-slack-request-timestamp": [timestamp],
+    }
+
+
+def build_app() -> App:
+    # nothing listens on port 9: no event here reaches a Web API call
+    return create_app(
+        identity=BotIdentity("U0BOT", "B0BOT", "T1"),
+        token="xoxb-benchmark",
+        client=WebClient(token="xoxb-benchmark", base_url="http://localhost:9/"),
+        signing_secret=SIGNING_SECRET,
+    )
+
+
+def per_message_us(function) -> float:
+    seconds = timeit.timeit(
+        lambda: [function(message) for message in CHAT], number=ITERATIONS
+    )
+    return seconds / (ITERATIONS * len(CHAT)) * 1e6
+
+
+def any_listener_matches(text: str) -> bool:
+    return any(pattern.search(text) for pattern in LISTENER_PATTERNS)
+
+
+def main():
+    app = build_app()
+    bodies = {text: message_body(text) for text in CHAT}
+    headers = {text: signed_headers(body) for text, body in bodies.items()}
+    parsed = {text: json.loads(body) for text, body in bodies.items()}
+
+    def dispatch(text):
+        return app.dispatch(BoltRequest(body=bodies[text], headers=headers[text]))
+
+    results = {
+        "bolt dispatch + middleware": per_message_us(dispatch),
+        "json + is_for_symone": per_message_us(
+            lambda text: is_for_symone(json.loads(bodies[text]))
+        ),
+        "is_for_symone": per_message_us(lambda text: is_for_symone(parsed[text])),
+        "listener patterns": per_message_us(any_listener_matches),
+        "combined pattern": per_message_us(TRIGGER_PATTERN.search),
+    }
+
+    print(f"{len(CHAT)} ordinary chat messages")
+    print(f"{'':<28} {'us/message':>12}")
+    for name, micros in results.items():
+        print(f"{name:<28} {micros:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the keyword trie tokenizer against the regex alternation it replaced,
+as the number of registered aspects grows.
+
+Run with `make bench` or `python -m benchmarks.bench_tokenizer`.
+"""
+
+import re
+import timeit
+
+from symone_bot.commands import command_dict
+from symone_bot.parser import KeywordTokenizer, generate_tokens
+from symone_bot.prepositions import preposition_dict
+
+REGISTRY_SIZES = [10, 100, 1000, 5000]
+ITERATIONS = 2000
+
+
+def build_regex(command_names, preposition_names, aspect_names):
+    def alternation(names):
+        return "|".join(f"\\b{name}\\b" for name in names)
+
+    return re.compile(
+        "|".join(
+            [
+                f"(?P<CMD>{alternation(command_names)})",
+                f"(?P<ASPECT>{alternation(aspect_names)})",
+                f"(?P<PREP>{alternation(preposition_names)})",
+                r"(?P<VALUE>(-|)\d+)",
+                r"(?P<WS>\s+)",
+                r'(?P<STRING_VALUE>"(.*?)")',
+            ]
+        ),
+        re.IGNORECASE,
+    )
+
+
+def time_tokenize(tokenizer, query: str) -> float:
+    seconds = timeit.timeit(
+        lambda: list(generate_tokens(query, tokenizer)), number=ITERATIONS
+    )
+    return seconds / ITERATIONS
+
+
+def main():
+    command_names = list(command_dict)
+    preposition_names = list(preposition_dict)
+    print(f"{'aspects':>8} {'regex (us)':>12} {'trie (us)':>12}")
+    for size in REGISTRY_SIZES:
+        aspect_names = [f"aspect_{i}" for i in range(size)]
+        query = f"switch campaign to 100 from aspect_{size - 1}"
+        regex = build_regex(command_names, preposition_names, aspect_names)
+        trie = KeywordTokenizer(command_names, preposition_names, aspect_names)
+        assert list(generate_tokens(query, regex)) == list(generate_tokens(query, trie))
+        print(
+            f"{size:>8} {time_tokenize(regex, query) * 1e6:>12.1f}"
+            f" {time_tokenize(trie, query) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
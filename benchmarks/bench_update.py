@@ -0,0 +1,74 @@
+"""
+Compares the update sent by DatabaseClient.update_game_context for a one field
+change, whole document `$set` vs changed paths only, with a large loot subdocument.
+
+Run with `make bench` or `python -m benchmarks.bench_update`.
+"""
+
+import timeit
+
+import bson
+
+from symone_bot.data import GameContext
+
+LOOT_ITEMS = 5000
+ITERATIONS = 200
+
+
+def build_game_context(loot_items: int = LOOT_ITEMS) -> dict:
+    return {
+        "_id": bson.ObjectId(),
+        "kind": "campaign",
+        "name": "Against the Aeon Throne",
+        "game_master": "U72P1S26N",
+        "currency": {"quantity": 1000, "type": "credits"},
+        "party": {
+            "name": "",
+            "size": 5,
+            "level": 1,
+            "xp": 0,
+            "xp_for_level_up": 500,
+            "members": {f"member_{i}": {"level": 1} for i in range(6)},
+        },
+        "loot": {
+            f"item_{i}": {"name": f"Item {i}", "quantity": i, "value": i * 10}
+            for i in range(loot_items)
+        },
+        "system": {"name": "Starfinder", "version": 1},
+    }
+
+
+def main():
+    document = build_game_context()
+
+    def whole_document_update():
+        document["party"]["xp"] += 1
+        return bson.encode({"$set": document})
+
+    tracked = GameContext(build_game_context())
+
+    def diff_update():
+        tracked["party"]["xp"] += 1
+        update = bson.encode(tracked.changes())
+        tracked.mark_clean()
+        return update
+
+    load = timeit.timeit(lambda: GameContext(document), number=ITERATIONS)
+    whole = timeit.timeit(whole_document_update, number=ITERATIONS)
+    diff = timeit.timeit(diff_update, number=ITERATIONS)
+
+    print(f"loot items: {LOOT_ITEMS}")
+    print(f"{'':<24} {'bytes sent':>12} {'cpu (ms)':>10}")
+    print(
+        f"{'whole document $set':<24} {len(whole_document_update()):>12}"
+        f" {whole / ITERATIONS * 1e3:>10.2f}"
+    )
+    print(
+        f"{'changed paths only':<24} {len(diff_update()):>12}"
+        f" {diff / ITERATIONS * 1e3:>10.2f}"
+    )
+    print(f"{'snapshot on load':<24} {'':>12} {load / ITERATIONS * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,107 @@
-import logging
 import os
-import re
-import sys
+import threading
+from typing import TYPE_CHECKING
 
-from slack_bolt import App
-from slack_bolt.adapter.google_cloud_functions import SlackRequestHandler
-from werkzeug import Request
+if TYPE_CHECKING:
+    from slack_bolt import App
+    from slack_bolt.adapter.google_cloud_functions import SlackRequestHandler
+    from werkzeug import Request
 
-from symone_bot.util import get_mocking_reply
-from symone_bot.bot_ingress import symone_message
-from symone_bot.handler_source import HandlerSource
+# Slack, Mongo and Google Cloud libraries are imported when the first event is
+# handled rather than when the module is loaded, so a cold start only pays for
+# what serving a request needs. See `get_app`.
 
 DEPLOYMENT_ENVIRONMENT = os.environ.get("DEPLOYMENT_ENVIRONMENT", "local")
 
-if DEPLOYMENT_ENVIRONMENT == "prod":
-    import google.cloud.logging
-
-    client = google.cloud.logging.Client()
-    client.setup_logging()
-    logging.basicConfig(
-        format="%(asctime)s\t%(levelname)s\t%(message)s",
-        datefmt="%m/%d/%Y %I:%M:%S %p",
-        stream=sys.stdout,
-        level=logging.INFO,
-    )
-else:
-    logging.basicConfig(
-        format="%(asctime)s\t%(levelname)s\t%(message)s",
-        datefmt="%m/%d/%Y %I:%M:%S %p",
-        stream=sys.stdout,
-        level=logging.DEBUG,
-    )
-
-app = App(
-    token=os.environ.get("SLACK_BOT_TOKEN"),
-    signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
-    process_before_response=True,
-)
-
-
-@app.message(re.compile("(hi|hello|hey) Symone", re.IGNORECASE))
-def message_hello(message, say, context):
-    """Responds to a user mentioning Symone."""
-    say(f"{context['matches'][0]} there <@{message['user']}>")
-
-
-@app.message(re.compile("what can you do Symone\\?", re.IGNORECASE))
-def message_help(message, say):
-    """Help message handler."""
-    response = symone_message(
-        message.get("text"), message.get("user"), HandlerSource.HELP
-    )
-    say(response)
-
-
-@app.message(
-    re.compile(
-        "Did we (level up\\?|level up|levelup\\?|levelup|level\\?|level)", re.IGNORECASE
-    )
-)
-def message_did_they_level_up(message, say):
-    """Responds to a user asking if they leveled up."""
-    reply = get_mocking_reply(message)
-    say(reply)
-
-
-@app.message(re.compile("Symone, (.*)", re.IGNORECASE))
-def aspect_query_handler(message, say, context):
-    """Aspect query handler. Listens for "Symone, <query>"."""
-    aspect_candidate = context["matches"][0]
-    user_id = message.get("user")
-
-    logging.info(f"Parsing aspect query: {aspect_candidate} from user: {user_id}")
-    response = symone_message(aspect_candidate, user_id, HandlerSource.ASPECT_QUERY)
-    say(response)
-
-
-@app.error
-def custom_error_handler(error, body, logger, client, payload):
-    logger.exception(f"Error: {error}")
-    logger.info(f"Request body: {body}")
-    client.chat_postEphemeral(
-        channel=payload["channel"],
-        user=payload["user"],
-        text=f"Sorry, I had an error processing your request. Please try again. {error}",
-    )
-
-
-@app.event("message")
-def handle_message_events(body, logger):
-    logger.debug(body)
-
-
-def handler(request: Request):
+# How Slack events are acknowledged. By default each event is processed before the
+# response, as Cloud Functions require. "fast" acknowledges at once and runs the
+# queries as lazy listeners; it needs a long-running server, `python main.py`.
+SLACK_ACK_MODE = os.environ.get("SLACK_ACK_MODE", "process_before_response")
+
+_init_lock = threading.RLock()
+_app = None
+_slack_handler = None
+
+
+def setup_logging():
+    """Configures logging, see `symone_bot.logging_setup`."""
+    from symone_bot.logging_setup import setup_logging as configure_logging
+
+    configure_logging(DEPLOYMENT_ENVIRONMENT)
+
+
+def get_app() -> "App":
+    """
+    Builds the Bolt app on first use, along with logging. When the bot's identity
+    is configured (see `symone_bot.identity.resolve_identity`), building it makes
+    no Slack API call.
+
+    return: the process-wide App.
+    """
+    global _app
+    if _app is None:
+        with _init_lock:
+            if _app is None:
+                setup_logging()
+                from symone_bot.identity import resolve_identity
+                from symone_bot.slack_app import create_app
+
+                token = os.environ.get("SLACK_BOT_TOKEN")
+                _app = create_app(
+                    fast_ack=SLACK_ACK_MODE == "fast",
+                    identity=resolve_identity(token),
+                    token=token,
+                    signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+                )
+    return _app
+
+
+def get_slack_handler() -> "SlackRequestHandler":
+    """
+    Builds the Cloud Functions request handler on first use; every request after
+    that reuses it.
+
+    return: the process-wide SlackRequestHandler.
+    """
+    global _slack_handler
+    if _slack_handler is None:
+        with _init_lock:
+            if _slack_handler is None:
+                from slack_bolt.adapter.google_cloud_functions import (
+                    SlackRequestHandler,
+                )
+
+                _slack_handler = SlackRequestHandler(app=get_app())
+    return _slack_handler
+
+
+def __getattr__(name: str):
+    # `main.app` is built on first access
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def handler(request: "Request"):
     """
     This is the handler function that is called when an event is
     received from Slack. This is needed to handle Slack inputs for Google Cloud Functions.
     Typically, a slack bot would use the app.start() function to start the server, but for
     cloud functions, SlackRequestHandler is used instead.
 
+    Message events that none of the listeners would match are acknowledged
+    straight away, before Bolt verifies, logs or dispatches them.
+
     param request: inbound request
     return: response sent to Slack
     """
-    slack_handler = SlackRequestHandler(app=app)
-    return slack_handler.handle(request)
+    from symone_bot.triggers import is_for_symone
+
+    body = request.get_json(silent=True)
+    if isinstance(body, dict) and not is_for_symone(body):
+        return "", 200
+    return get_slack_handler().handle(request)
+
+
+if __name__ == "__main__":
+    get_app().start(port=int(os.environ.get("PORT", 3000)))
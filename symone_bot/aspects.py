@@ -1,4 +1,6 @@
-from typing import Type, Dict
+from typing import Dict, Iterable, Type
+
+from symone_bot.registry import RegistryDict
 
 
 class Aspect:
@@ -9,8 +11,22 @@ class Aspect:
 
     E.G. XP would be an aspect. Calling `add xp 100` means to:
         add(command) xp(aspect) 100(value)
+
+    An aspect may also be referred to by its aliases, synonyms or multi-word
+    phrases such as "experience points", matched case-insensitively like its name.
     """
 
+    __slots__ = (
+        "name",
+        "help_info",
+        "database_key",
+        "sub_database_key",
+        "value_type",
+        "allowed_users",
+        "is_singleton",
+        "aliases",
+    )
+
     def __init__(
         self,
         name: str,
@@ -20,6 +36,7 @@ class Aspect:
         value_type: Type = None,
         allowed_users=None,
         is_singleton=False,
+        aliases: Iterable[str] = (),
     ):
         self.name = name
         self.help_info = help_info
@@ -28,34 +45,64 @@ class Aspect:
         self.value_type = value_type
         self.allowed_users = allowed_users
         self.is_singleton = is_singleton
+        self.aliases = tuple(aliases)
 
     def __str__(self):
         return self.name
 
+    @property
+    def database_path(self) -> str:
+        """Dotted path to the aspect's value within a campaign document."""
+        if self.sub_database_key:
+            return f"{self.database_key}.{self.sub_database_key}"
+        return self.database_key
+
     def help(self) -> str:
         return f"`{self.name}`: {self.help_info}."
 
 
-# TODO: implment a mapping of aspect name to database property, so that users can use natural language
-# example: "party size" -> "party_size", "experience points" -> "xp", etc.
-aspect_dict: Dict[str, Aspect] = {
-    "xp": Aspect(
-        "xp", "experience points", "party", sub_database_key="xp", value_type=int
-    ),
-    "xp_target": Aspect(
-        "xp_target",
-        "target experience points",
-        "party",
-        sub_database_key="xp_for_level_up",
-        value_type=int,
-    ),
-    "gold": Aspect(
-        "gold", "gold pieces", "currency", sub_database_key="quantity", value_type=int
-    ),
-    "party_size": Aspect(
-        "party_size", "party size", "party", sub_database_key="size", value_type=int
-    ),
-    "campaign": Aspect(
-        "campaign", "campaign name", "name", value_type=str, is_singleton=True
-    ),
-}
+aspect_dict: Dict[str, Aspect] = RegistryDict(
+    {
+        "xp": Aspect(
+            "xp",
+            "experience points",
+            "party",
+            sub_database_key="xp",
+            value_type=int,
+            aliases=["exp", "experience", "experience points"],
+        ),
+        "xp_target": Aspect(
+            "xp_target",
+            "target experience points",
+            "party",
+            sub_database_key="xp_for_level_up",
+            value_type=int,
+            aliases=["xp target", "target xp", "experience target", "xp for level up"],
+        ),
+        "gold": Aspect(
+            "gold",
+            "gold pieces",
+            "currency",
+            sub_database_key="quantity",
+            value_type=int,
+            # the currency is credits in Starfinder
+            aliases=["gp", "gold pieces", "credits", "money"],
+        ),
+        "party_size": Aspect(
+            "party_size",
+            "party size",
+            "party",
+            sub_database_key="size",
+            value_type=int,
+            aliases=["party size", "number of players"],
+        ),
+        "campaign": Aspect(
+            "campaign",
+            "campaign name",
+            "name",
+            value_type=str,
+            is_singleton=True,
+            aliases=["campaign name"],
+        ),
+    }
+)
@@ -0,0 +1,153 @@
+import logging
+from typing import Any, Callable, Dict, Optional, Union
+
+from symone_bot.aspects import Aspect
+from symone_bot.async_data import AsyncDatabaseClient
+from symone_bot.commands import GAME_MASTER_ONLY as SYNC_GAME_MASTER_ONLY
+from symone_bot.commands import (
+    Command,
+    _campaign_not_found_reply,
+    _campaign_switched_reply,
+    _current_reply,
+    _increment_amount,
+    _level_up_reply,
+    _reached_level_up,
+    _set_reply,
+    _updated_reply,
+    command_dict,
+    reject_unauthorized_user,
+)
+from symone_bot.metadata import QueryMetaData
+from symone_bot.policies import Policy
+from symone_bot.registry import RegistryDict
+
+# Coroutine versions of the commands that touch the database, for AsyncApp.
+# They declare the policies of their synchronous versions, with the game master
+# check awaiting the database. The checks that need no I/O run before it, so a
+# rejected request never awaits the database: its rejection is returned directly,
+# and otherwise the command's coroutine for the caller to await (see
+# `SymoneResponse.get_async`).
+
+
+async def _require_game_master(
+    command: Command, kwargs: Dict[str, Any]
+) -> Optional[dict]:
+    """Coroutine version of the check of `commands.GAME_MASTER_ONLY`."""
+    metadata: QueryMetaData = kwargs["metadata"]
+    database_client = AsyncDatabaseClient.get_client()
+    if metadata.user_id == await database_client.get_game_master():
+        return None
+    return reject_unauthorized_user(command, kwargs.get("aspect"))
+
+
+GAME_MASTER_ONLY = Policy(_require_game_master, pure=False)
+
+
+async def _add_and_remove_handler(
+    aspect: Aspect, value: Union[str, int], operator: str
+) -> Dict[str, Any]:
+    """Coroutine version of `commands._add_and_remove_handler`."""
+    amount = _increment_amount(value, operator)
+    database_client = AsyncDatabaseClient.get_client()
+    return await database_client.increment_game_context(aspect.database_path, amount)
+
+
+async def add(
+    metadata: QueryMetaData, aspect: Aspect, value: Any, **kwargs
+) -> Dict[str, str]:
+    """Coroutine version of `commands.add`."""
+    logging.info(f"Add triggered by user: {metadata.user_id}")
+    game_context = await _add_and_remove_handler(aspect, value, "+")
+    response = _updated_reply(aspect, game_context, "Updated")
+    if aspect.name == "xp":
+        response = await compute_level_up(game_context, response)
+    return response
+
+
+async def compute_level_up(game_context, response):
+    """Coroutine version of `commands.compute_level_up`."""
+    if _reached_level_up(game_context):
+        database_client = AsyncDatabaseClient.get_client()
+        response = _level_up_reply(game_context)
+        await database_client.increment_game_context("party.level", 1)
+    return response
+
+
+async def current(metadata: QueryMetaData, aspect: Aspect, **kwargs) -> Dict[str, str]:
+    """Coroutine version of `commands.current`."""
+    database_client = AsyncDatabaseClient.get_client()
+    logging.info(f"Current triggered by user: {metadata.user_id}")
+    campaign = await database_client.get_current_game_context_fields(
+        [aspect.database_path]
+    )
+    return _current_reply(aspect, campaign)
+
+
+async def remove(
+    metadata: QueryMetaData, aspect: Aspect, value: Any, **kwargs
+) -> Dict[str, str]:
+    """Coroutine version of `commands.remove`."""
+    logging.info(f"Remove triggered by user: {metadata.user_id}")
+    game_context = await _add_and_remove_handler(aspect, value, "-")
+    return _updated_reply(aspect, game_context, "Reduced")
+
+
+async def set_aspect(
+    metadata: QueryMetaData, aspect: Aspect, value: Union[str, int], **kwargs
+) -> Dict[str, str]:
+    """
+    Coroutine version of `commands.set_aspect`, setting only the aspect's field
+    rather than writing back the whole game context.
+    """
+    database_client = AsyncDatabaseClient.get_client()
+    logging.info(f"Set triggered by user: {metadata.user_id}")
+    await database_client.set_game_context_field(aspect.database_path, value)
+    return _set_reply(aspect, value)
+
+
+async def switch_campaign(
+    metadata: QueryMetaData, value: str, **kwargs
+) -> Dict[str, str]:
+    """Coroutine version of `commands.switch_campaign`."""
+    database_client = AsyncDatabaseClient.get_client()
+    logging.info(
+        f"Switch campaign triggered by user: {metadata.user_id}, campaign: '{value}'"
+    )
+
+    try:
+        found_campaign = await database_client.get_context_by_campaign_name(
+            value, projection={"_id": 1}
+        )
+    except Exception as e:
+        return _campaign_not_found_reply(value, e)
+    await database_client.update_active_game_context(found_campaign["_id"])
+    return _campaign_switched_reply(value)
+
+
+def _async_command(name: str, function: Callable) -> Command:
+    command = command_dict[name]
+    return Command(
+        command.name,
+        command.help_info,
+        function,
+        aspect_type=command.aspect_type,
+        is_modifier=command.is_modifier,
+        policies=tuple(
+            GAME_MASTER_ONLY if policy is SYNC_GAME_MASTER_ONLY else policy
+            for policy in command.policies
+        ),
+    )
+
+
+# The synchronous command set, with the commands that touch the database swapped
+# for their coroutine versions. `default` and `help` need no I/O and are shared.
+async_command_dict: Dict[str, Command] = RegistryDict(
+    {
+        **command_dict,
+        "add": _async_command("add", add),
+        "current": _async_command("current", current),
+        "remove": _async_command("remove", remove),
+        "set": _async_command("set", set_aspect),
+        "switch campaign to": _async_command("switch campaign to", switch_campaign),
+    }
+)
@@ -0,0 +1,288 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from bson import DBRef, ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from pymongo.server_api import ServerApi
+
+from symone_bot.cache import CacheInfo, TTLCache
+from symone_bot.data import (
+    _ACTIVE_CONTEXT_KEY,
+    CAMPAIGN_NAME_COLLATION,
+    DEFAULT_ACTIVE_CONTEXT_TTL,
+    DEFAULT_CLIENT_OPTIONS,
+    INDEXES,
+    DatabaseClientException,
+    GameContext,
+    _client_options_from_env,
+    active_game_context_pipeline,
+)
+
+_client_lock = threading.Lock()
+
+
+class AsyncDatabaseClient:
+    """
+    Client for the backing database, for use on an asyncio event loop.
+
+    Runs the same queries as `DatabaseClient` through the motor driver, so a slow
+    query suspends the handler awaiting it instead of blocking the worker. There is
+    no unit of work: reads project the fields they need and changes are applied
+    as atomic server-side updates, so concurrent handlers never share a document.
+
+    The underlying client binds to the event loop that first uses it; create one
+    per loop.
+
+    Attributes:
+        mongo_password: Password for the MongoDB user.
+        mongo_user: Username for the MongoDB user.
+        mongo_host: Hostname for the MongoDB instance.
+        mongo_scheme: URL scheme for the MongoDB connection.
+        active_context_ttl: Seconds the active game context id is cached for.
+        client_options: Extra keyword arguments passed to `AsyncIOMotorClient`,
+            applied over `DEFAULT_CLIENT_OPTIONS`.
+    """
+
+    def __init__(
+        self,
+        mongo_password: str,
+        mongo_user: str = "symone-client",
+        mongo_host: str = "gamenightserverlessinst.7ncjp.mongodb.net",
+        mongo_scheme: str = "mongodb+srv",
+        active_context_ttl: float = DEFAULT_ACTIVE_CONTEXT_TTL,
+        **client_options,
+    ):
+        if mongo_password is None:
+            raise AttributeError("'mongo_password' cannot be type 'NoneType'")
+        self.client = AsyncIOMotorClient(
+            f"{mongo_scheme}://{mongo_user}:{mongo_password}@{mongo_host}/?retryWrites=true&w=majority",
+            server_api=ServerApi("1"),
+            **{**DEFAULT_CLIENT_OPTIONS, **client_options},
+        )
+        self.db = self.client.symone_knowledge
+        self._active_context_cache = TTLCache(active_context_ttl)
+
+    @staticmethod
+    def get_client() -> "AsyncDatabaseClient":
+        with _client_lock:
+            if not hasattr(AsyncDatabaseClient, "instance"):
+                AsyncDatabaseClient.instance = AsyncDatabaseClient(
+                    os.getenv("MONGO_PASSWORD"),
+                    active_context_ttl=float(
+                        os.getenv("ACTIVE_CONTEXT_TTL", DEFAULT_ACTIVE_CONTEXT_TTL)
+                    ),
+                    **_client_options_from_env(),
+                )
+        return AsyncDatabaseClient.instance
+
+    async def warm_up(self) -> None:
+        """
+        Pings the server and provisions indexes, so the cost of connecting is paid
+        at start up rather than by the first request. Failures are logged.
+        """
+        try:
+            await self.client.admin.command("ping")
+            await self.ensure_indexes()
+        except PyMongoError as e:
+            logging.warning(f"Could not warm up the database client: {e}")
+
+    async def ensure_indexes(self) -> None:
+        """Creates the indexes listed in `INDEXES`, see `DatabaseClient.ensure_indexes`."""
+        for collection_name, indexes in INDEXES.items():
+            await self.db[collection_name].create_indexes(indexes)
+
+    def close(self) -> None:
+        """Closes the client's connection pool."""
+        self.client.close()
+
+    async def get_current_game_context(self) -> GameContext:
+        """
+        Gets the game context from the database.
+
+        return: GameContext containing the game context data.
+        """
+        return GameContext(await self._find_game_context_document())
+
+    async def get_current_game_context_fields(
+        self, paths: Iterable[str]
+    ) -> Dict[str, Any]:
+        """
+        Gets only the given fields of the game context, for read-only use.
+
+        param paths: dotted paths of the fields to read, e.g. `Aspect.database_path`.
+        return: Dict containing the requested fields of the game context data.
+        """
+        return await self._find_game_context_document({path: 1 for path in paths})
+
+    async def _find_game_context_document(
+        self, projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        game_context = None
+        cached_id = self._active_context_cache.get(_ACTIVE_CONTEXT_KEY)
+        if cached_id is not None:
+            game_context = await self.db.game_context.find_one(
+                {"_id": cached_id}, projection
+            )
+        if game_context is None:
+            # the id was not cached, or the cached id has gone stale
+            game_context = await self.find_active_game_context(projection)
+        if game_context is None:
+            raise DatabaseClientException("No current game context found.")
+        return game_context
+
+    async def find_active_game_context(
+        self, projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gets the active game context in a single round trip, see
+        `DatabaseClient.find_active_game_context`.
+
+        param projection: optional projection applied to the game context.
+        return: Dict containing the game context data, or None if the tracker
+            points at no game context.
+        """
+        pipeline = active_game_context_pipeline(projection)
+        cursor = self.db.current_game_context.aggregate(pipeline)
+        game_contexts = await cursor.to_list(1)
+        if not game_contexts:
+            return None
+        self._active_context_cache.put(_ACTIVE_CONTEXT_KEY, game_contexts[0]["_id"])
+        return game_contexts[0]
+
+    async def get_active_context_id(self) -> ObjectId:
+        """
+        Gets the id of the active game context, cached for `active_context_ttl`
+        seconds.
+
+        return: ObjectId of the active game context.
+        """
+        active_context_id = self._active_context_cache.get(_ACTIVE_CONTEXT_KEY)
+        if active_context_id is None:
+            context_tracker = await self.get_context_tracker()
+            active_context_id = context_tracker["active_context"].id
+            self._active_context_cache.put(_ACTIVE_CONTEXT_KEY, active_context_id)
+        return active_context_id
+
+    def active_context_cache_info(self) -> CacheInfo:
+        """
+        Reports hit/miss statistics for the cached active game context id.
+
+        return: CacheInfo.
+        """
+        return self._active_context_cache.info()
+
+    async def get_context_by_campaign_name(
+        self, campaign_name: str, projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Gets the game context from the database, using the campaign name.
+        The name is matched case-insensitively.
+
+        param campaign_name: Name of the campaign to retrieve.
+        param projection: optional projection, e.g. {"_id": 1} when only the id is needed.
+        return: Dict containing the game context data.
+        """
+        # two results are enough to tell a unique match from an ambiguous one
+        game_contexts = await self.db.game_context.find(
+            {"name": campaign_name},
+            projection,
+            collation=CAMPAIGN_NAME_COLLATION,
+        ).to_list(2)
+        if len(game_contexts) == 0:
+            raise DatabaseClientException("No campaign found with that name.")
+        elif len(game_contexts) > 1:
+            raise DatabaseClientException(
+                "Multiple game_contexts found with that name."
+            )
+        return game_contexts[0]
+
+    async def get_game_master(self) -> str:
+        """
+        Gets the game master for the current game context.
+
+        return: String containing the game master's user ID.
+        """
+        game_context = await self.get_current_game_context_fields(["game_master"])
+        return game_context["game_master"]
+
+    async def get_context_tracker(self) -> Dict[str, Any]:
+        """
+        Gets the entity that tracks the current game context from the database.
+
+        return: Dict containing the context tracker.
+        """
+        context_tracker = await self.db.current_game_context.find_one(
+            {"tracking_context": True}
+        )
+        if context_tracker is None:
+            raise DatabaseClientException("Could not locate context tracking entity.")
+        return context_tracker
+
+    async def increment_game_context(self, path: str, amount: int) -> GameContext:
+        """
+        Atomically increments a field of the active game context on the server.
+
+        param path: dotted path of the field to increment, e.g. "party.xp".
+        param amount: amount to add, negative to subtract.
+        return: GameContext containing the game context data after the increment.
+        """
+        game_context = await self.db.game_context.find_one_and_update(
+            {"_id": await self.get_active_context_id()},
+            {"$inc": {path: amount}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if game_context is None:
+            raise DatabaseClientException("No current game context found.")
+        return GameContext(game_context)
+
+    async def set_game_context_field(self, path: str, value: Any) -> None:
+        """
+        Sets one field of the active game context.
+
+        param path: dotted path of the field to set, e.g. "party.size".
+        param value: new value of the field.
+        """
+        result = await self.db.game_context.update_one(
+            {"_id": await self.get_active_context_id()}, {"$set": {path: value}}
+        )
+        if result.matched_count == 0:
+            raise DatabaseClientException("No current game context found.")
+
+    async def update_game_context(self, game_context: Dict[str, Any]) -> None:
+        """
+        Updates the game context in the database. Only the fields of a GameContext
+        changed since it was loaded are sent, and nothing is written if none changed.
+
+        param game_context: Dict containing the game context data.
+        """
+        if isinstance(game_context, GameContext):
+            update = game_context.changes()
+            if not update:
+                return
+        else:
+            update = {"$set": game_context}
+        await self.db.game_context.update_one({"_id": game_context["_id"]}, update)
+        if isinstance(game_context, GameContext):
+            game_context.mark_clean()
+
+    async def update_active_game_context(self, id_ref: ObjectId) -> None:
+        """
+        Updates the active game context in the database.
+
+        param id_ref: ObjectId of the game context to make active.
+        """
+        result = await self.db.current_game_context.update_one(
+            {"tracking_context": True},
+            {
+                "$set": {
+                    "active_context": DBRef("game_context", id_ref, "symone_knowledge")
+                }
+            },
+        )
+        self._active_context_cache.invalidate(_ACTIVE_CONTEXT_KEY)
+        if result.matched_count == 0:
+            raise DatabaseClientException("Could not locate context tracking entity.")
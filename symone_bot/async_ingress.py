@@ -0,0 +1,77 @@
+import logging
+from typing import Dict
+
+from symone_bot.aspects import aspect_dict
+from symone_bot.async_commands import async_command_dict
+from symone_bot.bot_ingress import combine_replies
+from symone_bot.handler_source import HandlerSource
+from symone_bot.metadata import QueryMetaData
+from symone_bot.parser import QueryEvaluator, split_statements
+from symone_bot.prepositions import preposition_dict
+from symone_bot.response import SymoneResponse
+
+_async_evaluator = QueryEvaluator(async_command_dict, preposition_dict, aspect_dict)
+
+
+async def symone_message(
+    input_text: str, user_id: str, handler_source: HandlerSource
+) -> Dict[str, str]:
+    """
+    Coroutine version of `bot_ingress.symone_message`, run by the AsyncApp handlers.
+    param input_text: text of the message
+    param user_id: id of the user who sent the message
+    param handler_source: event handler type that called this function
+    return: response sent to Slack
+    """
+    response = {
+        "response_type": "ephemeral",
+        "text": "Sorry, Slack told me your user ID is blank? That's weird. Please try again.",
+    }
+    if user_id is None:
+        return response
+
+    metadata = QueryMetaData(user_id)
+
+    match handler_source:
+        case HandlerSource.HELP:
+            response = SymoneResponse(async_command_dict.get("help"), metadata)
+        case HandlerSource.ASPECT_QUERY:
+            if len(split_statements(input_text or "")) > 1:
+                return await run_multi_statement_query(input_text, metadata)
+            response = run_aspect_query(input_text, metadata)
+
+    return await response.get_async()
+
+
+def run_aspect_query(input_text, metadata):
+    """
+    Evaluates the input text as an aspect query against the coroutine commands.
+    """
+    logging.debug(f"run_aspect_query: Received input: {input_text}")
+    if not input_text:
+        raise ValueError("Input text is empty.")
+    response = _async_evaluator.parse(input_text)
+    response.metadata = metadata
+    return response
+
+
+async def run_multi_statement_query(
+    input_text: str, metadata: QueryMetaData
+) -> Dict[str, str]:
+    """
+    Evaluates each `;` or newline separated statement of the input text as an aspect
+    query. Every statement is parsed before any is run, and the statements run in
+    order, each as its own atomic update.
+
+    param input_text: text of the message.
+    param metadata: QueryMetaData for the user who sent the message.
+    return: combined response sent to Slack.
+    """
+    logging.debug(f"run_multi_statement_query: Received input: {input_text}")
+    responses = _async_evaluator.parse_statements(input_text)
+
+    replies = []
+    for response in responses:
+        response.metadata = metadata
+        replies.append(await response.get_async())
+    return combine_replies(replies)
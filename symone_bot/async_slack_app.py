@@ -0,0 +1,138 @@
+"""
+Symone's listeners for Bolt's AsyncApp, the coroutine counterparts of those in
+`slack_app`. The app is built the same way: unrelated messages are dropped
+first, listeners match the patterns in `triggers`, queries run once per event
+and a configured bot identity skips `auth.test`.
+"""
+
+import logging
+from typing import Awaitable, Callable, Optional
+
+from slack_bolt import BoltResponse
+from slack_bolt.async_app import AsyncApp
+
+from symone_bot.async_ingress import symone_message
+from symone_bot.handler_source import HandlerSource
+from symone_bot.idempotency import EventDeduplicator, event_key
+from symone_bot.identity import BotIdentity, forget_cached_identity, is_token_error
+from symone_bot.triggers import (
+    ASPECT_QUERY_PATTERN,
+    HELLO_PATTERN,
+    HELP_PATTERN,
+    LEVEL_UP_PATTERN,
+    is_for_symone,
+)
+from symone_bot.util import get_mocking_reply
+
+
+async def message_hello(message, say, context):
+    """Responds to a user mentioning Symone."""
+    await say(f"{context['matches'][0]} there <@{message['user']}>")
+
+
+async def reply_once(body, say, query: Callable[[], Awaitable[dict]]) -> None:
+    """
+    Coroutine version of `slack_app.reply_once`: awaits query and posts its
+    response, for the first delivery of the event only.
+
+    param body: request body of the event.
+    param say: Bolt's `say` for the event.
+    param query: coroutine function computing the response.
+    """
+    key = event_key(body)
+    response, replayed = await EventDeduplicator.get_deduplicator().run_async(
+        key, query
+    )
+    if replayed:
+        logging.info(f"Skipping repeated delivery of event {key}")
+        return
+    await say(response)
+
+
+async def message_help(message, say, body):
+    """Help message handler."""
+    await reply_once(
+        body,
+        say,
+        lambda: symone_message(
+            message.get("text"), message.get("user"), HandlerSource.HELP
+        ),
+    )
+
+
+async def message_did_they_level_up(message, say):
+    """Responds to a user asking if they leveled up."""
+    reply = get_mocking_reply(message)
+    await say(reply)
+
+
+async def aspect_query_handler(message, say, context, body):
+    """
+    Aspect query handler. Listens for "Symone, <query>", where the query may hold
+    several statements separated by `;` or newlines.
+    """
+    aspect_candidate = context["matches"][0]
+    user_id = message.get("user")
+
+    logging.info(f"Parsing aspect query: {aspect_candidate} from user: {user_id}")
+    await reply_once(
+        body,
+        say,
+        lambda: symone_message(aspect_candidate, user_id, HandlerSource.ASPECT_QUERY),
+    )
+
+
+async def custom_error_handler(error, body, logger, client, payload):
+    if is_token_error(error):
+        # nothing can be posted with a bad token, and every later event would fail
+        logger.critical(
+            f"Slack rejected the bot token ({error.response['error']}). "
+            "Check SLACK_BOT_TOKEN and the configured bot identity."
+        )
+        forget_cached_identity()
+        raise error
+    logger.exception(f"Error: {error}")
+    logger.info(f"Request body: {body}")
+    await client.chat_postEphemeral(
+        channel=payload["channel"],
+        user=payload["user"],
+        text=f"Sorry, I had an error processing your request. Please try again. {error}",
+    )
+
+
+async def handle_message_events(body, logger):
+    logger.debug(body)
+
+
+async def drop_unrelated_messages(body, next):
+    """
+    Acknowledges message events that no listener would match without running
+    the listener chain, see `triggers.is_for_symone`.
+    """
+    if not is_for_symone(body):
+        return BoltResponse(status=200, body="")
+    return await next()
+
+
+def create_async_app(identity: Optional[BotIdentity] = None, **app_options) -> AsyncApp:
+    """
+    Builds the AsyncApp with Symone's listeners, see `slack_app.create_app`.
+
+    param identity: the bot's identity, see `identity.resolve_identity`.
+    param app_options: keyword arguments for `AsyncApp`, e.g. token and
+        signing_secret.
+    return: AsyncApp
+    """
+    if identity is not None:
+        app_options["authorize"] = identity.async_authorizer(app_options.pop("token"))
+    app = AsyncApp(**app_options)
+    app.use(drop_unrelated_messages)
+
+    # the first matching listener handles an event, so the order matters
+    app.message(HELLO_PATTERN)(message_hello)
+    app.message(HELP_PATTERN)(message_help)
+    app.message(LEVEL_UP_PATTERN)(message_did_they_level_up)
+    app.message(ASPECT_QUERY_PATTERN)(aspect_query_handler)
+    app.error(custom_error_handler)
+    app.event("message")(handle_message_events)
+    return app
@@ -1,10 +1,15 @@
 import logging
-from typing import Dict
+from typing import Dict, List
 
-from symone_bot.commands import command_dict
+from symone_bot.commands import (
+    MESSAGE_RESPONSE_CHANNEL,
+    MESSAGE_RESPONSE_EPHEMERAL,
+    command_dict,
+)
+from symone_bot.data import unit_of_work
 from symone_bot.handler_source import HandlerSource
 from symone_bot.metadata import QueryMetaData
-from symone_bot.parser import QueryEvaluator
+from symone_bot.parser import QueryEvaluator, split_statements
 from symone_bot.response import SymoneResponse
 
 
@@ -31,9 +36,13 @@ def symone_message(
         case HandlerSource.HELP:
             response = SymoneResponse(command_dict.get("help"), metadata)
         case HandlerSource.ASPECT_QUERY:
+            if len(split_statements(input_text or "")) > 1:
+                return run_multi_statement_query(input_text, metadata)
             response = run_aspect_query(input_text, metadata)
 
-    return response.get()
+    # the command and its checks share one read of the game context
+    with unit_of_work():
+        return response.get()
 
 
 def run_aspect_query(input_text, metadata):
@@ -47,3 +56,46 @@ def run_aspect_query(input_text, metadata):
     response = evaluator.parse(input_text)
     response.metadata = metadata
     return response
+
+
+def run_multi_statement_query(
+    input_text: str, metadata: QueryMetaData
+) -> Dict[str, str]:
+    """
+    Evaluates each `;` or newline separated statement of the input text as an aspect
+    query. Every statement is parsed before any is run, the game context is read once
+    and written once for the whole batch, and the replies are combined into one.
+
+    param input_text: text of the message.
+    param metadata: QueryMetaData for the user who sent the message.
+    return: combined response sent to Slack.
+    """
+    logging.debug(f"run_multi_statement_query: Received input: {input_text}")
+    evaluator = QueryEvaluator.get_evaluator()
+    responses = evaluator.parse_statements(input_text)
+
+    replies = []
+    with unit_of_work(defer_increments=True):
+        for response in responses:
+            response.metadata = metadata
+            replies.append(response.get())
+    return combine_replies(replies)
+
+
+def combine_replies(replies: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Combines several Slack replies into one. The combined reply is posted in
+    channel if any of the replies was.
+
+    param replies: replies to combine.
+    return: combined reply.
+    """
+    in_channel = any(
+        reply["response_type"] == MESSAGE_RESPONSE_CHANNEL for reply in replies
+    )
+    return {
+        "response_type": (
+            MESSAGE_RESPONSE_CHANNEL if in_channel else MESSAGE_RESPONSE_EPHEMERAL
+        ),
+        "text": "\n".join(reply["text"] for reply in replies),
+    }
@@ -0,0 +1,141 @@
+"""
+In-process caches shared by the bot's hot paths.
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "maxsize", "size"])
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least recently used cache with hit/miss counters.
+
+    Attributes:
+        maxsize: Maximum number of entries kept before the oldest is evicted.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        if maxsize < 1:
+            raise ValueError("'maxsize' must be at least 1.")
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets a cached value and marks it as most recently used.
+
+        param key: cache key.
+        param default: value returned when the key is not cached.
+        return: cached value, or default.
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self._misses += 1
+                return default
+            self._hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value, evicting the least recently used entry when full.
+
+        param key: cache key.
+        param value: value to cache.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops every entry and resets the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        """
+        Reports cache statistics.
+
+        return: CacheInfo with hits, misses, maxsize and current size.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire a fixed time after they are stored,
+    with hit/miss counters.
+
+    Attributes:
+        ttl: Seconds an entry stays valid. A ttl of 0 disables caching.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        if ttl < 0:
+            raise ValueError("'ttl' cannot be negative.")
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets a cached value if it has not expired.
+
+        param key: cache key.
+        param default: value returned when the key is not cached or has expired.
+        return: cached value, or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value for `ttl` seconds.
+
+        param key: cache key.
+        param value: value to cache.
+        """
+        if self.ttl == 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drops a cached value straight away.
+
+        param key: cache key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def info(self) -> CacheInfo:
+        """
+        Reports cache statistics.
+
+        return: CacheInfo with hits, misses, maxsize (always None) and current size.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, None, len(self._entries))
@@ -1,11 +1,13 @@
 import logging
-from functools import wraps
-from typing import Any, Callable, Dict, Union
+from typing import Any, Callable, Dict, Optional, Sequence, Union
 
 from symone_bot.aspects import Aspect, aspect_dict
 from symone_bot.data import DatabaseClient
 
 from symone_bot.metadata import QueryMetaData
+from symone_bot.policies import Policy
+from symone_bot.prepositions import preposition_dict
+from symone_bot.registry import Derived, Registry, RegistryDict
 
 MESSAGE_RESPONSE_CHANNEL = "in_channel"
 MESSAGE_RESPONSE_EPHEMERAL = "ephemeral"
@@ -17,84 +19,99 @@ MESSAGE_RESPONSE_EPHEMERAL = "ephemeral"
 # Set next level (plus set xp... might avoid having to build an xp table..)
 
 
-def assert_aspect_and_value(f: Callable) -> Callable:
+def _require_aspect(command: "Command", kwargs: Dict[str, Any]) -> Optional[dict]:
     """
-    Decorator that checks if the supplied aspect is NoneType or not.
+    Rejects requests that name no aspect.
 
-    param f: Callable to be decorated.
-    return: Callable to be executed, or a default response if the aspect is NoneType.
+    param command: Command being run.
+    param kwargs: keyword arguments of the command.
+    return: rejection reply, or None.
     """
+    if kwargs.get("aspect"):
+        return None
+    return {
+        "response_type": MESSAGE_RESPONSE_CHANNEL,
+        "text": "I'm not sure what aspect you're trying to modify.",
+    }
 
-    @wraps(f)
-    def wrapper(**kwargs):
-        aspect = kwargs.get("aspect")
-        value = kwargs.get("value")
-        if aspect:
-            if aspect.is_singleton or not value:
-                return f(**kwargs)
-            elif value and isinstance(value, aspect.value_type):
-                return f(**kwargs)
-            else:
-                return {
-                    "response_type": MESSAGE_RESPONSE_CHANNEL,
-                    "text": f"I can't use '{value}' with {aspect.name}. It doesn't make sense.",
-                }
-        else:
-            return {
-                "response_type": MESSAGE_RESPONSE_CHANNEL,
-                "text": "I'm not sure what aspect you're trying to modify.",
-            }
 
-    return wrapper
+def _check_value_type(command: "Command", kwargs: Dict[str, Any]) -> Optional[dict]:
+    """
+    Rejects values of the wrong type for the aspect. Singleton aspects are not
+    checked.
 
+    param command: Command being run.
+    param kwargs: keyword arguments of the command.
+    return: rejection reply, or None.
+    """
+    aspect = kwargs.get("aspect")
+    value = kwargs.get("value")
+    if not aspect or aspect.is_singleton or not value:
+        return None
+    if isinstance(value, aspect.value_type):
+        return None
+    return {
+        "response_type": MESSAGE_RESPONSE_CHANNEL,
+        "text": f"I can't use '{value}' with {aspect.name}. It doesn't make sense.",
+    }
 
-def game_master_only(f: Callable) -> Callable:
+
+def _reject_singleton_aspects(
+    command: "Command", kwargs: Dict[str, Any]
+) -> Optional[dict]:
     """
-    Decorator to check if the user is the game master before executing the command.
-    param f: Callable to be decorated.
-    return: Callable to be executed, or a default response if the user is not the game master.
+    Rejects requests on singleton aspects.
+
+    param command: Command being run.
+    param kwargs: keyword arguments of the command.
+    return: rejection reply, or None.
     """
+    aspect = kwargs.get("aspect")
+    if not aspect or not aspect.is_singleton:
+        return None
+    return {
+        "response_type": MESSAGE_RESPONSE_CHANNEL,
+        "text": f"{aspect.name} is a singleton aspect, you can't call `{command.name}` on it.",
+    }
 
-    @wraps(f)
-    def wrapper(**kwargs):
-        metadata: QueryMetaData = kwargs["metadata"]
-        aspect = kwargs["aspect"]
 
-        database_client = DatabaseClient.get_client()
-        if metadata.user_id != database_client.get_game_master():
-            logging.warning(
-                f"Unauthorized user attempted to execute add command on {aspect.name if aspect else 'unknown'} Aspect."
-            )
-            return {
-                "response_type": MESSAGE_RESPONSE_CHANNEL,
-                "text": "Nice try...",
-            }
-        else:
-            return f(**kwargs)
+def _require_game_master(command: "Command", kwargs: Dict[str, Any]) -> Optional[dict]:
+    """
+    Rejects requests from anyone but the game master of the current campaign.
 
-    return wrapper
+    param command: Command being run.
+    param kwargs: keyword arguments of the command.
+    return: rejection reply, or None.
+    """
+    metadata: QueryMetaData = kwargs["metadata"]
+    database_client = DatabaseClient.get_client()
+    if metadata.user_id == database_client.get_game_master():
+        return None
+    return reject_unauthorized_user(command, kwargs.get("aspect"))
 
 
-def no_singleton_aspects(f: Callable) -> Callable:
-    """
-    Decorator to check if the aspect is a singleton before executing the command.
-    param f: Callable to be decorated.
-    return: Callable to be executed, or a default response if the aspect is a singleton.
+def reject_unauthorized_user(command: "Command", aspect: Optional[Aspect]) -> dict:
     """
+    Logs and answers a request from a user who is not the game master.
 
-    @wraps(f)
-    def wrapper(**kwargs):
-        aspect = kwargs["aspect"]
+    param command: Command the user tried to run.
+    param aspect: aspect the user tried to change, if any.
+    return: rejection reply.
+    """
+    logging.warning(
+        f"Unauthorized user attempted to execute {command.name} command on {aspect.name if aspect else 'unknown'} Aspect."
+    )
+    return {
+        "response_type": MESSAGE_RESPONSE_CHANNEL,
+        "text": "Nice try...",
+    }
 
-        if aspect and aspect.is_singleton:
-            return {
-                "response_type": MESSAGE_RESPONSE_CHANNEL,
-                "text": f"{aspect.name} is a singleton aspect, you can't call `{f.__name__}` on it.",
-            }
-        else:
-            return f(**kwargs)
 
-    return wrapper
+# Policies a command may declare, see `policies.compile_pipeline`.
+ASPECT_REQUIRED = Policy(_require_aspect)
+VALUE_TYPE = Policy(_check_value_type)
+NON_SINGLETON = Policy(_reject_singleton_aspects)
+GAME_MASTER_ONLY = Policy(_require_game_master, pure=False)
 
 
 class Command:
@@ -108,8 +125,19 @@ class Command:
         function: Callable to be wrapped.
         aspect_type: Aspect type that the command is associated with.
         is_modifier: Whether the command is a modifier.
+        policies: Checks a request must pass before the command runs, see
+            `policies.compile_pipeline`.
     """
 
+    __slots__ = (
+        "name",
+        "help_info",
+        "callable",
+        "aspect_type",
+        "is_modifier",
+        "policies",
+    )
+
     def __init__(
         self,
         name: str,
@@ -117,6 +145,7 @@ class Command:
         function: Callable,
         aspect_type: Aspect = None,
         is_modifier: bool = False,
+        policies: Sequence[Policy] = (),
     ):
         self.name = name
         self.help_info = help_info
@@ -125,6 +154,7 @@ class Command:
         self.callable = function
         self.aspect_type = aspect_type
         self.is_modifier = is_modifier
+        self.policies = tuple(policies)
 
     def __str__(self):
         return self.name
@@ -133,36 +163,38 @@ class Command:
         return f"`{self.name}`: {self.help_info}."
 
 
-def default_response(metadata: QueryMetaData, **kwargs) -> dict:
+def default_response(
+    metadata: QueryMetaData, suggestion: Optional[str] = None, **kwargs
+) -> dict:
     """
     Default response for when a command is not recognized.
 
     param metadata: QueryMetaData object containing the metadata for the request.
+    param suggestion: name of the command the query probably meant, if any.
     return: dict containing the response to be sent to Slack.
     """
     logging.info(f"Default response triggered by user: {metadata.user_id}")
+    text = "I'm sorry, I don't understand."
+    if suggestion:
+        text += f" Did you mean `{suggestion}`?"
     return {
         "response_type": MESSAGE_RESPONSE_EPHEMERAL,
-        "text": "I'm sorry, I don't understand.",
+        "text": text,
     }
 
 
 def help_message(metadata: QueryMetaData, **kwargs) -> dict:
     """
-    Auto generates help message by gathering the help info from each SymoneCommand.
+    Help message listing the help info of each Command and the tracked aspects.
+    The text is built once, see `registry.Registry`.
 
     param metadata: QueryMetaData object containing the metadata for the request.
     return: dict containing the response to be sent to Slack.
     """
-    logging.info(f"Default response triggered by user: {metadata.user_id}")
-    text = """"""
-    for command in command_dict.values():
-        if command.callable != default_response:
-            text += f"{command.help()}\n"
-    text += f"\nI am also tracking the following aspects: {', '.join([aspect.name for aspect in aspect_dict.values()])}"
+    logging.info("Help requested by user: %s", metadata.user_id)
     return {
         "response_type": MESSAGE_RESPONSE_EPHEMERAL,
-        "text": text,
+        "text": default_registry.get().help_text,
     }
 
 
@@ -183,41 +215,114 @@ def _compute_new_value(current_aspect_value, value, operator):
         raise ValueError("Operator must be either '+' or '-'.")
 
 
+def _get_aspect_value(game_context: Dict[str, Any], aspect: Aspect) -> Any:
+    """
+    Reads an aspect's value out of a game context.
+
+    param game_context: game context document.
+    param aspect: aspect to read.
+    return: value of the aspect.
+    """
+    value = game_context[aspect.database_key]
+    if aspect.sub_database_key:
+        value = value[aspect.sub_database_key]
+    return value
+
+
+# The commands below keep their logic and replies in the helpers that follow, so
+# their coroutine versions in `async_commands` only differ in awaiting the
+# database.
+
+
+def _channel_reply(text: str) -> Dict[str, str]:
+    return {"response_type": MESSAGE_RESPONSE_CHANNEL, "text": text}
+
+
+def _increment_amount(value: Union[str, int], operator: str) -> int:
+    """
+    Signed amount of the server-side increment adding or removing value.
+
+    param value: value to be added or removed.
+    param operator: "+" to add, "-" to remove.
+    return: amount to increment the aspect by.
+    """
+    if operator not in ["+", "-"]:
+        raise ValueError("Operator must be either '+' or '-'.")
+    return _compute_new_value(0, value, operator)
+
+
+def _updated_reply(aspect: Aspect, game_context: Dict[str, Any], verb: str) -> dict:
+    """
+    Reply to a change of an aspect.
+
+    param aspect: aspect that changed.
+    param game_context: game context after the change.
+    param verb: what happened to the aspect, e.g. "Updated".
+    return: dict containing the response to be sent to Slack.
+    """
+    new_aspect_value = _get_aspect_value(game_context, aspect)
+    logging.info(f"Updated {aspect.name} to {new_aspect_value}")
+    return _channel_reply(f"{verb} {aspect.name} to {new_aspect_value}")
+
+
+def _reached_level_up(game_context: Dict[str, Any]) -> bool:
+    """Whether the party's xp has reached the level up target."""
+    party = game_context["party"]
+    return party["xp"] >= party["xp_for_level_up"]
+
+
+def _level_up_reply(game_context: Dict[str, Any]) -> dict:
+    """
+    Reply to the party leveling up. Build it before incrementing the level, which
+    may update game_context in place.
+    """
+    party = game_context["party"]
+    return _channel_reply(
+        f"Updated xp to {party['xp']}. The party leveled up! :tada: "
+        f"You're now level {party['level'] + 1}!"
+    )
+
+
+def _current_reply(aspect: Aspect, game_context: Dict[str, Any]) -> dict:
+    current_value = _get_aspect_value(game_context, aspect)
+    return _channel_reply(f"{aspect.name} is currently {current_value}")
+
+
+def _set_reply(aspect: Aspect, value: Union[str, int]) -> dict:
+    logging.info(f"Updated {aspect.name} to {value}")
+    return _channel_reply(f"Set {aspect.name} to {value}")
+
+
+def _campaign_not_found_reply(value: str, error: Exception) -> dict:
+    logging.error(f"Error finding campaign: {value}")
+    logging.exception(error)
+    return _channel_reply(
+        f"Error finding campaign: `{value}`, make sure the name is correct."
+    )
+
+
+def _campaign_switched_reply(value: str) -> dict:
+    logging.info(f"Current campaign set to {value}")
+    return _channel_reply(f"Current campaign set to {value}")
+
+
 def _add_and_remove_handler(
     aspect: Aspect, value: Union[str, int], operator: str
-) -> Union[str, int]:
+) -> Dict[str, Any]:
     """
     Handles the logic for adding and removing values from aspects.
+    The change is applied as an atomic increment on the database server.
 
     param aspect: aspect to be modified.
     param value: value to be added or removed.
     param operator: operator to be used to compute the new value.
-    return: new value for the aspect.
+    return: game context after the change.
     """
-    if operator not in ["+", "-"]:
-        raise ValueError("Operator must be either '+' or '-'.")
+    amount = _increment_amount(value, operator)
     database_client = DatabaseClient.get_client()
-
-    game_context = database_client.get_current_game_context()
-
-    if aspect.sub_database_key:
-        current_aspect_value = game_context[aspect.database_key][
-            aspect.sub_database_key
-        ]
-        new_aspect_value = _compute_new_value(current_aspect_value, value, operator)
-        game_context[aspect.database_key][aspect.sub_database_key] = new_aspect_value
-    else:
-        current_aspect_value = game_context[aspect.database_key]
-        new_aspect_value = _compute_new_value(current_aspect_value, value, operator)
-        game_context[aspect.database_key] = new_aspect_value
-
-    database_client.update_game_context(game_context)
-    return new_aspect_value
+    return database_client.increment_game_context(aspect.database_path, amount)
 
 
-@assert_aspect_and_value
-@game_master_only
-@no_singleton_aspects
 def add(
     metadata: QueryMetaData, aspect: Aspect, value: Any, **kwargs
 ) -> Dict[str, str]:
@@ -229,40 +334,29 @@ def add(
     param value: Value to be added to the aspect.
     return: dict containing the response to be sent to Slack.
     """
-
-    response = {}
     logging.info(f"Add triggered by user: {metadata.user_id}")
-    new_aspect_value = _add_and_remove_handler(aspect, value, "+")
+    game_context = _add_and_remove_handler(aspect, value, "+")
+    response = _updated_reply(aspect, game_context, "Updated")
     if aspect.name == "xp":
-        response = compute_level_up(new_aspect_value, response)
-
-    logging.info(f"Updated {aspect.name} to {new_aspect_value}")
-
-    if not response:
-        response = {
-            "response_type": MESSAGE_RESPONSE_CHANNEL,
-            "text": f"Updated {aspect.name} to {new_aspect_value}",
-        }
+        response = compute_level_up(game_context, response)
     return response
 
 
-def compute_level_up(new_aspect_value, response):
-    database_client = DatabaseClient.get_client()
-    game_context = database_client.get_current_game_context()
-    party = game_context["party"]
-    level = party["level"]
-    xp_target = party["xp_for_level_up"]
-    if new_aspect_value >= xp_target:
-        game_context["party"]["level"] = level + 1
-        database_client.update_game_context(game_context)
-        response = {
-            "response_type": MESSAGE_RESPONSE_CHANNEL,
-            "text": f"Updated xp to {new_aspect_value}. The party leveled up! :tada: You're now level {level + 1}!",
-        }
+def compute_level_up(game_context, response):
+    """
+    Levels the party up if the game context's xp has reached the level up target.
+
+    param game_context: game context as returned by the xp update.
+    param response: response to return when the party did not level up.
+    return: dict containing the response to be sent to Slack.
+    """
+    if _reached_level_up(game_context):
+        database_client = DatabaseClient.get_client()
+        response = _level_up_reply(game_context)
+        database_client.increment_game_context("party.level", 1)
     return response
 
 
-@assert_aspect_and_value
 def current(metadata: QueryMetaData, aspect: Aspect, **kwargs) -> Dict[str, str]:
     """
     Gets the current aspect value.
@@ -273,20 +367,10 @@ def current(metadata: QueryMetaData, aspect: Aspect, **kwargs) -> Dict[str, str]
     """
     database_client = DatabaseClient.get_client()
     logging.info(f"Current triggered by user: {metadata.user_id}")
-    campaign = database_client.get_current_game_context()
-
-    current_value = campaign[aspect.database_key]
-    if aspect.sub_database_key:
-        current_value = current_value[aspect.sub_database_key]
-    return {
-        "response_type": MESSAGE_RESPONSE_CHANNEL,
-        "text": f"{aspect.name} is currently {current_value}",
-    }
+    campaign = database_client.get_current_game_context_fields([aspect.database_path])
+    return _current_reply(aspect, campaign)
 
 
-@assert_aspect_and_value
-@game_master_only
-@no_singleton_aspects
 def remove(
     metadata: QueryMetaData, aspect: Aspect, value: Any, **kwargs
 ) -> Dict[str, str]:
@@ -299,17 +383,10 @@ def remove(
     return: dict containing the response to be sent to Slack.
     """
     logging.info(f"Remove triggered by user: {metadata.user_id}")
-    new_aspect_value = _add_and_remove_handler(aspect, value, "-")
-    logging.info(f"Updated {aspect.name} to {new_aspect_value}")
-
-    return {
-        "response_type": MESSAGE_RESPONSE_CHANNEL,
-        "text": f"Reduced {aspect.name} to {new_aspect_value}",
-    }
+    game_context = _add_and_remove_handler(aspect, value, "-")
+    return _updated_reply(aspect, game_context, "Reduced")
 
 
-@assert_aspect_and_value
-@game_master_only
 def set_aspect(
     metadata: QueryMetaData, aspect: Aspect, value: Union[str, int], **kwargs
 ) -> Dict[str, str]:
@@ -330,13 +407,7 @@ def set_aspect(
     else:
         game_context[aspect.database_key] = value
     database_client.update_game_context(game_context)
-
-    logging.info(f"Updated {aspect.name} to {value}")
-
-    return {
-        "response_type": MESSAGE_RESPONSE_CHANNEL,
-        "text": f"Set {aspect.name} to {value}",
-    }
+    return _set_reply(aspect, value)
 
 
 def switch_campaign(metadata: QueryMetaData, value: str, **kwargs) -> Dict[str, str]:
@@ -353,47 +424,58 @@ def switch_campaign(metadata: QueryMetaData, value: str, **kwargs) -> Dict[str,
     )
 
     try:
-        found_campaign = database_client.get_context_by_campaign_name(value)
+        found_campaign = database_client.get_context_by_campaign_name(
+            value, projection={"_id": 1}
+        )
     except Exception as e:
-        logging.error(f"Error finding campaign: {value}")
-        logging.exception(e)
-        return {
-            "response_type": MESSAGE_RESPONSE_CHANNEL,
-            "text": f"Error finding campaign: `{value}`, make sure case is correct.",
-        }
+        return _campaign_not_found_reply(value, e)
     database_client.update_active_game_context(found_campaign["_id"])
+    return _campaign_switched_reply(value)
 
-    logging.info(f"Current campaign set to {value}")
 
-    return {
-        "response_type": MESSAGE_RESPONSE_CHANNEL,
-        "text": f"Current campaign set to {value}",
+# List of commands used to build out
+command_dict: Dict[str, Command] = RegistryDict(
+    {
+        "default": Command("default", "", default_response),
+        "help": Command("help", "retrieves help info", help_message),
+        "add": Command(
+            "add",
+            "adds a given value to a given aspect.",
+            add,
+            is_modifier=True,
+            policies=(ASPECT_REQUIRED, VALUE_TYPE, NON_SINGLETON, GAME_MASTER_ONLY),
+        ),
+        "current": Command(
+            "current",
+            "retrieves the current value of a given aspect.",
+            current,
+            is_modifier=False,
+            policies=(ASPECT_REQUIRED, VALUE_TYPE),
+        ),
+        "remove": Command(
+            "remove",
+            "removes a given value from a given aspect.",
+            remove,
+            is_modifier=True,
+            policies=(ASPECT_REQUIRED, VALUE_TYPE, NON_SINGLETON, GAME_MASTER_ONLY),
+        ),
+        "set": Command(
+            "set",
+            "sets a given aspect to a given value.",
+            set_aspect,
+            is_modifier=True,
+            policies=(ASPECT_REQUIRED, VALUE_TYPE, GAME_MASTER_ONLY),
+        ),
+        "switch campaign to": Command(
+            "switch campaign to",
+            "switches the current campaign.",
+            switch_campaign,
+            is_modifier=True,
+        ),
     }
+)
 
-
-# List of commands used to build out
-command_dict: Dict[str, Command] = {
-    "default": Command("default", "", default_response),
-    "help": Command("help", "retrieves help info", help_message),
-    "add": Command(
-        "add", "adds a given value to a given aspect.", add, is_modifier=True
-    ),
-    "current": Command(
-        "current",
-        "retrieves the current value of a given aspect.",
-        current,
-        is_modifier=False,
-    ),
-    "remove": Command(
-        "remove", "removes a given value from a given aspect.", remove, is_modifier=True
-    ),
-    "set": Command(
-        "set", "sets a given aspect to a given value.", set_aspect, is_modifier=True
-    ),
-    "switch campaign to": Command(
-        "switch campaign to",
-        "switches the current campaign.",
-        switch_campaign,
-        is_modifier=True,
-    ),
-}
+# Compiled view of the default registries, rebuilt after any of them changes.
+default_registry: Derived[Registry] = Derived(
+    lambda: Registry(command_dict, preposition_dict, aspect_dict)
+)
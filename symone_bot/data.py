@@ -1,20 +1,82 @@
+import atexit
+import contextlib
+import contextvars
+import logging
 import os
-from typing import Any, Dict
+import threading
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional
 
 import pymongo
 from bson import DBRef, ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.collation import Collation
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
 from pymongo.server_api import ServerApi
 
+from symone_bot.cache import CacheInfo, TTLCache
+
+DEFAULT_ACTIVE_CONTEXT_TTL = 30.0
+_ACTIVE_CONTEXT_KEY = "active_context"
+
+# Pool and timeout settings for the MongoClient, each overridable through the
+# environment variable it is listed under.
+DEFAULT_CLIENT_OPTIONS: Dict[str, int] = {
+    "maxPoolSize": 10,
+    "minPoolSize": 1,
+    "maxIdleTimeMS": 60000,
+    "connectTimeoutMS": 5000,
+    "serverSelectionTimeoutMS": 5000,
+}
+_CLIENT_OPTION_VARIABLES = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+}
+
+# Guards creating the DatabaseClient singleton and (re)connecting its MongoClient.
+_client_lock = threading.RLock()
+
+# Campaign names are matched case-insensitively, and lookups by name must use this
+# collation to be served by the name index.
+CAMPAIGN_NAME_COLLATION = Collation(locale="en", strength=2)
+
+# Indexes the queries in this module rely on, by collection.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "game_context": [
+        IndexModel(
+            [("name", ASCENDING)],
+            name="name_case_insensitive",
+            collation=CAMPAIGN_NAME_COLLATION,
+        )
+    ],
+    "current_game_context": [
+        IndexModel([("tracking_context", ASCENDING)], name="tracking_context")
+    ],
+}
+
 
 class DatabaseClient:
     """
     Client for the backing database.
 
+    There is one DatabaseClient per process, holding one pooled MongoClient.
+    Constructing it again with the same settings reuses that MongoClient; with
+    different settings the old one is closed and replaced. A process forked after
+    the MongoClient was made gets a new one on first use, as MongoClient is not
+    fork-safe.
+
     Attributes:
         mongo_password: Password for the MongoDB user.
         mongo_user: Username for the MongoDB user.
         mongo_host: Hostname for the MongoDB instance.
         mongo_scheme: URL scheme for the MongoDB connection.
+        active_context_ttl: Seconds the active game context id is cached for.
+            Another process switching campaign is seen once this expires.
+        client_options: Extra keyword arguments passed to `pymongo.MongoClient`,
+            applied over `DEFAULT_CLIENT_OPTIONS`.
     """
 
     def __init__(
@@ -23,52 +85,226 @@ class DatabaseClient:
         mongo_user: str = "symone-client",
         mongo_host: str = "gamenightserverlessinst.7ncjp.mongodb.net",
         mongo_scheme: str = "mongodb+srv",
+        active_context_ttl: float = DEFAULT_ACTIVE_CONTEXT_TTL,
+        **client_options,
     ):
         if mongo_password is None:
             raise AttributeError("'mongo_password' cannot be type 'NoneType'")
-        self.client = pymongo.MongoClient(
+        client_settings = (
             f"{mongo_scheme}://{mongo_user}:{mongo_password}@{mongo_host}/?retryWrites=true&w=majority",
-            server_api=ServerApi("1"),
+            {**DEFAULT_CLIENT_OPTIONS, **client_options},
         )
-        self.db = self.client.symone_knowledge
+        with _client_lock:
+            if getattr(self, "_client_settings", None) != client_settings:
+                self.close()
+                self._client_settings = client_settings
+                self._connect()
+        self._active_context_cache = TTLCache(active_context_ttl)
 
     def __new__(cls, *args, **kwargs):
-        if not hasattr(cls, "instance"):
-            cls.instance = super(DatabaseClient, cls).__new__(cls)
+        with _client_lock:
+            if not hasattr(cls, "instance"):
+                cls.instance = super(DatabaseClient, cls).__new__(cls)
         return cls.instance
 
     @staticmethod
     def get_client():
-        if not hasattr(DatabaseClient, "instance"):
-            return DatabaseClient(os.getenv("MONGO_PASSWORD"))
+        with _client_lock:
+            if not hasattr(DatabaseClient, "instance"):
+                database_client = DatabaseClient(
+                    os.getenv("MONGO_PASSWORD"),
+                    active_context_ttl=float(
+                        os.getenv("ACTIVE_CONTEXT_TTL", DEFAULT_ACTIVE_CONTEXT_TTL)
+                    ),
+                    **_client_options_from_env(),
+                )
+                atexit.register(database_client.close)
+                try:
+                    database_client.ping()
+                    database_client.ensure_indexes()
+                except PyMongoError as e:
+                    logging.warning(f"Could not warm up the database client: {e}")
+                return database_client
         return DatabaseClient.instance
 
+    def _connect(self) -> None:
+        mongo_uri, client_options = self._client_settings
+        self._client = pymongo.MongoClient(
+            mongo_uri, server_api=ServerApi("1"), **client_options
+        )
+        self._db = self._client.symone_knowledge
+        self._pid = os.getpid()
+
+    @property
+    def client(self) -> pymongo.MongoClient:
+        """The pooled MongoClient, replaced if the process has forked since it was made."""
+        if self._pid != os.getpid():
+            with _client_lock:
+                if self._pid != os.getpid():
+                    self._connect()
+        return self._client
+
+    @property
+    def db(self) -> Database:
+        """The bot's database, on the pooled MongoClient."""
+        if self._pid != os.getpid():
+            return self.client.symone_knowledge
+        return self._db
+
+    def ping(self) -> None:
+        """
+        Checks out a pooled connection and pings the server with it, so the cost of
+        connecting is paid at cold start rather than by the first request.
+        """
+        self.client.admin.command("ping")
+
+    def close(self) -> None:
+        """
+        Closes the MongoClient's connection pool. A MongoClient inherited from a
+        parent process is left to the parent.
+        """
+        with _client_lock:
+            if getattr(self, "_pid", None) == os.getpid():
+                self._client.close()
+
+    def ensure_indexes(self) -> None:
+        """
+        Creates the indexes listed in `INDEXES`. Existing indexes are left alone, so
+        this is safe to call on every start.
+        """
+        for collection_name, indexes in INDEXES.items():
+            self.db[collection_name].create_indexes(indexes)
+
+    def session(self) -> ContextManager["GameContextSession"]:
+        """
+        Opens a unit of work over the active game context, bound to this client.
+        See `unit_of_work`.
+
+        return: context manager yielding the GameContextSession.
+        """
+        return unit_of_work(self)
+
+    def _get_session(self) -> Optional["GameContextSession"]:
+        """
+        Gets the open unit of work for this client, if any. A unit of work opened
+        without a client is bound to the first client that uses it.
+        """
+        session = _active_session.get()
+        if session is None:
+            return None
+        if session.database_client is None:
+            session.database_client = self
+        return session if session.database_client is self else None
+
     def get_current_game_context(self) -> Dict[str, Any]:
         """
         Gets the game context from the database.
+        Inside a session, the session's copy of the game context is returned.
 
         return: Dict containing the game context data.
         """
-        current_game_context_id: DBRef = self.get_context_tracker()["active_context"]
-        game_context = self.db.game_context.find_one(
-            {"_id": current_game_context_id.id}
-        )
+        session = self._get_session()
+        if session is not None:
+            return session.game_context
+        return self._find_current_game_context()
+
+    def get_current_game_context_fields(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """
+        Gets only the given fields of the game context, for read-only use.
+        Inside a session that has already loaded the game context, the session's
+        copy is returned, so changes made earlier in the session are visible. A
+        session deferring increments runs a batch of statements, so it loads the
+        whole game context here for the statements after this one to share.
+
+        param paths: dotted paths of the fields to read, e.g. `Aspect.database_path`.
+        return: Dict containing the requested fields of the game context data.
+        """
+        session = self._get_session()
+        if session is not None and (session.is_loaded or session.defer_increments):
+            return session.game_context
+        return self._find_game_context_document({path: 1 for path in paths})
+
+    def _find_current_game_context(self) -> "GameContext":
+        return GameContext(self._find_game_context_document())
+
+    def _find_game_context_document(
+        self, projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        game_context = None
+        cached_id = self._active_context_cache.get(_ACTIVE_CONTEXT_KEY)
+        if cached_id is not None:
+            game_context = self.db.game_context.find_one({"_id": cached_id}, projection)
+        if game_context is None:
+            # the id was not cached, or the cached id has gone stale
+            game_context = self.find_active_game_context(projection)
         if game_context is None:
             raise DatabaseClientException("No current game context found.")
         return game_context
 
-    def get_context_by_campaign_name(self, campaign_name: str):
+    def find_active_game_context(
+        self, projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gets the active game context in a single round trip, by joining the context
+        tracker to its game context in one aggregation. Warms the cached active
+        game context id.
+
+        param projection: optional projection applied to the game context.
+        return: Dict containing the game context data, or None if the tracker
+            points at no game context.
+        """
+        pipeline = active_game_context_pipeline(projection)
+        game_context = next(self.db.current_game_context.aggregate(pipeline), None)
+        if game_context is not None:
+            self._active_context_cache.put(_ACTIVE_CONTEXT_KEY, game_context["_id"])
+        return game_context
+
+    def get_active_context_id(self) -> ObjectId:
+        """
+        Gets the id of the active game context. The id is cached for
+        `active_context_ttl` seconds, and dropped when the campaign is switched.
+
+        return: ObjectId of the active game context.
+        """
+        active_context_id = self._active_context_cache.get(_ACTIVE_CONTEXT_KEY)
+        if active_context_id is None:
+            active_context_id = self._load_active_context_id()
+        return active_context_id
+
+    def _load_active_context_id(self) -> ObjectId:
+        active_context: DBRef = self.get_context_tracker()["active_context"]
+        self._active_context_cache.put(_ACTIVE_CONTEXT_KEY, active_context.id)
+        return active_context.id
+
+    def active_context_cache_info(self) -> CacheInfo:
+        """
+        Reports hit/miss statistics for the cached active game context id.
+
+        return: CacheInfo.
+        """
+        return self._active_context_cache.info()
+
+    def get_context_by_campaign_name(
+        self, campaign_name: str, projection: Optional[Dict[str, Any]] = None
+    ):
         """
         Gets the game context from the database, using the campaign name.
+        The name is matched case-insensitively.
 
         param campaign_name: Name of the campaign to retrieve.
+        param projection: optional projection, e.g. {"_id": 1} when only the id is needed.
         return: Dict containing the game context data.
         """
-        game_contexts = list(self.db.game_context.find({"name": campaign_name}))
+        # two results are enough to tell a unique match from an ambiguous one
+        game_contexts = list(
+            self.db.game_context.find(
+                {"name": campaign_name},
+                projection,
+                collation=CAMPAIGN_NAME_COLLATION,
+            ).limit(2)
+        )
         if len(game_contexts) == 0:
-            raise DatabaseClientException(
-                "No campaign found with that name. Make sure case is correct"
-            )
+            raise DatabaseClientException("No campaign found with that name.")
         elif len(game_contexts) > 1:
             raise DatabaseClientException(
                 "Multiple game_contexts found with that name."
@@ -78,11 +314,14 @@ class DatabaseClient:
     def get_game_master(self) -> str:
         """
         Gets the game master for the current game context.
+        Inside a session the whole game context is loaded, since the game master is
+        checked before the commands that go on to modify it.
 
         return: String containing the game master's user ID.
         """
-        game_context = self.get_current_game_context()
-        return game_context["game_master"]
+        if self._get_session() is not None:
+            return self.get_current_game_context()["game_master"]
+        return self.get_current_game_context_fields(["game_master"])["game_master"]
 
     def get_context_tracker(self):
         """
@@ -98,14 +337,64 @@ class DatabaseClient:
 
         return context_tracker
 
+    def increment_game_context(self, path: str, amount: int) -> Dict[str, Any]:
+        """
+        Atomically increments a field of the active game context on the server.
+        Inside a session the session's copy is updated as well, and the write may be
+        deferred until the session ends (see `unit_of_work`).
+
+        param path: dotted path of the field to increment, e.g. "party.xp".
+        param amount: amount to add, negative to subtract.
+        return: Dict containing the game context data after the increment.
+        """
+        session = self._get_session()
+        if session is not None:
+            return session.increment(path, amount)
+        return self._increment_game_context(
+            self.get_active_context_id(), {path: amount}
+        )
+
+    def _increment_game_context(
+        self,
+        game_context_id: ObjectId,
+        increments: Dict[str, int],
+        changes: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        game_context = self.db.game_context.find_one_and_update(
+            {"_id": game_context_id},
+            {"$inc": increments, **(changes or {})},
+            return_document=ReturnDocument.AFTER,
+        )
+        if game_context is None:
+            raise DatabaseClientException("No current game context found.")
+        return GameContext(game_context)
+
     def update_game_context(self, game_context: Dict[str, Any]) -> None:
         """
         Updates the game context in the database.
+        Only the fields changed since the game context was loaded are sent, and
+        nothing is written if none changed. Inside a session, the write is deferred
+        until the session ends.
 
         param game_context: Dict containing the game context data.
         """
+        session = self._get_session()
+        if session is not None and session.holds(game_context):
+            session.mark_dirty()
+            return
+        self._write_game_context(game_context)
+
+    def _write_game_context(self, game_context: Dict[str, Any]) -> None:
+        if isinstance(game_context, GameContext):
+            update = game_context.changes()
+            if not update:
+                return
+        else:
+            update = {"$set": game_context}
         update_filter = {"_id": game_context["_id"]}
-        self.db.game_context.update_one(update_filter, {"$set": game_context})
+        self.db.game_context.update_one(update_filter, update)
+        if isinstance(game_context, GameContext):
+            game_context.mark_clean()
 
     def update_active_game_context(self, id_ref: ObjectId) -> None:
         """
@@ -113,15 +402,295 @@ class DatabaseClient:
 
         param id_ref: DBRef containing the game context ID.
         """
-        context_tracker = self.get_context_tracker()
-        self.db.current_game_context.update_one(
-            {"_id": context_tracker["_id"]},
+        session = self._get_session()
+        if session is not None:
+            # pending changes belong to the outgoing context
+            session.flush()
+            session.reset()
+        result = self.db.current_game_context.update_one(
+            {"tracking_context": True},
             {
                 "$set": {
                     "active_context": DBRef("game_context", id_ref, "symone_knowledge")
                 }
             },
         )
+        self._active_context_cache.invalidate(_ACTIVE_CONTEXT_KEY)
+        if result.matched_count == 0:
+            raise DatabaseClientException("Could not locate context tracking entity.")
+
+
+class GameContext(dict):
+    """
+    Game context document that tracks its own changes. A snapshot is taken when
+    the document is loaded, and `changes` compares against it to build an update
+    touching only the dotted paths that changed.
+    """
+
+    def __init__(self, document: Dict[str, Any]):
+        super().__init__(document)
+        self._snapshot = _copy_document(document)
+
+    def changes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Builds the update document for the changes made since the snapshot.
+
+        return: update with `$set` and `$unset` operators, empty if nothing changed.
+        """
+        set_fields = {}
+        unset_fields = {}
+        _diff_documents(self._snapshot, self, "", set_fields, unset_fields)
+        update = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if unset_fields:
+            update["$unset"] = unset_fields
+        return update
+
+    def mark_clean(self) -> None:
+        """Takes a new snapshot, once the changes have been written."""
+        self._snapshot = _copy_document(self)
+
+    def apply_increment(self, path: str, amount: int) -> None:
+        """
+        Increments a field in both the document and its snapshot, so the increment
+        is left out of `changes` and can be sent as a `$inc` instead.
+
+        param path: dotted path of the field.
+        param amount: amount to add.
+        """
+        for document in (self, self._snapshot):
+            *parents, field = path.split(".")
+            for key in parents:
+                document = document[key]
+            document[field] += amount
+
+
+def _copy_document(document: Any) -> Any:
+    """
+    Deep copies the containers of a document. Values decoded from BSON other than
+    documents and arrays are immutable, so they are shared rather than copied,
+    which is several times faster than copy.deepcopy.
+    """
+    if isinstance(document, dict):
+        return {key: _copy_document(value) for key, value in document.items()}
+    if isinstance(document, list):
+        return [_copy_document(value) for value in document]
+    return document
+
+
+def _diff_documents(
+    original: Dict[str, Any],
+    current: Dict[str, Any],
+    prefix: str,
+    set_fields: Dict[str, Any],
+    unset_fields: Dict[str, str],
+) -> None:
+    """Collects the dotted paths that differ between two documents."""
+    for key, value in current.items():
+        path = prefix + key
+        if key not in original:
+            set_fields[path] = value
+        elif value == original[key]:
+            # equality of whole subdocuments is checked in C, so only changed
+            # subdocuments are walked
+            continue
+        elif isinstance(value, dict) and isinstance(original[key], dict):
+            _diff_documents(original[key], value, path + ".", set_fields, unset_fields)
+        else:
+            set_fields[path] = value
+    for key in original.keys() - current.keys():
+        unset_fields[prefix + key] = ""
+
+
+def _overlaps(path: str, paths: Iterable[str]) -> bool:
+    """Whether path is, contains or is contained by any of the dotted paths."""
+    return any(
+        path == other or path.startswith(other + ".") or other.startswith(path + ".")
+        for other in paths
+    )
+
+
+class GameContextSession:
+    """
+    Unit of work over the active game context, opened with `unit_of_work`.
+
+    The game context is loaded on first use and shared by every read in the
+    session. Updates mark it dirty, and `flush` writes it back in one update.
+    Increments are sent as a server-side `$inc`, straight away unless
+    `defer_increments` is set, in which case they go out with the final write.
+
+    Attributes:
+        database_client: DatabaseClient the session reads from and writes to.
+        defer_increments: Whether increments wait for `flush`.
+    """
+
+    def __init__(
+        self,
+        database_client: Optional[DatabaseClient] = None,
+        defer_increments: bool = False,
+    ):
+        self.database_client = database_client
+        self.defer_increments = defer_increments
+        self._game_context = None
+        self._dirty = False
+        self._increments: Dict[str, int] = {}
+
+    @property
+    def game_context(self) -> GameContext:
+        """The active game context, loaded from the database on first access."""
+        if self._game_context is None:
+            self._game_context = self.database_client._find_current_game_context()
+        return self._game_context
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the game context has been loaded from the database."""
+        return self._game_context is not None
+
+    def holds(self, game_context: Dict[str, Any]) -> bool:
+        """Whether game_context is the copy loaded by this session."""
+        return game_context is self._game_context
+
+    def mark_dirty(self) -> None:
+        """Flags the loaded game context as needing a write."""
+        self._dirty = True
+
+    def increment(self, path: str, amount: int) -> Dict[str, Any]:
+        """
+        Increments a field of the game context, see `DatabaseClient.increment_game_context`.
+
+        param path: dotted path of the field to increment.
+        param amount: amount to add, negative to subtract.
+        return: Dict containing the game context data after the increment.
+        """
+        self._increments[path] = self._increments.get(path, 0) + amount
+        self.game_context.apply_increment(path, amount)
+        if not self.defer_increments:
+            self.flush()
+        return self.game_context
+
+    def flush(self) -> None:
+        """
+        Writes pending changes back in a single update: the fields changed since
+        the game context was loaded, plus any pending increments. An increment on a
+        field that was also overwritten is already part of the written value.
+        With increments, the returned document replaces the loaded copy.
+        """
+        changes = self._game_context.changes() if self._dirty else {}
+        set_fields = changes.get("$set", {}).keys() | changes.get("$unset", {}).keys()
+        increments = {
+            path: amount
+            for path, amount in self._increments.items()
+            if not _overlaps(path, set_fields)
+        }
+        if increments:
+            self._game_context = self.database_client._increment_game_context(
+                self._game_context["_id"], increments, changes
+            )
+        elif changes:
+            self.database_client._write_game_context(self._game_context)
+        self._dirty = False
+        self._increments = {}
+
+    def reset(self) -> None:
+        """Discards the loaded game context so the next access reloads it."""
+        self._game_context = None
+        self._dirty = False
+        self._increments = {}
+
+
+_active_session: contextvars.ContextVar[Optional[GameContextSession]] = (
+    contextvars.ContextVar("active_game_context_session", default=None)
+)
+
+
+@contextlib.contextmanager
+def unit_of_work(
+    database_client: Optional[DatabaseClient] = None,
+    defer_increments: bool = False,
+) -> Iterator[GameContextSession]:
+    """
+    Opens a request-scoped unit of work over the active game context. Inside the
+    block, every DatabaseClient read of the active game context is served from one
+    copy loaded on first use, and updates are written once when the block exits.
+    Changes are discarded if the block raises. Entering while a unit of work is
+    already open reuses the open one.
+
+    param database_client: client to bind to; defaults to the first client used.
+    param defer_increments: hold increments for the final write instead of sending
+        each one as it happens.
+    return: context manager yielding the GameContextSession.
+    """
+    active_session = _active_session.get()
+    if active_session is not None:
+        if database_client is None:
+            yield active_session
+            return
+        if active_session.database_client in (None, database_client):
+            active_session.database_client = database_client
+            yield active_session
+            return
+
+    session = GameContextSession(database_client, defer_increments)
+    token = _active_session.set(session)
+    try:
+        yield session
+        session.flush()
+    finally:
+        _active_session.reset(token)
+
+
+def active_game_context_pipeline(
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Builds the aggregation, run on the current_game_context collection, that joins
+    the context tracker to the game context it points at.
+
+    param projection: optional projection applied to the game context.
+    return: aggregation pipeline.
+    """
+    pipeline = [
+        {"$match": {"tracking_context": True}},
+        {"$limit": 1},
+        {
+            "$addFields": {
+                "active_context_id": {
+                    "$getField": {
+                        "field": {"$literal": "$id"},
+                        "input": "$active_context",
+                    }
+                }
+            }
+        },
+        {
+            "$lookup": {
+                "from": "game_context",
+                "localField": "active_context_id",
+                "foreignField": "_id",
+                "as": "game_context",
+            }
+        },
+        {"$unwind": "$game_context"},
+        {"$replaceRoot": {"newRoot": "$game_context"}},
+    ]
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
+
+
+def _client_options_from_env() -> Dict[str, int]:
+    """
+    Reads the MongoClient pool and timeout settings set in the environment.
+
+    return: Dict of MongoClient keyword arguments.
+    """
+    return {
+        option: int(os.environ[variable])
+        for option, variable in _CLIENT_OPTION_VARIABLES.items()
+        if variable in os.environ
+    }
 
 
 class DatabaseClientException(Exception):
@@ -0,0 +1,117 @@
+"""
+Typo-tolerant lookup of registry keywords.
+"""
+
+import collections
+import itertools
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Words shorter than this are never corrected: too many keywords are one or two
+# edits away from them.
+MIN_TYPO_LENGTH = 3
+
+
+def max_typo_distance(word: str) -> int:
+    """
+    Number of edits tolerated in a word of this length.
+
+    param word: word as typed.
+    return: 0 for short words, 1 up to five characters, 2 beyond that.
+    """
+    if len(word) < MIN_TYPO_LENGTH:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+def bounded_levenshtein(first: str, second: str, max_distance: int) -> int:
+    """
+    Levenshtein distance, computed only as far as max_distance.
+
+    param first: a string.
+    param second: another string.
+    param max_distance: largest distance of interest.
+    return: the distance, or max_distance + 1 if it is larger than max_distance.
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+        for j, second_char in enumerate(second, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (first_char != second_char),
+                )
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"  {word}  "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NGramIndex:
+    """
+    Trigram index over a fixed set of keywords, finding the keywords nearest to a
+    misspelled word without comparing it against every keyword.
+
+    A word within d edits of a keyword is at most d characters longer or shorter
+    and shares all but at most 3d of its padded trigrams with it. Keywords are
+    indexed by trigram and length, and only those sharing enough trigrams with
+    the word have their edit distance computed.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._postings: Dict[Tuple[str, int], List[str]] = collections.defaultdict(list)
+        self._trigram_counts: Dict[str, int] = {}
+        for keyword in keywords:
+            if keyword in self._trigram_counts:
+                continue
+            trigrams = _trigrams(keyword)
+            self._trigram_counts[keyword] = len(trigrams)
+            for trigram in trigrams:
+                self._postings[(trigram, len(keyword))].append(keyword)
+        self._postings = dict(self._postings)
+
+    def nearest(self, word: str) -> Tuple[List[str], int]:
+        """
+        Finds the keywords closest to word, within `max_typo_distance(word)` edits.
+
+        param word: lowercased word or phrase.
+        return: (keywords, distance), keywords being empty if none is close enough.
+            Several keywords are returned when they are equally close.
+        """
+        max_distance = max_typo_distance(word)
+        if max_distance == 0:
+            return [], 0
+        trigrams = _trigrams(word)
+        lengths = range(len(word) - max_distance, len(word) + max_distance + 1)
+        shared = collections.Counter(
+            itertools.chain.from_iterable(
+                self._postings.get((trigram, length), ())
+                for trigram in trigrams
+                for length in lengths
+            )
+        )
+        best: List[str] = []
+        best_distance = max_distance
+        # most shared first: once too few are shared, no later keyword is close
+        for keyword, count in shared.most_common():
+            if count < len(trigrams) - 3 * best_distance:
+                break
+            if count < self._trigram_counts[keyword] - 3 * best_distance:
+                continue
+            distance = bounded_levenshtein(word, keyword, best_distance)
+            if distance < best_distance:
+                best, best_distance = [keyword], distance
+            elif distance == best_distance:
+                best.append(keyword)
+        return best, best_distance
@@ -0,0 +1,311 @@
+"""
+Deduplication of Slack event deliveries.
+
+Slack redelivers an event it did not see acknowledged within three seconds,
+marking the retry with `X-Slack-Retry-Num`. Every delivery carries the same
+`event_id`, so a query is run for the first delivery only and later ones are
+answered from the recorded result.
+"""
+
+import asyncio
+import collections
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from symone_bot.cache import CacheInfo
+
+# Slack gives up after the third retry, about five minutes after the event.
+DEFAULT_EVENT_TTL = 900.0
+DEFAULT_EVENT_LOG_SIZE = 1024
+EVENT_COLLECTION = "processed_events"
+
+# recorded for an event whose first delivery is still being processed
+_PENDING = object()
+
+_deduplicator_lock = threading.Lock()
+
+
+def event_key(body: Dict[str, Any]) -> Optional[str]:
+    """
+    Identifies a Slack event across deliveries.
+
+    param body: parsed request body.
+    return: the event_id, else the message's client_msg_id, else None.
+    """
+    event = body.get("event")
+    client_msg_id = event.get("client_msg_id") if isinstance(event, dict) else None
+    return body.get("event_id") or client_msg_id
+
+
+class EventLog:
+    """
+    Thread-safe, size-bounded record of the events seen by this process, each
+    forgotten a fixed time after it was recorded.
+
+    Attributes:
+        ttl: Seconds an event is remembered for.
+        maxsize: Maximum number of events kept before the oldest is evicted.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_EVENT_TTL,
+        maxsize: int = DEFAULT_EVENT_LOG_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ttl < 0:
+            raise ValueError("'ttl' cannot be negative.")
+        if maxsize < 1:
+            raise ValueError("'maxsize' must be at least 1.")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def claim(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Records the event as being processed, unless it already is or was.
+
+        param key: event key, see `event_key`.
+        return: (True, None) if the caller should process the event, otherwise
+            (False, result), with result None while the first delivery is still
+            being processed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._hits += 1
+                return False, None if entry[0] is _PENDING else entry[0]
+            self._misses += 1
+            self._store(key, _PENDING)
+            return True, None
+
+    def complete(self, key: Hashable, result: Any) -> None:
+        """
+        Records the result of processing the event.
+
+        param key: event key.
+        param result: result to answer later deliveries with.
+        """
+        with self._lock:
+            self._store(key, result)
+
+    def release(self, key: Hashable) -> None:
+        """
+        Forgets the event, so that a later delivery processes it again.
+
+        param key: event key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def info(self) -> CacheInfo:
+        """
+        Reports how many deliveries were duplicates (hits) and how many were new
+        (misses).
+
+        return: CacheInfo with hits, misses, maxsize and current size.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, self._clock() + self.ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class EventDeduplicator:
+    """
+    Runs each Slack event's work once. Deliveries are first checked against the
+    in-process `EventLog`, which answers retries reaching the same process. With
+    a collection, events are also claimed in MongoDB, so a retry routed to another
+    instance finds the first delivery's result there. A TTL index on `created_at`
+    expires the documents.
+
+    Attributes:
+        event_log: In-process record of events.
+        collection: Optional collection shared by every instance.
+    """
+
+    def __init__(self, event_log: EventLog, collection: Optional[Collection] = None):
+        self.event_log = event_log
+        self.collection = collection
+
+    @staticmethod
+    def get_deduplicator() -> "EventDeduplicator":
+        """
+        Gets the process-wide deduplicator, configured from EVENT_DEDUP_TTL,
+        EVENT_DEDUP_LOG_SIZE and EVENT_DEDUP_STORE ("memory", the default, or
+        "mongo" to share processed events between instances).
+
+        return: EventDeduplicator
+        """
+        with _deduplicator_lock:
+            if not hasattr(EventDeduplicator, "instance"):
+                event_log = EventLog(
+                    float(os.getenv("EVENT_DEDUP_TTL", DEFAULT_EVENT_TTL)),
+                    int(os.getenv("EVENT_DEDUP_LOG_SIZE", DEFAULT_EVENT_LOG_SIZE)),
+                )
+                collection = None
+                if os.getenv("EVENT_DEDUP_STORE", "memory") == "mongo":
+                    from symone_bot.data import DatabaseClient
+
+                    collection = DatabaseClient.get_client().db[EVENT_COLLECTION]
+                deduplicator = EventDeduplicator(event_log, collection)
+                if collection is not None:
+                    try:
+                        deduplicator.ensure_index()
+                    except PyMongoError as e:
+                        logging.warning(f"Could not index processed events: {e}")
+                EventDeduplicator.instance = deduplicator
+        return EventDeduplicator.instance
+
+    def ensure_index(self) -> None:
+        """Creates the TTL index expiring processed events in the collection."""
+        self.collection.create_indexes(
+            [
+                IndexModel(
+                    [("created_at", ASCENDING)],
+                    name="expire_processed_events",
+                    expireAfterSeconds=int(self.event_log.ttl),
+                )
+            ]
+        )
+
+    def claim(self, key: str) -> Tuple[bool, Any]:
+        """
+        Claims an event for processing, in the collection too if there is one. If
+        that raises, the event is released so that Slack's retry runs it again.
+
+        param key: event key, see `event_key`.
+        return: (True, None) if the caller should process the event, otherwise
+            (False, result), see `EventLog.claim`.
+        """
+        claimed, result = self.event_log.claim(key)
+        if claimed and self.collection is not None:
+            try:
+                claimed, result = self._claim_shared(key)
+            except Exception:
+                self.event_log.release(key)
+                raise
+        return claimed, result
+
+    def complete(self, key: str, result: Any) -> None:
+        """
+        Records the result of a claimed event. Failing to record it in the
+        collection is logged, as the result is still good to post.
+
+        param key: event key.
+        param result: result to answer later deliveries with.
+        """
+        self.event_log.complete(key, result)
+        self._record_shared(key, result)
+
+    def release(self, key: str) -> None:
+        """
+        Forgets a claimed event, so that a later delivery processes it again.
+
+        param key: event key.
+        """
+        self.event_log.release(key)
+        self._forget_shared(key)
+
+    def run(self, key: Optional[str], work: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Runs work for the first delivery of an event. If work raises, the event is
+        released so that Slack's retry runs it again.
+
+        param key: event key, see `event_key`. Work always runs without one.
+        param work: function processing the event.
+        return: (result, replayed), where replayed is True for a repeated delivery.
+            The result is then the first delivery's, or None while that is still
+            being processed.
+        """
+        if key is None:
+            return work(), False
+        claimed, result = self.claim(key)
+        if not claimed:
+            return result, True
+        try:
+            result = work()
+        except Exception:
+            self.release(key)
+            raise
+        self.complete(key, result)
+        return result, False
+
+    async def run_async(
+        self, key: Optional[str], work: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Coroutine version of `run`, for the AsyncApp. Work is a coroutine function.
+        The collection is reached through pymongo, off the event loop.
+
+        param key: event key, see `event_key`. Work always runs without one.
+        param work: coroutine function processing the event.
+        return: (result, replayed), see `run`.
+        """
+        if key is None:
+            return await work(), False
+        claimed, result = await self._off_loop(self.claim, key)
+        if not claimed:
+            return result, True
+        try:
+            result = await work()
+        except Exception:
+            await self._off_loop(self.release, key)
+            raise
+        await self._off_loop(self.complete, key, result)
+        return result, False
+
+    async def _off_loop(self, function: Callable[..., Any], *args) -> Any:
+        # only the collection blocks; the in-process log is a dict lookup
+        if self.collection is None:
+            return function(*args)
+        return await asyncio.to_thread(function, *args)
+
+    def _claim_shared(self, key: str) -> Tuple[bool, Any]:
+        try:
+            self.collection.insert_one(
+                {"_id": key, "created_at": datetime.datetime.utcnow()}
+            )
+            return True, None
+        except DuplicateKeyError:
+            # another instance has the event; remember its result once there is one
+            document = self.collection.find_one({"_id": key}) or {}
+            if "result" in document:
+                self.event_log.complete(key, document["result"])
+            else:
+                self.event_log.release(key)
+            return False, document.get("result")
+
+    def _record_shared(self, key: str, result: Any) -> None:
+        if self.collection is None:
+            return
+        try:
+            self.collection.update_one({"_id": key}, {"$set": {"result": result}})
+        except PyMongoError as e:
+            # the result is computed and still gets posted; a retry reaching
+            # another instance finds the event pending and posts nothing
+            logging.warning(f"Could not record the result of event {key}: {e}")
+
+    def _forget_shared(self, key: str) -> None:
+        if self.collection is None:
+            return
+        try:
+            self.collection.delete_one({"_id": key})
+        except PyMongoError as e:
+            logging.warning(f"Could not release event {key}: {e}")
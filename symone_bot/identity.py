@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Mapping, NamedTuple, Optional
+
+from slack_bolt.authorization import AuthorizeResult
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+# Errors Slack answers with when the token itself is bad.
+SLACK_TOKEN_ERRORS = {
+    "account_inactive",
+    "invalid_auth",
+    "not_authed",
+    "token_expired",
+    "token_revoked",
+}
+
+
+class BotIdentity(NamedTuple):
+    """
+    Who the bot is in its Slack workspace, as reported by `auth.test`.
+
+    Attributes:
+        bot_user_id: User ID of the bot user, e.g. "U0123ABCD".
+        bot_id: Bot ID, e.g. "B0123ABCD".
+        team_id: Workspace ID, e.g. "T0123ABCD".
+        enterprise_id: Enterprise Grid organization ID, if any.
+    """
+
+    bot_user_id: str
+    bot_id: str
+    team_id: str
+    enterprise_id: Optional[str] = None
+
+    def authorizer(self, token: str) -> Callable[..., AuthorizeResult]:
+        """
+        Builds a Bolt `authorize` function that accepts token as this bot without
+        calling `auth.test`. A bad token is then first noticed when a Web API call
+        made with it fails, see `is_token_error`.
+
+        param token: bot token, starting with "xoxb-".
+        return: authorize function for `slack_bolt.App`.
+        """
+
+        def authorize(**kwargs) -> AuthorizeResult:
+            return AuthorizeResult(
+                enterprise_id=self.enterprise_id,
+                team_id=self.team_id,
+                bot_user_id=self.bot_user_id,
+                bot_id=self.bot_id,
+                bot_token=token,
+            )
+
+        return authorize
+
+    def async_authorizer(self, token: str) -> Callable[..., Awaitable[AuthorizeResult]]:
+        """
+        Builds the `authorizer` function for `slack_bolt.async_app.AsyncApp`.
+
+        param token: bot token, starting with "xoxb-".
+        return: authorize coroutine function for `AsyncApp`.
+        """
+        authorize = self.authorizer(token)
+
+        async def async_authorize(**kwargs) -> AuthorizeResult:
+            return authorize(**kwargs)
+
+        return async_authorize
+
+
+def identity_from_env(environ: Mapping[str, str]) -> Optional[BotIdentity]:
+    """
+    Reads the bot identity from SLACK_BOT_USER_ID, SLACK_BOT_ID, SLACK_TEAM_ID and
+    the optional SLACK_ENTERPRISE_ID.
+
+    param environ: environment variables.
+    return: BotIdentity, or None unless all three required variables are set.
+    """
+    try:
+        return BotIdentity(
+            environ["SLACK_BOT_USER_ID"],
+            environ["SLACK_BOT_ID"],
+            environ["SLACK_TEAM_ID"],
+            environ.get("SLACK_ENTERPRISE_ID"),
+        )
+    except KeyError:
+        return None
+
+
+def read_cached_identity(path: str) -> Optional[BotIdentity]:
+    """
+    Reads a bot identity saved by `save_identity`.
+
+    param path: cache file path.
+    return: BotIdentity, or None if the file is missing or unreadable.
+    """
+    try:
+        with open(path) as cache_file:
+            return BotIdentity(**json.load(cache_file))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def save_identity(identity: BotIdentity, path: str) -> None:
+    """
+    Saves a bot identity for `read_cached_identity`.
+
+    param identity: identity to save.
+    param path: cache file path.
+    """
+    with open(path, "w") as cache_file:
+        json.dump(identity._asdict(), cache_file)
+
+
+def forget_cached_identity(environ: Mapping[str, str] = os.environ) -> None:
+    """
+    Deletes the identity cache file named by SLACK_IDENTITY_CACHE, if there is one.
+
+    param environ: environment variables.
+    """
+    path = environ.get("SLACK_IDENTITY_CACHE")
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def fetch_identity(client: WebClient) -> BotIdentity:
+    """
+    Asks Slack who the client's token belongs to.
+
+    param client: WebClient holding the bot token.
+    return: BotIdentity.
+    """
+    auth_test = client.auth_test()
+    return BotIdentity(
+        auth_test["user_id"],
+        auth_test["bot_id"],
+        auth_test["team_id"],
+        auth_test.get("enterprise_id"),
+    )
+
+
+def resolve_identity(
+    token: Optional[str],
+    environ: Mapping[str, str] = os.environ,
+    client: Optional[WebClient] = None,
+) -> Optional[BotIdentity]:
+    """
+    Finds the bot identity without a Slack round trip where possible: from the
+    environment (`identity_from_env`), then from the cache file named by
+    SLACK_IDENTITY_CACHE. With a cache file configured but empty, the identity is
+    fetched once with `auth.test` and saved for the next start.
+
+    param token: bot token.
+    param environ: environment variables.
+    param client: WebClient used for `auth.test`, one for token by default.
+    return: BotIdentity, or None if none is configured, leaving Bolt to verify
+        the token itself.
+    """
+    identity = identity_from_env(environ)
+    cache_path = environ.get("SLACK_IDENTITY_CACHE")
+    if identity is not None or not cache_path:
+        return identity
+    identity = read_cached_identity(cache_path)
+    if identity is None and token:
+        identity = fetch_identity(client or WebClient(token=token))
+        try:
+            save_identity(identity, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not cache the bot identity: {e}")
+    return identity
+
+
+def is_token_error(error: Exception) -> bool:
+    """
+    Whether error is Slack rejecting the bot token.
+
+    param error: error raised by a listener.
+    return: bool
+    """
+    return (
+        isinstance(error, SlackApiError)
+        and error.response.get("error") in SLACK_TOKEN_ERRORS
+    )
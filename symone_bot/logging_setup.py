@@ -0,0 +1,32 @@
+"""
+Logging configuration shared by the entry points, `main.py` and `async_main.py`.
+"""
+
+import logging
+import sys
+
+
+def setup_logging(deployment_environment: str) -> None:
+    """
+    Configures logging, through Google Cloud Logging when deployed.
+
+    param deployment_environment: "prod" when deployed, e.g. "local" otherwise.
+    """
+    if deployment_environment == "prod":
+        import google.cloud.logging
+
+        client = google.cloud.logging.Client()
+        client.setup_logging()
+        logging.basicConfig(
+            format="%(asctime)s\t%(levelname)s\t%(message)s",
+            datefmt="%m/%d/%Y %I:%M:%S %p",
+            stream=sys.stdout,
+            level=logging.INFO,
+        )
+    else:
+        logging.basicConfig(
+            format="%(asctime)s\t%(levelname)s\t%(message)s",
+            datefmt="%m/%d/%Y %I:%M:%S %p",
+            stream=sys.stdout,
+            level=logging.DEBUG,
+        )
@@ -1,6 +1,8 @@
 class QueryMetaData:
     """Stores metadata about the incoming query such as user-id, headers, etc."""
 
+    __slots__ = ("user_id",)
+
     def __init__(self, user_id: str):
         if not isinstance(user_id, str):
             raise AttributeError("'user_id' cannot be None.")
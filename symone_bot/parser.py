@@ -3,34 +3,110 @@ Tools to parse queries to the bot.
 """
 import collections
 import logging
-import re
-from typing import Dict, Generator, Pattern, Union, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from symone_bot.aspects import Aspect, aspect_dict
-from symone_bot.commands import Command, command_dict
+from symone_bot.cache import CacheInfo, LRUCache
+from symone_bot.commands import Command, command_dict, default_registry
 from symone_bot.prepositions import Preposition, preposition_dict
+from symone_bot.registry import Derived, Registry, RegistryDict
 from symone_bot.response import SymoneResponse
 
-Token = collections.namedtuple("Token", ["type", "value"])
+# The tokenizer is part of the parser's interface.
+from symone_bot.tokenizer import (  # noqa: F401
+    KeywordTokenizer,
+    Token,
+    build_tokenizer,
+    generate_tokens,
+)
 
+ParsedQuery = collections.namedtuple(
+    "ParsedQuery",
+    ["command", "aspect", "value", "preposition", "suggestion"],
+    defaults=[None],
+)
 
-def generate_tokens(text: str, master_pattern: Pattern) -> Generator:
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes query text for use as a cache key.
+    Runs of whitespace are collapsed, except in queries with quoted string values,
+    where whitespace is significant and only the ends are stripped. The tokenizer
+    reads any run of whitespace between the words of a keyword as one space, so
+    collapsing runs does not change how a query parses.
+    :param query: query text.
+    :return: normalized query text.
+    """
+    if '"' in query:
+        return query.strip()
+    return " ".join(query.split())
+
+
+def split_statements(query: str) -> List[str]:
+    """
+    Splits a query into its statements, which are separated by `;` or newlines.
+    Separators inside a quoted string value do not split it, and blank statements
+    are dropped.
+    :param query: query text.
+    :return: List of statement texts.
+    """
+    statements = []
+    start = 0
+    in_string = False
+    for index, char in enumerate(query):
+        if char == '"':
+            in_string = not in_string
+        elif char == "\n" or (char == ";" and not in_string):
+            statements.append(query[start:index])
+            start = index + 1
+            in_string = False
+    statements.append(query[start:])
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+class ParseContext:
     """
-    Generates tokens (supplied by master_pattern) from the input text.
-    :param text: text to tokenize.
-    :param master_pattern: regex pattern.
-    :return: Generator
+    Cursor state for a single call to `QueryEvaluator.parse`.
+
+    Keeping the cursor here rather than on the evaluator lets one evaluator
+    serve concurrent parses.
     """
-    scanner = master_pattern.scanner(text)
-    for m in iter(scanner.match, None):
-        tok = Token(m.lastgroup, m.group())
-        if tok.type != "WS":
-            yield tok
+
+    def __init__(self, tokens: Iterator[Token]):
+        self.tokens = tokens
+        self.current_token = None
+        self.next_token = None
+
+    def advance(self):
+        """Advance one token ahead"""
+        self.current_token, self.next_token = self.next_token, next(self.tokens, None)
+
+    def accept(self, toktype: str) -> bool:
+        """Test and consume the next token if it matches toktype"""
+        if self.next_token and self.next_token.type == toktype:
+            self.advance()
+            return True
+        else:
+            return False
+
+    def expect(self, toktype: str):
+        """Consume next token if it matches toktype or raise SyntaxError"""
+        if not self.accept(toktype):
+            raise SyntaxError("Expected " + toktype)
 
 
 class QueryEvaluator:
     """
     A recursive descent parser for parsing through a query with the `parse` method.
+    The evaluator holds no per-query state, so a single instance is safe to share
+    between threads.
+
+    Parsed queries are memoized in an LRU cache keyed on the normalized query text,
+    so a repeated query skips tokenizing and descent.
+
+    Names are resolved through a compiled `Registry` of the commands, prepositions
+    and aspects, rebuilt when one of them changes. A `RegistryDict` reports its
+    changes; with plain dicts the registered names are compared on every parse.
     """
 
     def __init__(
@@ -38,13 +114,21 @@ class QueryEvaluator:
         commands: Dict[str, Command],
         prepositions: Dict[str, Preposition],
         aspects: Dict[str, Aspect],
+        cache_size: int = 256,
+        registry: Optional[Derived[Registry]] = None,
     ):
-        self.tokens = None
-        self.current_token = None
-        self.next_token = None
         self.commands = commands
         self.prepositions = prepositions
         self.aspects = aspects
+        self._registry = registry or Derived(
+            lambda: Registry(self.commands, self.prepositions, self.aspects)
+        )
+        self._watch_names = not all(
+            isinstance(entries, RegistryDict)
+            for entries in (commands, prepositions, aspects)
+        )
+        self._compiled_names = None
+        self._parse_cache = LRUCache(cache_size)
 
     @staticmethod
     def get_evaluator(
@@ -54,6 +138,7 @@ class QueryEvaluator:
     ):
         """
         Static factory method for creating a QueryEvaluator.
+        The process-wide evaluator is returned when the default registries are used.
         param commands: List of commands to use.
         param prepositions: Dict of prepositions to use.
         param aspects: List of aspects to use.
@@ -64,6 +149,12 @@ class QueryEvaluator:
         if aspects is None:
             aspects = aspect_dict
 
+        if (
+            commands is command_dict
+            and prepositions is preposition_dict
+            and aspects is aspect_dict
+        ):
+            return _default_evaluator
         return QueryEvaluator(commands, prepositions, aspects)
 
     def parse(self, query: str) -> SymoneResponse:
@@ -72,95 +163,119 @@ class QueryEvaluator:
         :param query: query text.
         :return: SymoneResponse object.
         """
-        master_pattern = self._get_master_pattern()
-        self.tokens = generate_tokens(query, master_pattern)
-        self.current_token = None  # pragma: no mutate
-        self.next_token = None  # pragma: no mutate
-        self._advance()  # Load first lookahead token
-        return self._get_response()
-
-    def _advance(self):
-        """Advance one token ahead"""
-        self.current_token, self.next_token = self.next_token, next(self.tokens, None)
+        registry = self.registry
+        cache_key = (registry, normalize_query(query))
+        parsed = self._parse_cache.get(cache_key)
+        if parsed is None:
+            context = ParseContext(generate_tokens(query, registry.tokenizer))
+            context.advance()  # Load first lookahead token
+            parsed = self._get_parsed_query(context)
+            self._parse_cache.put(cache_key, parsed)
 
-    def _accept(self, toktype: str):
-        """Test and consume the next token if it matches toktype"""
-        if self.next_token and self.next_token.type == toktype:
-            self._advance()
-            return True
-        else:
-            return False
+        command, aspect, value, preposition, suggestion = parsed
+        logging.info(
+            f"Parser: found Command: {command}, Aspect: {aspect}, Value: {value}"
+        )
+        return SymoneResponse(
+            command,
+            aspect=aspect,
+            value=value,
+            preposition=preposition,
+            registry=registry,
+            suggestion=suggestion,
+        )
 
-    def _expect(self, toktype: str):
-        """Consume next token if it matches toktype or raise SyntaxError"""
-        if not self._accept(toktype):
-            raise SyntaxError("Expected " + toktype)
+    def parse_statements(self, query: str) -> List[SymoneResponse]:
+        """
+        Parses every statement of a multi-statement query (see `split_statements`).
+        All statements are parsed before any is returned, so a syntax error in one
+        of them rejects the whole query.
+        :param query: query text.
+        :return: List of SymoneResponse objects, one per statement.
+        """
+        return [self.parse(statement) for statement in split_statements(query)]
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Reports hit/miss statistics for the parsed query cache.
+        :return: CacheInfo.
+        """
+        return self._parse_cache.info()
 
-    def _get_response(self) -> SymoneResponse:
-        """Scans through the token set and attempts to return a Command"""
+    def cache_clear(self):
+        """Empties the parsed query cache."""
+        self._parse_cache.clear()
+
+    def _get_parsed_query(self, context: ParseContext) -> ParsedQuery:
+        """Scans through the token set and attempts to find a Command"""
         preposition = None
         aspect = None
         value = None
-        if self.next_token is None:
+        if context.next_token is None:
+            command = self._lookup_command(Token("CMD", "default"))
+        elif context.accept("SUGGEST"):
+            # a misspelled command that changes the game context is not run
             command = self._lookup_command(Token("CMD", "default"))
+            return ParsedQuery(command, None, None, None, context.current_token[1])
         else:
             # the first token must be a command
-            self._expect("CMD")
-            cmd_token = self.current_token
+            context.expect("CMD")
+            cmd_token = context.current_token
             command = self._lookup_command(cmd_token)
 
-            if self._accept("ASPECT"):
-                aspect, value, preposition = self.get_aspect()
-            elif self._accept("VALUE") or self._accept("STRING_VALUE"):
-                value = self._extract_value_from_token(self.current_token[1])
-                if self._accept("PREP"):
-                    preposition, aspect = self.get_preposition_then_aspect()
+            if context.accept("ASPECT"):
+                aspect, value, preposition = self.get_aspect(context)
+            elif context.accept("VALUE") or context.accept("STRING_VALUE"):
+                value = self._extract_value_from_token(context.current_token[1])
+                if context.accept("PREP"):
+                    preposition, aspect = self.get_preposition_then_aspect(context)
 
-        logging.info(
-            f"Parser: found Command: {command}, Aspect: {aspect}, Value: {value}"
-        )
-        return SymoneResponse(
-            command, aspect=aspect, value=value, preposition=preposition
-        )
+        return ParsedQuery(command, aspect, value, preposition)
 
-    def get_preposition_then_aspect(self) -> Tuple[Preposition, Aspect]:
+    def get_preposition_then_aspect(
+        self, context: ParseContext
+    ) -> Tuple[Preposition, Aspect]:
         """
         Parses a preposition token and returns it as a Preposition object,
         as well as returning an Aspect and value, since they are required
         """
-        preposition_token = self.current_token
+        preposition_token = context.current_token
         preposition = self._lookup_preposition(preposition_token)
-        if self._accept("ASPECT"):
-            aspect, _, _ = self.get_aspect()
+        if context.accept("ASPECT"):
+            aspect, _, _ = self.get_aspect(context)
         else:
             raise SyntaxError("Expected aspect and value after preposition")
         return preposition, aspect
 
-    def get_preposition_then_value(self) -> Tuple[Preposition, Union[str, int]]:
+    def get_preposition_then_value(
+        self, context: ParseContext
+    ) -> Tuple[Preposition, Union[str, int]]:
         """
         Parses a preposition token and returns it as a Preposition object,
         as well as returning a value, if it's present.
         """
         value = None
-        preposition_token = self.current_token
+        preposition_token = context.current_token
         preposition = self._lookup_preposition(preposition_token)
-        if self._accept("VALUE") or self._accept("STRING_VALUE"):
-            value = self._extract_value_from_token(self.current_token[1])
+        if context.accept("VALUE") or context.accept("STRING_VALUE"):
+            value = self._extract_value_from_token(context.current_token[1])
         return preposition, value
 
-    def get_aspect(self) -> Tuple[Aspect, Union[str, int], Preposition]:
+    def get_aspect(
+        self, context: ParseContext
+    ) -> Tuple[Aspect, Union[str, int], Preposition]:
         """
         Parses an aspect token and returns it as an Aspect object,
         as well as returning a value, if it's present.
         """
         value = None
         preposition = None
-        aspect_token = self.current_token
+        aspect_token = context.current_token
         aspect = self._lookup_aspect(aspect_token)
-        if self._accept("VALUE") or self._accept("STRING_VALUE"):
-            value = self._extract_value_from_token(self.current_token[1])
-        elif self._accept("PREP"):
-            preposition, value = self.get_preposition_then_value()
+        if context.accept("VALUE") or context.accept("STRING_VALUE"):
+            value = self._extract_value_from_token(context.current_token[1])
+        elif context.accept("PREP"):
+            preposition, value = self.get_preposition_then_value(context)
         return aspect, value, preposition
 
     @staticmethod
@@ -171,41 +286,37 @@ class QueryEvaluator:
             return int(tok)
         return tok.replace('"', "")
 
-    def _get_master_pattern(self):
-        regex_word_list_with_boundary = "\\b{}\\b"
-        cmds = [
-            regex_word_list_with_boundary.format(command.name)
-            for command in self.commands.values()
-        ]
-        command_match = "|".join(cmds)
-        prepositions = [
-            regex_word_list_with_boundary.format(preposition.name)
-            for preposition in self.prepositions.values()
-        ]
-        preposition_match = "|".join(prepositions)
-        aspects = [
-            regex_word_list_with_boundary.format(aspect.name)
-            for aspect in self.aspects.values()
-        ]
-        aspect_match = "|".join(aspects)
-        cmd = r"(?P<CMD>{})".format(command_match)
-        preposition = r"(?P<PREP>{})".format(preposition_match)
-        aspect = r"(?P<ASPECT>{})".format(aspect_match)
-        val = r"(?P<VALUE>(-|)\d+)"
-        string_val = r'(?P<STRING_VALUE>"(.*?)")'
-        ws = r"(?P<WS>\s+)"
-
-        pattern = re.compile(
-            "|".join([cmd, aspect, preposition, val, ws, string_val]),
-            re.IGNORECASE,
+    @property
+    def registry(self) -> Registry:
+        """Compiled registry of the evaluator's commands, prepositions and aspects."""
+        if self._watch_names:
+            names = self._registry_fingerprint()
+            if names != self._compiled_names:
+                self._compiled_names = names
+                self._registry.invalidate()
+        return self._registry.get()
+
+    def _registry_fingerprint(self) -> Tuple[Tuple[str, ...], ...]:
+        """Names of every registered command, preposition and aspect, in order."""
+        return (
+            tuple(command.name for command in self.commands.values()),
+            tuple(preposition.name for preposition in self.prepositions.values()),
+            tuple(aspect.name for aspect in self.aspects.values()),
         )
-        return pattern
+
+    def _get_tokenizer(self) -> KeywordTokenizer:
+        return self.registry.tokenizer
 
     def _lookup_command(self, cmd_token: Token) -> Command:
-        return self.commands.get(cmd_token[1])
+        return self.registry.command(cmd_token[1])
 
     def _lookup_aspect(self, aspect_token: Token) -> Aspect:
-        return self.aspects.get(aspect_token[1])
+        return self.registry.aspect(aspect_token[1])
 
     def _lookup_preposition(self, preposition_token: Token) -> Preposition:
-        return self.prepositions.get(preposition_token[1])
+        return self.registry.preposition(preposition_token[1])
+
+
+_default_evaluator = QueryEvaluator(
+    command_dict, preposition_dict, aspect_dict, registry=default_registry
+)
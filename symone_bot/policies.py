@@ -0,0 +1,87 @@
+"""
+Checks a request must pass before a command runs, and their compilation into a
+single pipeline per command.
+"""
+
+import inspect
+from typing import TYPE_CHECKING, Any, Callable, Dict, NamedTuple, Tuple
+
+if TYPE_CHECKING:
+    from symone_bot.commands import Command
+
+# Runs a command on its keyword arguments, see `compile_pipeline`.
+Pipeline = Callable[[Dict[str, Any]], Any]
+
+
+class Policy(NamedTuple):
+    """
+    Check a request must pass before a command runs, e.g. that it names an aspect.
+
+    Attributes:
+        check: Function taking the command and its keyword arguments, returning a
+            rejection reply, or None to let the request through. Only coroutine
+            commands may have a coroutine function check.
+        pure: Whether check runs without I/O. Pure checks run before the others.
+    """
+
+    check: Callable[["Command", Dict[str, Any]], Any]
+    pure: bool = True
+
+
+def compile_pipeline(command: "Command") -> Pipeline:
+    """
+    Compiles a command and its policies into one function of the command's keyword
+    arguments. The pure checks run first, then the checks doing I/O, each group in
+    the order the command declares them, and the first rejection answers the
+    request. A request the pure checks reject therefore never reaches the database.
+
+    The pipeline of a coroutine command returns a rejection by a pure check
+    directly, and otherwise a coroutine running the rest, see
+    `SymoneResponse.get_async`.
+
+    param command: Command with its policies.
+    return: pipeline taking the keyword arguments of the command.
+    """
+    pure_checks = tuple(policy.check for policy in command.policies if policy.pure)
+    io_checks = tuple(policy.check for policy in command.policies if not policy.pure)
+    function = command.callable
+
+    if inspect.iscoroutinefunction(function):
+
+        async def run_command(kwargs: Dict[str, Any]) -> Any:
+            rejection = await _first_async_rejection(io_checks, command, kwargs)
+            return rejection if rejection is not None else await function(**kwargs)
+
+    else:
+
+        def run_command(kwargs: Dict[str, Any]) -> Any:
+            rejection = _first_rejection(io_checks, command, kwargs)
+            return rejection if rejection is not None else function(**kwargs)
+
+    def pipeline(kwargs: Dict[str, Any]) -> Any:
+        rejection = _first_rejection(pure_checks, command, kwargs)
+        return rejection if rejection is not None else run_command(kwargs)
+
+    return pipeline
+
+
+def _first_rejection(
+    checks: Tuple[Callable, ...], command: "Command", kwargs: Dict[str, Any]
+) -> Any:
+    for check in checks:
+        rejection = check(command, kwargs)
+        if rejection is not None:
+            return rejection
+    return None
+
+
+async def _first_async_rejection(
+    checks: Tuple[Callable, ...], command: "Command", kwargs: Dict[str, Any]
+) -> Any:
+    for check in checks:
+        rejection = check(command, kwargs)
+        if inspect.isawaitable(rejection):
+            rejection = await rejection
+        if rejection is not None:
+            return rejection
+    return None
@@ -1,5 +1,7 @@
 from enum import Enum
 
+from symone_bot.registry import RegistryDict
+
 
 class PrepositionType(Enum):
     """Preposition type enum"""
@@ -14,6 +16,8 @@ class PrepositionType(Enum):
 class Preposition:
     """Preposition class"""
 
+    __slots__ = ("name", "preposition_type")
+
     def __init__(self, name: str, preposition_type: PrepositionType):
         if not isinstance(name, str):
             raise TypeError("name must be of type str")
@@ -29,9 +33,11 @@ class Preposition:
         return self.name
 
 
-preposition_dict = {
-    "into": Preposition("into", PrepositionType.DIRECTIONAL),
-    "onto": Preposition("onto", PrepositionType.DIRECTIONAL),
-    "to": Preposition("to", PrepositionType.DIRECTIONAL),
-    "from": Preposition("from", PrepositionType.DIRECTIONAL),
-}
+preposition_dict = RegistryDict(
+    {
+        "into": Preposition("into", PrepositionType.DIRECTIONAL),
+        "onto": Preposition("onto", PrepositionType.DIRECTIONAL),
+        "to": Preposition("to", PrepositionType.DIRECTIONAL),
+        "from": Preposition("from", PrepositionType.DIRECTIONAL),
+    }
+)
@@ -0,0 +1,245 @@
+"""
+Registries of the bot's commands, aspects and prepositions, and values derived
+from them.
+"""
+
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Generic, Mapping, Optional, TypeVar
+
+from symone_bot.policies import Pipeline, compile_pipeline
+from symone_bot.tokenizer import build_tokenizer
+
+if TYPE_CHECKING:
+    from symone_bot.aspects import Aspect
+    from symone_bot.commands import Command
+    from symone_bot.prepositions import Preposition
+
+T = TypeVar("T")
+
+# Bumped by every change to any registry. A single counter keeps the staleness
+# check of a derived value down to one integer comparison.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _bump_generation():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+class RegistryDict(dict):
+    """
+    Dict of named commands, aspects or prepositions. Adding, replacing or removing
+    an entry invalidates every `Derived` value.
+    """
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        _bump_generation()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        _bump_generation()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        _bump_generation()
+        return result
+
+    def clear(self):
+        super().clear()
+        _bump_generation()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        _bump_generation()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        _bump_generation()
+        return result
+
+    def setdefault(self, key, default=None):
+        result = super().setdefault(key, default)
+        _bump_generation()
+        return result
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        _bump_generation()
+
+
+class Registry:
+    """
+    Immutable, compiled view of a command, preposition and aspect registry. It is
+    built once and owns everything derived from the registries: lookup indexes
+    keyed by lowercased name, the keyword tokenizer, the pipeline running each
+    command behind its policies and the help text. Aspect aliases are indexed and
+    tokenized alongside aspect names, so a query may use either at the same cost.
+
+    Its tokenizer yields keywords in lowercase, so resolving a token is a single
+    dict lookup whatever case the query was typed in, and corrects misspelled
+    keywords it would otherwise stop at. A misspelled modifier command is only
+    suggested, never run.
+
+    Attributes:
+        tokenizer: KeywordTokenizer for the registered names.
+        default_command: Command run for unrecognized queries, if registered.
+        command_help: Help line of each listed command, by command name.
+        aspect_listing: Names of the aspects, as listed in the help text.
+        help_text: Text of the help message.
+    """
+
+    def __init__(
+        self,
+        commands: Mapping[str, "Command"],
+        prepositions: Mapping[str, "Preposition"],
+        aspects: Mapping[str, "Aspect"],
+    ):
+        set_attribute = super().__setattr__
+        set_attribute("_commands", _lowercase_index(commands))
+        set_attribute("_prepositions", _lowercase_index(prepositions))
+        set_attribute("_aspects", _aspect_index(aspects))
+        set_attribute(
+            "_pipelines",
+            MappingProxyType(
+                {command: compile_pipeline(command) for command in commands.values()}
+            ),
+        )
+        set_attribute(
+            "tokenizer",
+            build_tokenizer(
+                tuple(command.name for command in commands.values()),
+                tuple(preposition.name for preposition in prepositions.values()),
+                tuple(aspect.name for aspect in aspects.values())
+                + tuple(
+                    alias for aspect in aspects.values() for alias in aspect.aliases
+                ),
+                canonical_values=True,
+                fuzzy=True,
+                # a typo must not change the game context
+                strict_names=tuple(
+                    command.name for command in commands.values() if command.is_modifier
+                ),
+            ),
+        )
+        default_command = commands.get("default")
+        set_attribute("default_command", default_command)
+        set_attribute(
+            "command_help",
+            MappingProxyType(
+                {
+                    name: command.help()
+                    for name, command in commands.items()
+                    if default_command is None
+                    or command.callable != default_command.callable
+                }
+            ),
+        )
+        set_attribute(
+            "aspect_listing", ", ".join(aspect.name for aspect in aspects.values())
+        )
+        set_attribute(
+            "help_text",
+            "".join(f"{line}\n" for line in self.command_help.values())
+            + f"\nI am also tracking the following aspects: {self.aspect_listing}",
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Registry is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Registry is immutable.")
+
+    def command(self, name: str) -> Optional["Command"]:
+        """
+        Resolves a command name, as yielded by `tokenizer`.
+
+        param name: lowercased command name.
+        return: Command, or None if there is none by that name.
+        """
+        return self._commands.get(name)
+
+    def preposition(self, name: str) -> Optional["Preposition"]:
+        """
+        Resolves a preposition name, as yielded by `tokenizer`.
+
+        param name: lowercased preposition name.
+        return: Preposition, or None if there is none by that name.
+        """
+        return self._prepositions.get(name)
+
+    def aspect(self, name: str) -> Optional["Aspect"]:
+        """
+        Resolves an aspect name or alias, as yielded by `tokenizer`.
+
+        param name: lowercased aspect name or alias.
+        return: Aspect, or None if there is none by that name.
+        """
+        return self._aspects.get(name)
+
+    def pipeline(self, command: "Command") -> Pipeline:
+        """
+        Gets the pipeline running a command behind its policies, see
+        `policies.compile_pipeline`.
+
+        param command: Command to run.
+        return: the pipeline compiled with the registry, or for a command the
+            registry does not hold, one compiled now.
+        """
+        pipeline = self._pipelines.get(command)
+        if pipeline is None:
+            pipeline = compile_pipeline(command)
+        return pipeline
+
+
+def _lowercase_index(entries: Mapping[str, T]) -> Mapping[str, T]:
+    return MappingProxyType({name.lower(): entry for name, entry in entries.items()})
+
+
+def _aspect_index(aspects: Mapping[str, "Aspect"]) -> Mapping[str, "Aspect"]:
+    index = dict(_lowercase_index(aspects))
+    for aspect in aspects.values():
+        for alias in aspect.aliases:
+            existing = index.setdefault(alias.lower(), aspect)
+            if existing is not aspect:
+                raise ValueError(
+                    f"Alias '{alias}' of aspect '{aspect.name}' is already taken by "
+                    f"aspect '{existing.name}'."
+                )
+    return MappingProxyType(index)
+
+
+class Derived(Generic[T]):
+    """
+    Value computed from the registries, e.g. the help text. It is built on first
+    use and rebuilt only after a registry has changed, so reading it allocates
+    nothing.
+
+    Attributes:
+        build: Function computing the value.
+    """
+
+    def __init__(self, build: Callable[[], T]):
+        self.build = build
+        self._value = None
+        self._generation = None
+
+    def get(self) -> T:
+        """
+        Gets the value, rebuilding it if a registry changed since it was built.
+
+        return: the derived value.
+        """
+        if self._generation != _generation:
+            generation = _generation
+            self._value = self.build()
+            self._generation = generation
+        return self._value
+
+    def invalidate(self) -> None:
+        """Rebuilds the value on next use."""
+        self._generation = None
@@ -1,9 +1,11 @@
+import inspect
 from typing import Any, Dict
 
 from symone_bot.aspects import Aspect
-from symone_bot.commands import Command, command_dict
+from symone_bot.commands import Command, default_registry
 from symone_bot.metadata import QueryMetaData
 from symone_bot.prepositions import Preposition
+from symone_bot.registry import Registry
 
 
 class SymoneResponse:
@@ -16,8 +18,21 @@ class SymoneResponse:
         command: Command object representing the command to be executed.
         aspect: Aspect object representing the aspect to be modified or fetched.
         value: Value to be used in modifying the aspect.
+        registry: Registry the command was resolved from, by default the
+            compiled default registries.
+        suggestion: Name of the command a misspelled query probably meant.
     """
 
+    __slots__ = (
+        "registry",
+        "metadata",
+        "command",
+        "preposition",
+        "aspect",
+        "value",
+        "suggestion",
+    )
+
     def __init__(
         self,
         command: Command,
@@ -25,13 +40,17 @@ class SymoneResponse:
         preposition: Preposition = None,
         aspect: Aspect = None,
         value: Any = None,
+        registry: Registry = None,
+        suggestion: str = None,
     ):
         if command is None:
             raise AttributeError("'command' cannot be type 'NoneType'")
+        self.registry = registry or default_registry.get()
         self.metadata = metadata
         self.command = command
         self.preposition = preposition
         self.aspect = aspect
+        self.suggestion = suggestion
 
         if self.command.is_modifier:
             if aspect and not aspect.is_singleton:
@@ -50,20 +69,41 @@ class SymoneResponse:
         param value: Value to be set for the aspect.
         """
         if aspect.value_type is None and value is not None:
-            self.command = command_dict["default"]
+            self.command = self._default_command()
         if aspect.value_type is not None and not isinstance(value, aspect.value_type):
-            self.command = command_dict["default"]
+            self.command = self._default_command()
+
+    def _default_command(self) -> Command:
+        # a registry without a default command falls back to the bot's own
+        return self.registry.default_command or default_registry.get().default_command
 
     def get(self) -> Dict[str, str]:
         """
-        Executes the response's stored Command callable.
+        Executes the response's stored Command callable, behind the command's
+        policies.
+
+        :return: Dictionary representing a Slack message.
+        """
+        return self.registry.pipeline(self.command)(self._command_kwargs())
+
+    async def get_async(self) -> Dict[str, str]:
+        """
+        Executes the response's stored Command callable, behind the command's
+        policies, awaiting its result when the command is a coroutine function
+        (see `async_commands`).
 
         :return: Dictionary representing a Slack message.
         """
-        kwargs = {
+        result = self.registry.pipeline(self.command)(self._command_kwargs())
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _command_kwargs(self) -> Dict[str, Any]:
+        return {
             "metadata": self.metadata,
             "aspect": self.aspect,
             "value": self.value,
             "preposition": self.preposition,
+            "suggestion": self.suggestion,
         }
-        return self.command.callable(**kwargs)
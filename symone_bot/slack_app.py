@@ -0,0 +1,155 @@
+import logging
+from typing import Callable, Optional, Pattern
+
+from slack_bolt import App, BoltResponse
+
+from symone_bot.bot_ingress import symone_message
+from symone_bot.handler_source import HandlerSource
+from symone_bot.idempotency import EventDeduplicator, event_key
+from symone_bot.identity import BotIdentity, forget_cached_identity, is_token_error
+from symone_bot.triggers import (
+    ASPECT_QUERY_PATTERN,
+    HELLO_PATTERN,
+    HELP_PATTERN,
+    LEVEL_UP_PATTERN,
+    is_for_symone,
+)
+from symone_bot.util import get_mocking_reply
+
+
+def message_hello(message, say, context):
+    """Responds to a user mentioning Symone."""
+    say(f"{context['matches'][0]} there <@{message['user']}>")
+
+
+def reply_once(body, say, query: Callable[[], dict]) -> None:
+    """
+    Runs query and posts its response, for the first delivery of the event only.
+    The reply to that delivery has been or is being posted, so a retry posts
+    nothing, see `EventDeduplicator`.
+
+    param body: request body of the event.
+    param say: Bolt's `say` for the event.
+    param query: function computing the response.
+    """
+    key = event_key(body)
+    response, replayed = EventDeduplicator.get_deduplicator().run(key, query)
+    if replayed:
+        logging.info(f"Skipping repeated delivery of event {key}")
+        return
+    say(response)
+
+
+def message_help(message, say, body):
+    """Help message handler."""
+    reply_once(
+        body,
+        say,
+        lambda: symone_message(
+            message.get("text"), message.get("user"), HandlerSource.HELP
+        ),
+    )
+
+
+def message_did_they_level_up(message, say):
+    """Responds to a user asking if they leveled up."""
+    reply = get_mocking_reply(message)
+    say(reply)
+
+
+def aspect_query_handler(message, say, context, body):
+    """
+    Aspect query handler. Listens for "Symone, <query>", where the query may hold
+    several statements separated by `;` or newlines.
+    """
+    aspect_candidate = context["matches"][0]
+    user_id = message.get("user")
+
+    logging.info(f"Parsing aspect query: {aspect_candidate} from user: {user_id}")
+    reply_once(
+        body,
+        say,
+        lambda: symone_message(aspect_candidate, user_id, HandlerSource.ASPECT_QUERY),
+    )
+
+
+def custom_error_handler(error, body, logger, client, payload):
+    if is_token_error(error):
+        # nothing can be posted with a bad token, and every later event would fail
+        logger.critical(
+            f"Slack rejected the bot token ({error.response['error']}). "
+            "Check SLACK_BOT_TOKEN and the configured bot identity."
+        )
+        forget_cached_identity()
+        raise error
+    logger.exception(f"Error: {error}")
+    logger.info(f"Request body: {body}")
+    client.chat_postEphemeral(
+        channel=payload["channel"],
+        user=payload["user"],
+        text=f"Sorry, I had an error processing your request. Please try again. {error}",
+    )
+
+
+def handle_message_events(body, logger):
+    logger.debug(body)
+
+
+def drop_unrelated_messages(body, next):
+    """
+    Acknowledges message events that no listener would match without running
+    the listener chain, see `triggers.is_for_symone`.
+    """
+    if not is_for_symone(body):
+        return BoltResponse(status=200, body="")
+    return next()
+
+
+def acknowledge(ack):
+    """Acknowledges the event straight away; a lazy listener does the work."""
+    ack()
+
+
+def _register_query_listener(
+    app: App, pattern: Pattern, listener: Callable, fast_ack: bool
+) -> None:
+    if fast_ack:
+        app.message(pattern)(ack=acknowledge, lazy=[listener])
+    else:
+        app.message(pattern)(listener)
+
+
+def create_app(
+    fast_ack: bool = False, identity: Optional[BotIdentity] = None, **app_options
+) -> App:
+    """
+    Builds the Bolt app with Symone's listeners.
+
+    By default every event is processed before Slack gets its response, as Cloud
+    Functions stop the instance once the response is sent. With fast_ack, Slack
+    is acknowledged at once and the help and aspect query listeners run as lazy
+    listeners, replying through chat.postMessage (`say`). That needs a
+    long-running process: the Cloud Functions adapter rejects lazy listeners.
+
+    Given the bot's identity, the token is not verified with `auth.test` when the
+    app is built or when events arrive. A bad token then surfaces on the first
+    Web API call, which the error handler logs as critical and re-raises.
+
+    param fast_ack: whether to acknowledge events before running the queries.
+    param identity: the bot's identity, see `identity.resolve_identity`.
+    param app_options: keyword arguments for `App`, e.g. token and signing_secret.
+    return: App
+    """
+    if identity is not None:
+        app_options["authorize"] = identity.authorizer(app_options.pop("token"))
+    app = App(process_before_response=not fast_ack, **app_options)
+    app.use(drop_unrelated_messages)
+
+    # the first matching listener handles an event, so the order matters
+    app.message(HELLO_PATTERN)(message_hello)
+    _register_query_listener(app, HELP_PATTERN, message_help, fast_ack)
+    app.message(LEVEL_UP_PATTERN)(message_did_they_level_up)
+    _register_query_listener(app, ASPECT_QUERY_PATTERN, aspect_query_handler, fast_ack)
+    app.error(custom_error_handler)
+    app.event("message")(handle_message_events)
+    return app
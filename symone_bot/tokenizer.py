@@ -0,0 +1,244 @@
+"""
+Tokenizer for queries to the bot.
+"""
+
+import collections
+import functools
+from typing import Dict, Generator, Iterable, Iterator, Optional, Pattern, Tuple, Union
+
+from symone_bot.fuzzy import NGramIndex
+
+Token = collections.namedtuple("Token", ["type", "value"])
+
+# Trie node key marking the end of a keyword; the value is the keyword's Token,
+# holding the lowercased keyword and shared by every match of it.
+_KEYWORD_END = None
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Equivalent of the regex `\\b` assertion at `index` in `text`."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class KeywordTokenizer:
+    """
+    Single pass, case-insensitive tokenizer backed by a trie of registry keywords.
+
+    At each position the longest command, aspect or preposition name that sits on
+    word boundaries wins, with any run of whitespace between the words of a
+    multi-word keyword; on equal length a command beats an aspect, and an aspect
+    beats a preposition. Otherwise a value, quoted string value or whitespace is
+    read. Scanning stops at the first character that starts none of those.
+
+    Keyword tokens hold the text as written, or with canonical_values the keyword
+    in lowercase, ready for an O(1) lookup in `registry.Registry`.
+
+    With fuzzy, text that would stop the scan is first matched against the
+    keywords allowing for typos (see `fuzzy.NGramIndex`), trying spans of as many
+    words as the longest keyword has. The closest keyword wins, the longer span
+    on a tie, and it is yielded in lowercase. A span equally close to several
+    keywords is not corrected. A span closest to one of the strict_names, e.g. a
+    command changing the game context, is not corrected either: it is yielded as a
+    SUGGEST token holding the keyword, for the parser to offer instead of running.
+    """
+
+    def __init__(
+        self,
+        command_names: Iterable[str],
+        preposition_names: Iterable[str],
+        aspect_names: Iterable[str],
+        canonical_values: bool = False,
+        fuzzy: bool = False,
+        strict_names: Iterable[str] = (),
+    ):
+        self.canonical_values = canonical_values
+        self._strict_keywords = frozenset(name.lower() for name in strict_names)
+        self._root: Dict = {}
+        self._keywords: Dict[str, Token] = {}
+        # lowest priority first, so a later insert of the same name overrides it
+        for toktype, names in (
+            ("PREP", preposition_names),
+            ("ASPECT", aspect_names),
+            ("CMD", command_names),
+        ):
+            for name in names:
+                self._insert(name, toktype)
+        self._fuzzy_index = NGramIndex(self._keywords) if fuzzy else None
+        self._max_keyword_words = max(
+            (len(keyword.split()) for keyword in self._keywords), default=0
+        )
+
+    def _insert(self, keyword: str, toktype: str):
+        keyword = keyword.lower()
+        node = self._root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[_KEYWORD_END] = self._keywords[keyword] = Token(toktype, keyword)
+
+    def tokenize(self, text: str) -> Iterator[Token]:
+        """
+        Yields every token in `text`, whitespace included.
+        :param text: text to tokenize.
+        :return: Iterator of Tokens.
+        """
+        position = 0
+        while position < len(text):
+            end, token = self._match_keyword(text, position)
+            if token is not None:
+                if not self.canonical_values:
+                    token = Token(token.type, text[position:end])
+            else:
+                end, toktype = self._match_literal(text, position)
+                if toktype is not None:
+                    token = Token(toktype, text[position:end])
+                else:
+                    end, token = self._match_typo(text, position)
+                    if token is None:
+                        return
+            yield token
+            position = end
+
+    def _match_keyword(self, text: str, start: int) -> Tuple[int, Optional[Token]]:
+        """
+        Longest keyword match at `start`, as (end index, keyword Token). Any run of
+        whitespace matches the space between two words of a keyword.
+        """
+        best = (start, None)
+        if not _is_word_boundary(text, start):
+            return best
+        node = self._root
+        index = start
+        while index < len(text):
+            if text[index].isspace():
+                node = node.get(" ")
+                index = _skip_whitespace(text, index)
+            else:
+                for char in text[index].lower():
+                    node = node.get(char)
+                    if node is None:
+                        return best
+                index += 1
+            if node is None:
+                return best
+            keyword = node.get(_KEYWORD_END)
+            if keyword is not None and _is_word_boundary(text, index):
+                best = (index, keyword)
+        return best
+
+    def _match_typo(self, text: str, start: int) -> Tuple[int, Optional[Token]]:
+        """Closest keyword to a misspelled span at `start`, as (end index, Token)."""
+        best = (start, None)
+        if self._fuzzy_index is None:
+            return best
+        best_distance = None
+        for end in _word_ends(text, start, self._max_keyword_words):
+            span = " ".join(text[start:end].lower().split())
+            matches, distance = self._fuzzy_index.nearest(span)
+            if len(matches) == 1 and (
+                best_distance is None or distance <= best_distance
+            ):
+                best = (end, self._keywords[matches[0]])
+                best_distance = distance
+        end, token = best
+        if token is not None and token.value in self._strict_keywords:
+            return end, Token("SUGGEST", token.value)
+        return best
+
+    @staticmethod
+    def _match_literal(text: str, start: int) -> Tuple[int, Optional[str]]:
+        """Matches a value, quoted string value or whitespace at `start`."""
+        char = text[start]
+        end = start
+        if char.isspace():
+            return _skip_whitespace(text, start), "WS"
+        if char == '"':
+            end = text.find('"', start + 1)
+            if end != -1 and "\n" not in text[start:end]:
+                return end + 1, "STRING_VALUE"
+            return start, None
+        if char == "-":
+            end += 1
+        digits_start = end
+        while end < len(text) and text[end].isdecimal():
+            end += 1
+        if end > digits_start:
+            return end, "VALUE"
+        return start, None
+
+
+def _skip_whitespace(text: str, start: int) -> int:
+    """Index of the first character after the whitespace run at `start`."""
+    end = start
+    while end < len(text) and text[end].isspace():
+        end += 1
+    return end
+
+
+def _word_ends(text: str, start: int, max_words: int) -> Iterator[int]:
+    """Ends of the first one to max_words whitespace separated words at `start`."""
+    end = start
+    for _ in range(max_words):
+        word_start = end
+        while end < len(text) and _is_word_char(text[end]):
+            end += 1
+        if end == word_start:
+            return
+        yield end
+        if end == len(text) or not text[end].isspace():
+            return
+        end = _skip_whitespace(text, end)
+
+
+def generate_tokens(
+    text: str, master_pattern: Union[KeywordTokenizer, Pattern]
+) -> Generator:
+    """
+    Generates tokens (supplied by master_pattern) from the input text.
+    :param text: text to tokenize.
+    :param master_pattern: KeywordTokenizer, or a regex pattern with named groups.
+    :return: Generator
+    """
+    if isinstance(master_pattern, KeywordTokenizer):
+        tokens = master_pattern.tokenize(text)
+    else:
+        scanner = master_pattern.scanner(text)
+        tokens = (Token(m.lastgroup, m.group()) for m in iter(scanner.match, None))
+    for tok in tokens:
+        if tok.type != "WS":
+            yield tok
+
+
+@functools.lru_cache(maxsize=32)
+def build_tokenizer(
+    command_names: Tuple[str, ...],
+    preposition_names: Tuple[str, ...],
+    aspect_names: Tuple[str, ...],
+    canonical_values: bool = False,
+    fuzzy: bool = False,
+    strict_names: Tuple[str, ...] = (),
+) -> KeywordTokenizer:
+    """
+    Builds the keyword tokenizer for the given registry names.
+    Results are cached, so the tokenizer is only rebuilt when a registry changes.
+    :param command_names: names of the registered commands.
+    :param preposition_names: names of the registered prepositions.
+    :param aspect_names: names of the registered aspects.
+    :param canonical_values: whether keyword tokens hold the lowercased keyword.
+    :param fuzzy: whether misspelled keywords are corrected.
+    :param strict_names: names suggested rather than corrected.
+    :return: KeywordTokenizer.
+    """
+    return KeywordTokenizer(
+        command_names,
+        preposition_names,
+        aspect_names,
+        canonical_values,
+        fuzzy,
+        strict_names,
+    )
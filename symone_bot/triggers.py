@@ -0,0 +1,42 @@
+import re
+from typing import Any, Dict
+
+# Phrases the message listeners in `slack_app` respond to. This module imports
+# nothing heavy, so events can be screened before Bolt is loaded.
+HELLO_PATTERN = re.compile("(hi|hello|hey) Symone", re.IGNORECASE)
+HELP_PATTERN = re.compile("what can you do Symone\\?", re.IGNORECASE)
+LEVEL_UP_PATTERN = re.compile(
+    "Did we (level up\\?|level up|levelup\\?|levelup|level\\?|level)", re.IGNORECASE
+)
+# a query may hold several statements separated by `;` or newlines
+ASPECT_QUERY_PATTERN = re.compile("Symone, (.*)", re.IGNORECASE | re.DOTALL)
+
+LISTENER_PATTERNS = (
+    HELLO_PATTERN,
+    HELP_PATTERN,
+    LEVEL_UP_PATTERN,
+    ASPECT_QUERY_PATTERN,
+)
+
+# All of the above in one alternation, so a single scan of a message tells
+# whether any listener could match it.
+TRIGGER_PATTERN = re.compile(
+    "|".join(f"(?:{pattern.pattern})" for pattern in LISTENER_PATTERNS),
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def is_for_symone(body: Dict[str, Any]) -> bool:
+    """
+    Whether a Slack request could reach one of Symone's message listeners. Only
+    message events are screened; every other request is let through.
+
+    param body: parsed request body.
+    return: False for a message event no listener would match.
+    """
+    event = body.get("event")
+    if body.get("type") != "event_callback" or not isinstance(event, dict):
+        return True
+    if event.get("type") != "message":
+        return True
+    return TRIGGER_PATTERN.search(event.get("text") or "") is not None
@@ -1,12 +1,19 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Dict, Any
+from urllib.parse import parse_qsl
 
 import pytest
 from bson import DBRef
+from pymongo import monitoring
 from testcontainers.mongodb import MongoDbContainer
 
 from symone_bot.aspects import Aspect
+from symone_bot.async_data import AsyncDatabaseClient
 from symone_bot.commands import Command
 from symone_bot.data import DatabaseClient
+from symone_bot.idempotency import EventDeduplicator, EventLog
 from symone_bot.metadata import QueryMetaData
 
 
@@ -92,6 +99,67 @@ def database_client(mongodb):
     )
 
 
+@pytest.fixture
+def async_database_client(mongodb):
+    """
+    AsyncDatabaseClient for the test database, installed as the process-wide client.
+    It binds to the event loop that first uses it, so each test runs one loop.
+    """
+    AsyncDatabaseClient.instance = AsyncDatabaseClient(
+        "test",
+        mongo_user="test",
+        mongo_host=f"{mongodb.client.address[0]}:{mongodb.client.address[1]}",
+        mongo_scheme="mongodb",
+    )
+    yield AsyncDatabaseClient.instance
+    AsyncDatabaseClient.instance.close()
+    del AsyncDatabaseClient.instance
+
+
+@pytest.fixture(autouse=True)
+def event_deduplicator():
+    """Gives each test a fresh process-wide EventDeduplicator."""
+    EventDeduplicator.instance = EventDeduplicator(EventLog())
+    yield EventDeduplicator.instance
+    del EventDeduplicator.instance
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Records every command a MongoClient sends to the bot's database."""
+
+    def __init__(self):
+        self.commands = []
+        self.documents = []
+
+    def started(self, event):
+        if event.database_name == "symone_knowledge":
+            self.commands.append(event.command_name)
+            self.documents.append(event.command)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@pytest.fixture
+def command_counter(mongodb, database_client):
+    """
+    Re-initializes the DatabaseClient singleton with a listener counting the
+    round trips it makes to the database.
+    """
+    counter = CommandCounter()
+    DatabaseClient(
+        "test",
+        mongo_user="test",
+        mongo_host=f"{mongodb.client.address[0]}:{mongodb.client.address[1]}",
+        mongo_scheme="mongodb",
+        event_listeners=[counter],
+    )
+    return counter
+
+
 @pytest.fixture(autouse=True)
 def reset_data(sample_game_context_1, sample_game_context_2, mongodb):
     """
@@ -110,3 +178,66 @@ def reset_data(sample_game_context_1, sample_game_context_2, mongodb):
     )
     mongodb.game_context.insert_one(sample_game_context_2)
     yield
+
+
+class FakeSlackApi(ThreadingHTTPServer):
+    """
+    Local stand-in for the Slack Web API. Answers every method with `ok`, or with
+    the error set for it in `errors`, and records the calls it receives as
+    (method, arguments) pairs.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeSlackApiHandler)
+        self.calls = []
+        self.errors = {}
+        self.call_received = threading.Condition()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def wait_for(self, method: str, timeout: float = 5.0) -> Dict[str, Any]:
+        """Waits for a call to the given method, and returns its arguments."""
+        with self.call_received:
+            self.call_received.wait_for(
+                lambda: any(name == method for name, _ in self.calls), timeout
+            )
+        return next((args for name, args in self.calls if name == method), None)
+
+
+class _FakeSlackApiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            args = json.loads(body or "{}")
+        else:
+            args = dict(parse_qsl(body))
+        method = self.path.strip("/")
+        response = {"ok": True}
+        if method in self.server.errors:
+            response = {"ok": False, "error": self.server.errors[method]}
+        elif method == "auth.test":
+            response.update(user_id="UBOT", bot_id="BBOT", team_id="T1")
+        with self.server.call_received:
+            self.server.calls.append((method, args))
+            self.server.call_received.notify_all()
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_slack():
+    server = FakeSlackApi()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
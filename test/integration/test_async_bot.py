@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from symone_bot.async_ingress import symone_message
+from symone_bot.handler_source import HandlerSource
+
+GAME_MASTER = "U72P1S26N"
+
+
+def run_message(input_text, user_id, handler_source=HandlerSource.ASPECT_QUERY):
+    return asyncio.run(symone_message(input_text, user_id, handler_source))
+
+
+class TestAsyncBot:
+    @pytest.mark.parametrize(
+        "input_text, expected_response",
+        [
+            ("add xp 100", "Updated xp to 100"),
+            ("add 1000 to gold", "Updated gold to 2000"),
+            ("remove 5 from party_size", "Reduced party_size to 0"),
+            ("current gold", "gold is currently 1000"),
+            ("set xp_target to 1000", "Set xp_target to 1000"),
+            (
+                'switch campaign to "rise of tiamat"',
+                "Current campaign set to rise of tiamat",
+            ),
+            (
+                'switch campaign to "Not a real campaign"',
+                "Error finding campaign: `Not a real campaign`, make sure the name is correct.",
+            ),
+            (
+                "add campaign 5",
+                "campaign is a singleton aspect, you can't call `add` on it.",
+            ),
+            ("foo+bar+baz", "I'm sorry, I don't understand."),
+        ],
+    )
+    def test_interactions(self, async_database_client, input_text, expected_response):
+        response = run_message(input_text, GAME_MASTER)
+
+        assert response["text"] == expected_response
+
+    @pytest.mark.parametrize("input_text", ["add 10 to gold", "set xp 10"])
+    def test_reject_unallowed_user(self, async_database_client, input_text):
+        assert run_message(input_text, "foobar")["text"] == "Nice try..."
+
+    def test_add_xp_level_up_threshold(self, async_database_client):
+        response = run_message("add xp 500", GAME_MASTER)
+
+        assert response["text"] == (
+            "Updated xp to 500. The party leveled up! :tada: You're now level 2!"
+        )
+
+    def test_multi_statement_query(self, async_database_client):
+        response = run_message("add xp 100; add gold 5\ncurrent xp", GAME_MASTER)
+
+        assert response["text"] == (
+            "Updated xp to 100\nUpdated gold to 1005\nxp is currently 100"
+        )
+
+    def test_concurrent_messages(self, async_database_client):
+        async def add_concurrently():
+            await asyncio.gather(
+                *(
+                    symone_message("add xp 10", GAME_MASTER, HandlerSource.ASPECT_QUERY)
+                    for _ in range(10)
+                )
+            )
+            return await symone_message(
+                "current xp", GAME_MASTER, HandlerSource.ASPECT_QUERY
+            )
+
+        assert asyncio.run(add_concurrently())["text"] == "xp is currently 100"
+
+    def test_help_interaction(self, async_database_client):
+        response = run_message("What can you do Symone?", "1234", HandlerSource.HELP)
+
+        assert "help" in response["text"]
+
+    def test_interaction_with_blank_input(self):
+        with pytest.raises(ValueError):
+            run_message("", "1234")
+
+    def test_interaction_with_no_user_id(self):
+        response = run_message("What can you do Symone?", None, HandlerSource.HELP)
+
+        assert response["text"] == (
+            "Sorry, Slack told me your user ID is blank? That's weird. Please try again."
+        )
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from symone_bot.bot_ingress import symone_message
@@ -200,3 +202,144 @@ class TestBot:
             response["text"]
             == "Updated xp to 1000. The party leveled up! :tada: You're now level 2!"
         )
+
+    def test_multi_statement_query(self, game_master, command_counter, database_client):
+        response = symone_message(
+            "add xp 300; add gold 50\nadd xp_target 200",
+            game_master,
+            HandlerSource.ASPECT_QUERY,
+        )
+
+        assert response["response_type"] == "in_channel"
+        assert response["text"] == (
+            "Updated xp to 300\nUpdated gold to 1050\nUpdated xp_target to 700"
+        )
+        assert command_counter.commands == ["aggregate", "findAndModify"]
+        party = database_client.get_current_game_context()["party"]
+        assert (party["xp"], party["xp_for_level_up"]) == (300, 700)
+
+    @pytest.mark.parametrize(
+        "input_text, expected_text, expected_commands",
+        [
+            (
+                "current xp; current gold",
+                "xp is currently 0\ngold is currently 1000",
+                ["aggregate"],
+            ),
+            (
+                "current xp; add xp 5; current xp",
+                "xp is currently 0\nUpdated xp to 5\nxp is currently 5",
+                ["aggregate", "findAndModify"],
+            ),
+        ],
+    )
+    def test_multi_statement_query_reads_game_context_once(
+        self, game_master, command_counter, input_text, expected_text, expected_commands
+    ):
+        response = symone_message(input_text, game_master, HandlerSource.ASPECT_QUERY)
+
+        assert response["text"] == expected_text
+        assert command_counter.commands == expected_commands
+
+    def test_concurrent_adds_are_not_lost(self, game_master, database_client):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(
+                executor.map(
+                    lambda _: symone_message(
+                        "add gold 10", game_master, HandlerSource.ASPECT_QUERY
+                    ),
+                    range(40),
+                )
+            )
+
+        assert (
+            database_client.get_current_game_context()["currency"]["quantity"] == 1400
+        )
+
+    def test_multi_statement_query_rejects_unallowed_user(self):
+        response = symone_message(
+            "add xp 300; current xp", "foobar", HandlerSource.ASPECT_QUERY
+        )
+
+        assert response["text"] == "Nice try...\nxp is currently 0"
+
+    @pytest.mark.parametrize(
+        "input_text, user_id, expected_commands",
+        [
+            ("add xp 100", "U72P1S26N", ["aggregate", "findAndModify"]),
+            (
+                "add xp 500",
+                "U72P1S26N",
+                ["aggregate", "findAndModify", "findAndModify"],
+            ),
+            ("remove xp 100", "U72P1S26N", ["aggregate", "findAndModify"]),
+            ("set xp 100", "U72P1S26N", ["aggregate", "update"]),
+            ("current xp", "U72P1S26N", ["aggregate"]),
+            ('switch campaign to "Rise of Tiamat"', "U72P1S26N", ["find", "update"]),
+            ("add xp 100", "foobar", ["aggregate"]),
+            (
+                "add xp 300; add gold 50",
+                "U72P1S26N",
+                ["aggregate", "findAndModify"],
+            ),
+            ("add campaign 5", "U72P1S26N", []),
+            ("foo+bar+baz", "U72P1S26N", []),
+        ],
+    )
+    def test_round_trips_per_command(
+        self, command_counter, input_text, user_id, expected_commands
+    ):
+        symone_message(input_text, user_id, HandlerSource.ASPECT_QUERY)
+
+        assert command_counter.commands == expected_commands
+
+    @pytest.mark.parametrize(
+        "input_text, expected_response",
+        [
+            (
+                "add campaign 5",
+                "campaign is a singleton aspect, you can't call `add` on it.",
+            ),
+            (
+                "remove campaign 5",
+                "campaign is a singleton aspect, you can't call `remove` on it.",
+            ),
+            ("add 30 chickens", "I'm not sure what aspect you're trying to modify."),
+            ("set 10", "I'm not sure what aspect you're trying to modify."),
+            ("add xp", "I'm sorry, I don't understand."),
+        ],
+    )
+    def test_rejected_requests_make_no_round_trips(
+        self, command_counter, input_text, expected_response
+    ):
+        response = symone_message(input_text, "foobar", HandlerSource.ASPECT_QUERY)
+
+        assert response["text"] == expected_response
+        assert command_counter.commands == []
+
+    def test_misspelled_modifier_command_is_not_run(
+        self, game_master, command_counter, database_client
+    ):
+        response = symone_message(
+            "remote gold 100", game_master, HandlerSource.ASPECT_QUERY
+        )
+
+        assert response["text"] == (
+            "I'm sorry, I don't understand. Did you mean `remove`?"
+        )
+        assert command_counter.commands == []
+        assert (
+            database_client.get_current_game_context()["currency"]["quantity"] == 1000
+        )
+
+    def test_help_makes_no_round_trips(self, command_counter):
+        symone_message("What can you do Symone?", "1234", HandlerSource.HELP)
+
+        assert command_counter.commands == []
+
+    def test_repeat_query_reuses_active_context_id(self, command_counter):
+        symone_message("current xp", "U72P1S26N", HandlerSource.ASPECT_QUERY)
+        command_counter.commands.clear()
+        symone_message("current xp", "U72P1S26N", HandlerSource.ASPECT_QUERY)
+
+        assert command_counter.commands == ["find"]
@@ -1,3 +1,5 @@
+import pytest
+
 from symone_bot.aspects import Aspect, aspect_dict
 
 
@@ -11,3 +13,25 @@ def test_aspect_help():
 def test_campaign_aspect_is_singleton():
     campaign_aspect = aspect_dict.get("campaign")
     assert campaign_aspect.is_singleton
+
+
+@pytest.mark.parametrize(
+    "aspect_name, expected", [("xp", "party.xp"), ("campaign", "name")]
+)
+def test_aspect_database_path(aspect_name, expected):
+    assert aspect_dict[aspect_name].database_path == expected
+
+
+def test_aspect_aliases():
+    aspect = Aspect("foo", "a foo aspect", "foo", aliases=["the foo", "foos"])
+
+    assert aspect.aliases == ("the foo", "foos")
+    assert Aspect("bar", "", "bar").aliases == ()
+
+
+def test_aspect_has_no_instance_dict():
+    aspect = Aspect("foo", "a foo aspect", "foo")
+
+    assert not hasattr(aspect, "__dict__")
+    with pytest.raises(AttributeError):
+        aspect.unknown = 1
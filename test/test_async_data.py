@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from symone_bot.async_data import AsyncDatabaseClient
+from symone_bot.data import DatabaseClientException, GameContext
+
+
+def test_init_requires_password():
+    with pytest.raises(AttributeError):
+        AsyncDatabaseClient(None)
+
+
+def test_get_client_returns_installed_client(async_database_client):
+    assert AsyncDatabaseClient.get_client() is async_database_client
+
+
+def test_get_current_game_context(async_database_client):
+    game_context = asyncio.run(async_database_client.get_current_game_context())
+
+    assert isinstance(game_context, GameContext)
+    assert game_context["name"] == "Against the Aeon Throne"
+
+
+def test_get_current_game_context_fields(async_database_client):
+    async def read_twice():
+        # the second read goes by the cached id
+        first = await async_database_client.get_current_game_context_fields(
+            ["party.xp"]
+        )
+        second = await async_database_client.get_current_game_context_fields(
+            ["party.xp"]
+        )
+        return first, second
+
+    first, second = asyncio.run(read_twice())
+
+    assert first == second
+    assert set(first) == {"_id", "party"}
+    assert first["party"] == {"xp": 0}
+    assert async_database_client.active_context_cache_info().hits == 1
+
+
+def test_get_current_game_context_raises_when_no_context(
+    async_database_client, mongodb
+):
+    mongodb.current_game_context.delete_many({})
+
+    with pytest.raises(DatabaseClientException):
+        asyncio.run(async_database_client.get_current_game_context())
+
+
+def test_get_game_master(async_database_client):
+    assert asyncio.run(async_database_client.get_game_master()) == "U72P1S26N"
+
+
+def test_increment_game_context(async_database_client):
+    game_context = asyncio.run(
+        async_database_client.increment_game_context("party.xp", 25)
+    )
+
+    assert game_context["party"]["xp"] == 25
+
+
+def test_increment_game_context_is_atomic_across_tasks(async_database_client):
+    async def add_concurrently():
+        await asyncio.gather(
+            *(
+                async_database_client.increment_game_context("party.xp", 1)
+                for _ in range(20)
+            )
+        )
+        return await async_database_client.get_current_game_context()
+
+    assert asyncio.run(add_concurrently())["party"]["xp"] == 20
+
+
+def test_set_game_context_field(async_database_client):
+    async def set_and_read():
+        await async_database_client.set_game_context_field("party.size", 7)
+        return await async_database_client.get_current_game_context()
+
+    assert asyncio.run(set_and_read())["party"]["size"] == 7
+
+
+def test_update_game_context_sends_changes(async_database_client):
+    async def update_and_read():
+        game_context = await async_database_client.get_current_game_context()
+        game_context["party"]["name"] = "The Aeon Guard"
+        await async_database_client.update_game_context(game_context)
+        assert game_context.changes() == {}
+        return await async_database_client.get_current_game_context()
+
+    assert asyncio.run(update_and_read())["party"]["name"] == "The Aeon Guard"
+
+
+def test_switch_active_game_context(async_database_client):
+    async def switch():
+        campaign = await async_database_client.get_context_by_campaign_name(
+            "rise of tiamat", projection={"_id": 1}
+        )
+        await async_database_client.update_active_game_context(campaign["_id"])
+        return await async_database_client.get_current_game_context()
+
+    assert asyncio.run(switch())["name"] == "Rise of Tiamat"
+
+
+def test_get_context_by_campaign_name_raises_when_missing(async_database_client):
+    with pytest.raises(DatabaseClientException):
+        asyncio.run(async_database_client.get_context_by_campaign_name("Nope"))
+
+
+def test_update_active_game_context_raises_without_tracker(
+    async_database_client, mongodb
+):
+    mongodb.current_game_context.delete_many({})
+
+    with pytest.raises(DatabaseClientException):
+        asyncio.run(async_database_client.update_active_game_context(ObjectId()))
+
+
+def test_warm_up_creates_indexes(async_database_client, mongodb):
+    asyncio.run(async_database_client.warm_up())
+
+    assert "name_case_insensitive" in mongodb.game_context.index_information()
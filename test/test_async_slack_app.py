@@ -0,0 +1,85 @@
+import asyncio
+
+from slack_bolt.request.async_request import AsyncBoltRequest
+from slack_sdk.web.async_client import AsyncWebClient
+
+from symone_bot import async_slack_app
+from symone_bot.async_slack_app import create_async_app
+from symone_bot.identity import BotIdentity
+from test.test_slack_app import SIGNING_SECRET, signed_message_event
+
+IDENTITY = BotIdentity("UBOT", "BBOT", "T1")
+
+
+def dispatch(fake_slack, *requests, identity=IDENTITY):
+    async def run():
+        app = create_async_app(
+            identity=identity,
+            token="xoxb-test",
+            client=AsyncWebClient(token="xoxb-test", base_url=fake_slack.url),
+            signing_secret=SIGNING_SECRET,
+            process_before_response=True,
+        )
+        return [
+            await app.async_dispatch(
+                AsyncBoltRequest(body=request.raw_body, headers=request.headers)
+            )
+            for request in requests
+        ]
+
+    return asyncio.run(run())
+
+
+def posted_texts(fake_slack):
+    return [
+        args["text"]
+        for method, args in fake_slack.calls
+        if method == "chat.postMessage"
+    ]
+
+
+def test_async_app_answers_greetings(fake_slack):
+    (response,) = dispatch(fake_slack, signed_message_event("hey Symone"))
+
+    assert response.status == 200
+    assert posted_texts(fake_slack) == ["hey there <@U72P1S26N>"]
+
+
+def test_async_app_answers_queries(fake_slack, async_database_client):
+    dispatch(fake_slack, signed_message_event("Symone, current gold"))
+
+    assert posted_texts(fake_slack) == ["gold is currently 1000"]
+
+
+def test_async_app_drops_unrelated_messages(fake_slack, monkeypatch):
+    handled = []
+
+    async def handle_message_events(body, logger):
+        handled.append(body)
+
+    monkeypatch.setattr(async_slack_app, "handle_message_events", handle_message_events)
+
+    (response,) = dispatch(fake_slack, signed_message_event("anyone up for tacos?"))
+
+    assert response.status == 200
+    assert handled == []
+    assert fake_slack.calls == []
+
+
+def test_async_app_without_identity_verifies_token(fake_slack):
+    dispatch(fake_slack, signed_message_event("hey Symone"), identity=None)
+
+    assert [method for method, _ in fake_slack.calls] == [
+        "auth.test",
+        "chat.postMessage",
+    ]
+
+
+def test_async_app_runs_retried_queries_once(fake_slack, async_database_client):
+    dispatch(
+        fake_slack,
+        signed_message_event("Symone, add gold 10"),
+        signed_message_event("Symone, add gold 10", retry_num=1),
+    )
+
+    assert posted_texts(fake_slack) == ["Updated gold to 1010"]
@@ -0,0 +1,80 @@
+import pytest
+
+from symone_bot.cache import LRUCache, TTLCache
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(2)
+    cache.put("foo", 1)
+
+    assert cache.get("foo") == 1
+    assert cache.get("bar") is None
+    assert cache.info() == (1, 1, 2, 1)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("foo", 1)
+    cache.put("bar", 2)
+    cache.get("foo")
+    cache.put("baz", 3)
+
+    assert cache.get("bar") is None
+    assert cache.get("foo") == 1
+    assert cache.get("baz") == 3
+
+
+def test_lru_cache_clear_resets_entries_and_counters():
+    cache = LRUCache(2)
+    cache.put("foo", 1)
+    cache.get("foo")
+    cache.clear()
+
+    assert cache.get("foo", "missing") == "missing"
+    assert cache.info() == (0, 1, 2, 0)
+
+
+@pytest.mark.parametrize("maxsize", [0, -1])
+def test_lru_cache_rejects_invalid_size(maxsize):
+    with pytest.raises(ValueError):
+        LRUCache(maxsize)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(10, clock=clock)
+    cache.put("foo", 1)
+
+    clock.now = 9.9
+    assert cache.get("foo") == 1
+    clock.now = 10
+    assert cache.get("foo") is None
+    assert cache.info() == (1, 1, None, 0)
+
+
+def test_ttl_cache_invalidate():
+    cache = TTLCache(10)
+    cache.put("foo", 1)
+    cache.invalidate("foo")
+
+    assert cache.get("foo") is None
+
+
+def test_ttl_cache_with_zero_ttl_never_caches():
+    cache = TTLCache(0)
+    cache.put("foo", 1)
+
+    assert cache.get("foo") is None
+
+
+def test_ttl_cache_rejects_negative_ttl():
+    with pytest.raises(ValueError):
+        TTLCache(-1)
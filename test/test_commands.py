@@ -4,6 +4,8 @@ from symone_bot.aspects import aspect_dict, Aspect
 from symone_bot.commands import (
     Command,
     add,
+    command_dict,
+    default_registry,
     default_response,
     help_message,
     current,
@@ -11,7 +13,6 @@ from symone_bot.commands import (
     switch_campaign,
     _compute_new_value,
     _add_and_remove_handler,
-    set_aspect,
 )
 
 
@@ -42,6 +43,12 @@ def test_default_response(test_metadata):
     assert actual["text"] == "I'm sorry, I don't understand."
 
 
+def test_default_response_suggests_command(test_metadata):
+    actual = default_response(test_metadata, suggestion="remove")
+
+    assert actual["text"] == "I'm sorry, I don't understand. Did you mean `remove`?"
+
+
 def test_help_message(test_metadata, test_commands):
     actual = help_message(test_metadata)
 
@@ -49,9 +56,43 @@ def test_help_message(test_metadata, test_commands):
     assert "`help`: retrieves help info.\n" in actual["text"]
 
 
+def test_help_message_reuses_text(test_metadata):
+    first = help_message(test_metadata)
+    second = help_message(test_metadata)
+
+    assert first is not second
+    assert first["text"] is second["text"]
+    assert first["text"].endswith(
+        "tracking the following aspects: xp, xp_target, gold, party_size, campaign"
+    )
+
+
+def test_help_message_follows_registry_changes(test_metadata, monkeypatch):
+    monkeypatch.setitem(
+        aspect_dict, "loot", Aspect("loot", "party loot", "loot", value_type=str)
+    )
+    monkeypatch.setitem(
+        command_dict, "roll", Command("roll", "rolls dice", default_response)
+    )
+    monkeypatch.setitem(command_dict, "shout", Command("shout", "shouts", add))
+
+    text = help_message(test_metadata)["text"]
+
+    assert text.endswith("campaign, loot")
+    assert "`shout`: shouts.\n" in text
+    assert "roll" not in text
+
+
+def run_command(name, **kwargs):
+    command = command_dict[name]
+    return default_registry.get().pipeline(command)(
+        {"preposition": None, "value": None, **kwargs}
+    )
+
+
 def test_add_deny_unallowed_user(test_metadata, test_aspects, database_client):
     aspect = test_aspects.get("bar")
-    actual = add(metadata=test_metadata, aspect=aspect, value=100)
+    actual = run_command("add", metadata=test_metadata, aspect=aspect, value=100)
 
     assert actual["response_type"] == "in_channel"
     assert actual["text"] == "Nice try..."
@@ -69,7 +110,7 @@ def test_add(test_metadata, database_client, sample_game_context_1):
 def test_add_to_singleton_aspect_should_reject(test_metadata, database_client):
     test_metadata.user_id = database_client.get_game_master()
     aspect = aspect_dict.get("campaign")
-    actual = add(metadata=test_metadata, aspect=aspect, value=100)
+    actual = run_command("add", metadata=test_metadata, aspect=aspect, value=100)
 
     assert actual["response_type"] == "in_channel"
     assert (
@@ -107,7 +148,7 @@ def test_remove(test_metadata, database_client):
 
 def test_remove_deny_unallowed_user(test_metadata, test_aspects, database_client):
     aspect = test_aspects.get("bar")
-    actual = remove(metadata=test_metadata, aspect=aspect, value=100)
+    actual = run_command("remove", metadata=test_metadata, aspect=aspect, value=100)
 
     assert actual["response_type"] == "in_channel"
     assert actual["text"] == "Nice try..."
@@ -116,7 +157,7 @@ def test_remove_deny_unallowed_user(test_metadata, test_aspects, database_client
 def test_remove_from_singleton_aspect_should_reject(test_metadata, database_client):
     test_metadata.user_id = database_client.get_game_master()
     aspect = aspect_dict.get("campaign")
-    actual = remove(metadata=test_metadata, aspect=aspect, value=100)
+    actual = run_command("remove", metadata=test_metadata, aspect=aspect, value=100)
 
     assert actual["response_type"] == "in_channel"
     assert (
@@ -127,7 +168,7 @@ def test_remove_from_singleton_aspect_should_reject(test_metadata, database_clie
 
 def test_set_deny_unallowed_user(test_metadata, test_aspects, database_client):
     aspect = test_aspects.get("bar")
-    actual = set_aspect(metadata=test_metadata, aspect=aspect, value=100)
+    actual = run_command("set", metadata=test_metadata, aspect=aspect, value=100)
 
     assert actual["response_type"] == "in_channel"
     assert actual["text"] == "Nice try..."
@@ -147,7 +188,7 @@ def test_switch_campaign_to_non_existant_campaign(test_metadata, database_client
     assert actual["response_type"] == "in_channel"
     assert (
         actual["text"]
-        == "Error finding campaign: `Not a real campaign`, make sure case is correct."
+        == "Error finding campaign: `Not a real campaign`, make sure the name is correct."
     )
 
 
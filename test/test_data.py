@@ -1,4 +1,17 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from bson import DBRef
+from pymongo import monitoring
+from pymongo.errors import ServerSelectionTimeoutError
+
+from symone_bot.data import (
+    DEFAULT_CLIENT_OPTIONS,
+    DatabaseClient,
+    GameContext,
+    unit_of_work,
+)
 
 
 def test_get_current_campaign_id(database_client):
@@ -28,3 +41,505 @@ def test_get_context_tracker_raises_when_no_context(database_client):
     database_client.db.current_game_context.delete_many({})
     with pytest.raises(Exception):
         database_client.get_context_tracker()
+
+
+def test_session_reads_and_writes_game_context_once(database_client, mocker):
+    find_spy = mocker.spy(database_client, "_find_current_game_context")
+    write_spy = mocker.spy(database_client, "_write_game_context")
+
+    with database_client.session():
+        for _ in range(3):
+            game_context = database_client.get_current_game_context()
+            game_context["party"]["xp"] += 100
+            database_client.update_game_context(game_context)
+        assert write_spy.call_count == 0
+
+    assert find_spy.call_count == 1
+    assert write_spy.call_count == 1
+    assert database_client.get_current_game_context()["party"]["xp"] == 300
+
+
+def test_session_skips_write_when_nothing_changed(database_client, mocker):
+    write_spy = mocker.spy(database_client, "_write_game_context")
+
+    with database_client.session():
+        database_client.get_current_game_context()
+
+    assert write_spy.call_count == 0
+
+
+def test_session_discards_changes_on_error(database_client):
+    with pytest.raises(RuntimeError):
+        with database_client.session():
+            game_context = database_client.get_current_game_context()
+            game_context["party"]["xp"] = 1000
+            database_client.update_game_context(game_context)
+            raise RuntimeError("boom")
+
+    assert database_client.get_current_game_context()["party"]["xp"] == 0
+
+
+def test_nested_session_reuses_open_session(database_client):
+    with database_client.session() as outer:
+        with database_client.session() as inner:
+            assert inner is outer
+
+
+def test_session_reloads_game_context_after_switch(database_client):
+    with database_client.session():
+        game_context = database_client.get_current_game_context()
+        game_context["party"]["xp"] = 1000
+        database_client.update_game_context(game_context)
+        rise_of_tiamat = database_client.get_context_by_campaign_name("Rise of Tiamat")
+        database_client.update_active_game_context(rise_of_tiamat["_id"])
+
+        assert database_client.get_current_game_context()["name"] == "Rise of Tiamat"
+
+    aeon_throne = database_client.get_context_by_campaign_name(
+        "Against the Aeon Throne"
+    )
+    assert aeon_throne["party"]["xp"] == 1000
+
+
+def test_unit_of_work_binds_to_first_client_used(database_client, mocker):
+    find_spy = mocker.spy(database_client, "_find_current_game_context")
+
+    with unit_of_work() as session:
+        assert session.database_client is None
+        database_client.get_game_master()
+        database_client.get_current_game_context()
+        with database_client.session() as inner:
+            assert inner is session
+
+    assert session.database_client is database_client
+    assert find_spy.call_count == 1
+
+
+def test_update_active_game_context_raises_when_no_tracker(database_client):
+    campaign = database_client.get_context_by_campaign_name("Rise of Tiamat")
+    database_client.db.current_game_context.delete_many({})
+    with pytest.raises(Exception):
+        database_client.update_active_game_context(campaign["_id"])
+
+
+def test_increment_game_context_returns_updated_document(database_client):
+    game_context = database_client.increment_game_context("party.xp", 250)
+
+    assert game_context["party"]["xp"] == 250
+    assert database_client.get_current_game_context()["party"]["xp"] == 250
+
+
+def test_session_sends_increment_immediately(database_client, mocker):
+    increment_spy = mocker.spy(database_client, "_increment_game_context")
+
+    with database_client.session():
+        game_context = database_client.increment_game_context("party.xp", 250)
+        assert increment_spy.call_count == 1
+        assert game_context is database_client.get_current_game_context()
+
+    assert increment_spy.call_count == 1
+
+
+def test_deferred_session_sends_increments_with_final_write(database_client, mocker):
+    increment_spy = mocker.spy(database_client, "_increment_game_context")
+
+    with unit_of_work(database_client, defer_increments=True):
+        database_client.increment_game_context("party.xp", 250)
+        game_context = database_client.increment_game_context("party.xp", 250)
+        database_client.increment_game_context("currency.quantity", -1000)
+        assert game_context["party"]["xp"] == 500
+        assert increment_spy.call_count == 0
+
+    increment_spy.assert_called_once()
+    game_context = database_client.get_current_game_context()
+    assert game_context["party"]["xp"] == 500
+    assert game_context["currency"]["quantity"] == 0
+
+
+def test_increment_with_dirty_session_writes_once(database_client, mocker):
+    write_spy = mocker.spy(database_client, "_write_game_context")
+    increment_spy = mocker.spy(database_client, "_increment_game_context")
+
+    with unit_of_work(database_client, defer_increments=True):
+        game_context = database_client.get_current_game_context()
+        game_context["party"]["xp"] = 100
+        database_client.update_game_context(game_context)
+        database_client.increment_game_context("party.xp", 50)
+
+    assert write_spy.call_count == 1
+    assert increment_spy.call_count == 0
+    assert database_client.get_current_game_context()["party"]["xp"] == 150
+
+
+def test_game_context_changes_lists_changed_paths():
+    game_context = GameContext(
+        {"_id": 1, "party": {"xp": 0, "level": 1}, "loot": {"sword": 1}, "name": "a"}
+    )
+    game_context["party"]["xp"] = 100
+    game_context["loot"]["shield"] = 1
+    del game_context["name"]
+
+    assert game_context.changes() == {
+        "$set": {"party.xp": 100, "loot.shield": 1},
+        "$unset": {"name": ""},
+    }
+    game_context.mark_clean()
+    assert game_context.changes() == {}
+
+
+def test_game_context_apply_increment_is_not_a_change():
+    game_context = GameContext({"_id": 1, "party": {"xp": 0}})
+    game_context.apply_increment("party.xp", 10)
+
+    assert game_context["party"]["xp"] == 10
+    assert game_context.changes() == {}
+
+
+def test_update_game_context_only_sends_changed_fields(database_client, mongodb):
+    game_context = database_client.get_current_game_context()
+    mongodb.game_context.update_one(
+        {"_id": game_context["_id"]}, {"$set": {"currency.quantity": 5}}
+    )
+    game_context["party"]["xp"] = 100
+    database_client.update_game_context(game_context)
+
+    stored = database_client.get_current_game_context()
+    assert stored["party"]["xp"] == 100
+    assert stored["currency"]["quantity"] == 5
+
+
+def test_update_game_context_skips_write_without_changes(command_counter):
+    database_client = DatabaseClient.get_client()
+    game_context = database_client.get_current_game_context()
+    database_client.update_game_context(game_context)
+
+    assert "update" not in command_counter.commands
+
+
+def test_session_set_then_add_on_same_field(database_client):
+    with unit_of_work(database_client, defer_increments=True):
+        game_context = database_client.get_current_game_context()
+        game_context["party"]["xp"] = 5
+        database_client.update_game_context(game_context)
+        database_client.increment_game_context("party.xp", 10)
+        database_client.increment_game_context("currency.quantity", 10)
+
+    stored = database_client.get_current_game_context()
+    assert stored["party"]["xp"] == 15
+    assert stored["currency"]["quantity"] == 1010
+
+
+def test_active_context_id_is_cached(command_counter):
+    database_client = DatabaseClient.get_client()
+    database_client.get_current_game_context()
+    database_client.get_current_game_context()
+
+    assert command_counter.commands == ["aggregate", "find"]
+    assert database_client.active_context_cache_info().hits == 1
+
+
+def test_switching_campaign_invalidates_active_context_id(database_client):
+    database_client.get_current_game_context()
+    campaign = database_client.get_context_by_campaign_name("Rise of Tiamat")
+    database_client.update_active_game_context(campaign["_id"])
+
+    assert database_client.get_current_game_context()["name"] == "Rise of Tiamat"
+
+
+def test_stale_active_context_id_is_reloaded(database_client, mongodb):
+    database_client.get_current_game_context()
+    campaign = database_client.get_context_by_campaign_name("Rise of Tiamat")
+    active_context = mongodb.current_game_context.find_one({})["active_context"]
+    mongodb.game_context.delete_one({"_id": active_context.id})
+    mongodb.current_game_context.update_one(
+        {},
+        {
+            "$set": {
+                "active_context": DBRef(
+                    "game_context", campaign["_id"], "symone_knowledge"
+                )
+            }
+        },
+    )
+
+    assert database_client.get_current_game_context()["name"] == "Rise of Tiamat"
+
+
+def test_find_active_game_context_in_one_round_trip(command_counter):
+    database_client = DatabaseClient.get_client()
+    game_context = database_client.find_active_game_context()
+
+    assert game_context["name"] == "Against the Aeon Throne"
+    assert command_counter.commands == ["aggregate"]
+    assert database_client.get_active_context_id() == game_context["_id"]
+
+
+def test_find_active_game_context_with_projection(database_client):
+    game_context = database_client.find_active_game_context({"game_master": 1})
+
+    assert set(game_context) == {"_id", "game_master"}
+
+
+def test_find_active_game_context_returns_none_for_dangling_tracker(
+    database_client, mongodb
+):
+    mongodb.game_context.delete_many({})
+
+    assert database_client.find_active_game_context() is None
+
+
+def test_get_context_by_campaign_name_ignores_case(database_client):
+    campaign = database_client.get_context_by_campaign_name("rise of TIAMAT")
+
+    assert campaign["name"] == "Rise of Tiamat"
+
+
+def test_get_context_by_campaign_name_with_projection(database_client):
+    campaign = database_client.get_context_by_campaign_name(
+        "Rise of Tiamat", projection={"_id": 1}
+    )
+
+    assert set(campaign) == {"_id"}
+
+
+def test_ensure_indexes_is_idempotent(database_client, mongodb):
+    database_client.ensure_indexes()
+    database_client.ensure_indexes()
+
+    assert "name_case_insensitive" in mongodb.game_context.index_information()
+    assert "tracking_context" in mongodb.current_game_context.index_information()
+
+
+# Keys the driver adds to a command that `explain` does not accept.
+_DRIVER_KEYS = {"lsid", "txnNumber", "apiVersion", "apiStrict", "writeConcern"}
+
+
+def test_queries_are_served_by_indexes(command_counter, mongodb):
+    database_client = DatabaseClient.get_client()
+    database_client.ensure_indexes()
+    command_counter.commands.clear()
+    command_counter.documents.clear()
+
+    database_client.get_current_game_context()
+    database_client.increment_game_context("party.xp", 10)
+    game_context = database_client.get_current_game_context()
+    game_context["party"]["name"] = "The Aeon Guard"
+    database_client.update_game_context(game_context)
+    campaign = database_client.get_context_by_campaign_name("rise of tiamat")
+    database_client.update_active_game_context(campaign["_id"])
+    database_client.get_current_game_context()
+
+    explained = 0
+    for command in command_counter.documents:
+        if next(iter(command)) not in {"find", "aggregate", "update", "findAndModify"}:
+            continue
+        command = {
+            key: value
+            for key, value in command.items()
+            if not key.startswith("$") and key not in _DRIVER_KEYS
+        }
+        plan = mongodb.command("explain", command, verbosity="queryPlanner")
+        assert "COLLSCAN" not in str(plan), command
+        explained += 1
+    assert explained >= 5
+
+
+def test_get_current_game_context_fields_fetches_only_the_paths(database_client):
+    game_context = database_client.get_current_game_context_fields(
+        ["party.xp", "currency.quantity"]
+    )
+
+    assert game_context["party"] == {"xp": 0}
+    assert game_context["currency"] == {"quantity": 1000}
+    assert set(game_context) == {"_id", "party", "currency"}
+
+
+def test_get_current_game_context_fields_with_cached_id(database_client):
+    database_client.get_active_context_id()
+
+    game_context = database_client.get_current_game_context_fields(["name"])
+
+    assert game_context == {
+        "_id": database_client.get_active_context_id(),
+        "name": "Against the Aeon Throne",
+    }
+
+
+def test_get_current_game_context_fields_sees_session_changes(database_client):
+    with unit_of_work(database_client, defer_increments=True):
+        database_client.increment_game_context("party.xp", 50)
+
+        game_context = database_client.get_current_game_context_fields(["party.xp"])
+
+        assert game_context["party"]["xp"] == 50
+
+
+def test_get_current_game_context_fields_does_not_load_session(database_client):
+    with unit_of_work(database_client) as session:
+        database_client.get_current_game_context_fields(["party.xp"])
+
+        assert not session.is_loaded
+
+
+def test_get_game_master_outside_session(command_counter):
+    database_client = DatabaseClient.get_client()
+
+    assert database_client.get_game_master() == "U72P1S26N"
+    assert command_counter.commands == ["aggregate"]
+
+
+class PoolCounter(monitoring.ConnectionPoolListener):
+    """Counts the connections a MongoClient opens, and how often it checks one out."""
+
+    def __init__(self):
+        self.created = 0
+        self.checked_out = 0
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+@pytest.fixture
+def pooled_client(mongodb):
+    pool_counter = PoolCounter()
+    database_client = DatabaseClient(
+        "test",
+        mongo_user="test",
+        mongo_host=f"{mongodb.client.address[0]}:{mongodb.client.address[1]}",
+        mongo_scheme="mongodb",
+        event_listeners=[pool_counter],
+    )
+    return database_client, pool_counter
+
+
+def test_pool_is_reused_across_calls(pooled_client):
+    database_client, pool_counter = pooled_client
+    database_client.ping()
+
+    for _ in range(2000):
+        database_client.get_current_game_context_fields(["party.xp"])
+
+    assert pool_counter.checked_out >= 2000
+    assert pool_counter.created <= DEFAULT_CLIENT_OPTIONS["minPoolSize"] + 1
+
+
+def test_reconstructing_with_same_settings_reuses_client(mongodb, database_client):
+    client = database_client.client
+
+    same_client = DatabaseClient(
+        "test",
+        mongo_user="test",
+        mongo_host=f"{mongodb.client.address[0]}:{mongodb.client.address[1]}",
+        mongo_scheme="mongodb",
+    )
+
+    assert same_client is database_client
+    assert same_client.client is client
+
+
+def test_reconstructing_with_new_settings_replaces_client(database_client, mocker):
+    client = database_client.client
+    close = mocker.spy(client, "close")
+
+    database_client = DatabaseClient(
+        "test", mongo_user="other", mongo_host="localhost:1", mongo_scheme="mongodb"
+    )
+
+    assert database_client.client is not client
+    close.assert_called_once()
+
+
+def test_singleton_is_created_once_across_threads(mongodb):
+    def construct(_):
+        return DatabaseClient(
+            "test",
+            mongo_user="test",
+            mongo_host=f"{mongodb.client.address[0]}:{mongodb.client.address[1]}",
+            mongo_scheme="mongodb",
+        )
+
+    del DatabaseClient.instance
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        clients = list(executor.map(construct, range(64)))
+
+    assert all(client is clients[0] for client in clients)
+    assert len({id(client.client) for client in clients}) == 1
+
+
+def test_client_reconnects_after_fork(database_client, mocker):
+    client = database_client.client
+    mocker.patch("symone_bot.data.os.getpid", return_value=os.getpid() + 1)
+
+    assert database_client.client is not client
+    assert database_client.get_current_game_context()["name"] == (
+        "Against the Aeon Throne"
+    )
+
+
+def test_close_leaves_inherited_client_to_parent(database_client, mocker):
+    close = mocker.spy(database_client.client, "close")
+    mocker.patch("symone_bot.data.os.getpid", return_value=os.getpid() + 1)
+
+    database_client.close()
+
+    close.assert_not_called()
+
+
+def test_get_client_warms_up_once(mocker, database_client):
+    del DatabaseClient.instance
+    mocker.patch.dict(
+        os.environ, {"MONGO_PASSWORD": "test", "MONGO_MAX_POOL_SIZE": "3"}
+    )
+    mocker.patch("symone_bot.data.pymongo.MongoClient")
+    mocker.patch("symone_bot.data.atexit.register")
+    ping = mocker.patch.object(DatabaseClient, "ping")
+    ensure_indexes = mocker.patch.object(DatabaseClient, "ensure_indexes")
+
+    database_client = DatabaseClient.get_client()
+    DatabaseClient.get_client()
+
+    ping.assert_called_once()
+    ensure_indexes.assert_called_once()
+    assert database_client._client_settings[1]["maxPoolSize"] == 3
+
+
+def test_get_client_survives_unreachable_database(mocker, database_client):
+    del DatabaseClient.instance
+    mocker.patch.dict(os.environ, {"MONGO_PASSWORD": "test"})
+    mocker.patch("symone_bot.data.pymongo.MongoClient")
+    mocker.patch("symone_bot.data.atexit.register")
+    mocker.patch.object(
+        DatabaseClient, "ping", side_effect=ServerSelectionTimeoutError("down")
+    )
+
+    assert DatabaseClient.get_client() is DatabaseClient.instance
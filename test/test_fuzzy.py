@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+import pytest
+
+from symone_bot.fuzzy import NGramIndex, bounded_levenshtein, max_typo_distance
+
+LOOKUP_BUDGET_SECONDS = 0.001
+
+
+@pytest.mark.parametrize(
+    "first, second, expected",
+    [
+        ("current", "current", 0),
+        ("curent", "current", 1),
+        ("currnet", "current", 2),
+        ("gld", "gold", 1),
+        ("", "xp", 2),
+    ],
+)
+def test_bounded_levenshtein(first, second, expected):
+    assert bounded_levenshtein(first, second, 2) == expected
+
+
+@pytest.mark.parametrize("first, second", [("xp", "experience"), ("abcd", "wxyz")])
+def test_bounded_levenshtein_stops_past_the_bound(first, second):
+    assert bounded_levenshtein(first, second, 1) == 2
+
+
+@pytest.mark.parametrize(
+    "word, expected", [("ad", 0), ("gld", 1), ("remov", 1), ("curent", 2)]
+)
+def test_max_typo_distance(word, expected):
+    assert max_typo_distance(word) == expected
+
+
+@pytest.fixture
+def index():
+    return NGramIndex(["add", "current", "gold", "goad", "xp", "experience points"])
+
+
+@pytest.mark.parametrize(
+    "word, expected",
+    [
+        ("curent", (["current"], 1)),
+        ("experince points", (["experience points"], 1)),
+        ("currnet", (["current"], 2)),
+    ],
+)
+def test_nearest(index, word, expected):
+    assert index.nearest(word) == expected
+
+
+def test_nearest_returns_every_equally_close_keyword(index):
+    keywords, distance = index.nearest("gosd")
+
+    assert sorted(keywords) == ["goad", "gold"]
+    assert distance == 1
+
+
+@pytest.mark.parametrize("word", ["ad", "hello", "zzzzzz"])
+def test_nearest_without_a_close_keyword(index, word):
+    assert index.nearest(word)[0] == []
+
+
+def registry_names(count: int):
+    rng = random.Random(7)
+    syllables = ["ar", "ba", "cor", "da", "el", "fin", "gor", "hit", "is", "ka"]
+    syllables += ["lo", "ma", "nor", "pa", "que", "ra", "sta", "tor", "ul", "ve"]
+    names = set()
+    while len(names) < count:
+        words = [
+            "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name))
+    return name[:position] + name[position + 1 :]
+
+
+def test_lookups_stay_within_the_latency_budget():
+    names = registry_names(3000)
+    index = NGramIndex(names)
+    rng = random.Random(11)
+    queries = [misspell(rng.choice(names), rng) for _ in range(200)]
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.nearest(query)
+        timings.append(time.perf_counter() - start)
+
+    assert statistics.median(timings) < LOOKUP_BUDGET_SECONDS
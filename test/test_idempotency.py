@@ -0,0 +1,207 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from symone_bot.idempotency import (
+    EVENT_COLLECTION,
+    EventDeduplicator,
+    EventLog,
+    event_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_event_key_prefers_event_id():
+    body = {"event_id": "Ev1", "event": {"client_msg_id": "m1"}}
+
+    assert event_key(body) == "Ev1"
+
+
+def test_event_key_falls_back_to_client_msg_id():
+    assert event_key({"event": {"client_msg_id": "m1"}}) == "m1"
+
+
+def test_event_key_missing():
+    assert event_key({"type": "url_verification"}) is None
+
+
+def test_event_log_claims_once(clock):
+    event_log = EventLog(ttl=60, clock=clock)
+
+    assert event_log.claim("Ev1") == (True, None)
+    assert event_log.claim("Ev1") == (False, None)
+    event_log.complete("Ev1", "done")
+    assert event_log.claim("Ev1") == (False, "done")
+    assert event_log.info().hits == 2
+
+
+def test_event_log_expires(clock):
+    event_log = EventLog(ttl=60, clock=clock)
+    event_log.claim("Ev1")
+    event_log.complete("Ev1", "done")
+
+    clock.now = 61
+
+    assert event_log.claim("Ev1") == (True, None)
+
+
+def test_event_log_evicts_oldest(clock):
+    event_log = EventLog(ttl=60, maxsize=2, clock=clock)
+    for key in ["Ev1", "Ev2", "Ev3"]:
+        event_log.claim(key)
+
+    assert event_log.claim("Ev1") == (True, None)
+    assert event_log.info().size == 2
+
+
+@pytest.mark.parametrize("ttl, maxsize", [(-1, 10), (60, 0)])
+def test_event_log_rejects_bad_settings(ttl, maxsize):
+    with pytest.raises(ValueError):
+        EventLog(ttl=ttl, maxsize=maxsize)
+
+
+def test_run_replays_result(mocker):
+    deduplicator = EventDeduplicator(EventLog())
+    work = mocker.Mock(return_value={"text": "xp is currently 0"})
+
+    assert deduplicator.run("Ev1", work) == ({"text": "xp is currently 0"}, False)
+    assert deduplicator.run("Ev1", work) == ({"text": "xp is currently 0"}, True)
+    work.assert_called_once()
+
+
+def test_run_without_key_always_runs(mocker):
+    deduplicator = EventDeduplicator(EventLog())
+    work = mocker.Mock(return_value="done")
+
+    deduplicator.run(None, work)
+    deduplicator.run(None, work)
+
+    assert work.call_count == 2
+
+
+def test_run_releases_failed_events(mocker):
+    deduplicator = EventDeduplicator(EventLog())
+    work = mocker.Mock(side_effect=[RuntimeError("boom"), "done"])
+
+    with pytest.raises(RuntimeError):
+        deduplicator.run("Ev1", work)
+
+    assert deduplicator.run("Ev1", work) == ("done", False)
+
+
+def test_shared_collection_dedupes_across_instances(mongodb, mocker):
+    collection = mongodb[EVENT_COLLECTION]
+    collection.delete_many({})
+    first = EventDeduplicator(EventLog(), collection)
+    second = EventDeduplicator(EventLog(), collection)
+    work = mocker.Mock(return_value={"text": "done"})
+
+    first.run("Ev1", work)
+
+    assert second.run("Ev1", work) == ({"text": "done"}, True)
+    work.assert_called_once()
+    assert collection.find_one({"_id": "Ev1"})["result"] == {"text": "done"}
+
+
+def test_shared_collection_forgets_failed_events(mongodb, mocker):
+    collection = mongodb[EVENT_COLLECTION]
+    collection.delete_many({})
+    deduplicator = EventDeduplicator(EventLog(), collection)
+
+    with pytest.raises(RuntimeError):
+        deduplicator.run("Ev1", mocker.Mock(side_effect=RuntimeError("boom")))
+
+    assert collection.find_one({"_id": "Ev1"}) is None
+
+
+def test_failed_shared_claim_releases_event(mocker):
+    collection = mocker.Mock()
+    collection.insert_one.side_effect = [AutoReconnect("primary stepped down"), None]
+    deduplicator = EventDeduplicator(EventLog(), collection)
+    work = mocker.Mock(return_value="done")
+
+    with pytest.raises(AutoReconnect):
+        deduplicator.run("Ev1", work)
+
+    assert deduplicator.run("Ev1", work) == ("done", False)
+    work.assert_called_once()
+
+
+def test_failed_result_store_keeps_result(mocker):
+    collection = mocker.Mock()
+    collection.update_one.side_effect = AutoReconnect("primary stepped down")
+    deduplicator = EventDeduplicator(EventLog(), collection)
+    work = mocker.Mock(return_value="done")
+
+    assert deduplicator.run("Ev1", work) == ("done", False)
+    assert deduplicator.run("Ev1", work) == ("done", True)
+    work.assert_called_once()
+
+
+def test_ensure_index_expires_events(mongodb):
+    collection = mongodb[EVENT_COLLECTION]
+    EventDeduplicator(EventLog(ttl=300), collection).ensure_index()
+
+    index = collection.index_information()["expire_processed_events"]
+
+    assert index["expireAfterSeconds"] == 300
+
+
+def test_get_deduplicator_uses_mongo_when_configured(
+    database_client, monkeypatch, event_deduplicator
+):
+    del EventDeduplicator.instance
+    monkeypatch.setenv("EVENT_DEDUP_STORE", "mongo")
+    monkeypatch.setenv("EVENT_DEDUP_TTL", "120")
+
+    deduplicator = EventDeduplicator.get_deduplicator()
+
+    assert deduplicator.collection.name == EVENT_COLLECTION
+    assert deduplicator.event_log.ttl == 120
+
+
+def test_run_async_replays_result(mocker):
+    deduplicator = EventDeduplicator(EventLog())
+    work = mocker.AsyncMock(return_value="done")
+
+    async def run_twice():
+        return [await deduplicator.run_async("Ev1", work) for _ in range(2)]
+
+    assert asyncio.run(run_twice()) == [("done", False), ("done", True)]
+    work.assert_awaited_once()
+
+
+def test_run_async_releases_failed_events(mocker):
+    deduplicator = EventDeduplicator(EventLog())
+    work = mocker.AsyncMock(side_effect=[RuntimeError("boom"), "done"])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(deduplicator.run_async("Ev1", work))
+
+    assert asyncio.run(deduplicator.run_async("Ev1", work)) == ("done", False)
+
+
+def test_run_async_dedupes_across_instances(mongodb, mocker):
+    collection = mongodb[EVENT_COLLECTION]
+    collection.delete_many({})
+    first = EventDeduplicator(EventLog(), collection)
+    second = EventDeduplicator(EventLog(), collection)
+    work = mocker.AsyncMock(return_value={"text": "done"})
+
+    asyncio.run(first.run_async("Ev1", work))
+
+    assert asyncio.run(second.run_async("Ev1", work)) == ({"text": "done"}, True)
+    work.assert_awaited_once()
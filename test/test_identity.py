@@ -0,0 +1,129 @@
+import logging
+
+import pytest
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from symone_bot.identity import (
+    BotIdentity,
+    forget_cached_identity,
+    identity_from_env,
+    is_token_error,
+    read_cached_identity,
+    resolve_identity,
+    save_identity,
+)
+from symone_bot.slack_app import create_app
+from test.test_slack_app import SIGNING_SECRET, signed_message_event
+
+IDENTITY = BotIdentity("UBOT", "BBOT", "T1")
+IDENTITY_ENV = {
+    "SLACK_BOT_USER_ID": "UBOT",
+    "SLACK_BOT_ID": "BBOT",
+    "SLACK_TEAM_ID": "T1",
+}
+
+
+def test_identity_from_env():
+    assert identity_from_env(IDENTITY_ENV) == IDENTITY
+
+
+def test_identity_from_env_needs_every_field():
+    assert identity_from_env({"SLACK_BOT_USER_ID": "UBOT"}) is None
+
+
+def test_cached_identity_round_trip(tmp_path):
+    path = str(tmp_path / "identity.json")
+    save_identity(IDENTITY, path)
+
+    assert read_cached_identity(path) == IDENTITY
+
+
+def test_read_cached_identity_ignores_bad_file(tmp_path):
+    path = tmp_path / "identity.json"
+    path.write_text("not json")
+
+    assert read_cached_identity(str(path)) is None
+    assert read_cached_identity(str(tmp_path / "missing.json")) is None
+
+
+def test_resolve_identity_prefers_env(fake_slack, tmp_path):
+    environ = {**IDENTITY_ENV, "SLACK_IDENTITY_CACHE": str(tmp_path / "id.json")}
+    client = WebClient(token="xoxb-test", base_url=fake_slack.url)
+
+    assert resolve_identity("xoxb-test", environ, client) == IDENTITY
+    assert fake_slack.calls == []
+
+
+def test_resolve_identity_without_configuration(fake_slack):
+    client = WebClient(token="xoxb-test", base_url=fake_slack.url)
+
+    assert resolve_identity("xoxb-test", {}, client) is None
+    assert fake_slack.calls == []
+
+
+def test_resolve_identity_fetches_once_then_uses_cache(fake_slack, tmp_path):
+    environ = {"SLACK_IDENTITY_CACHE": str(tmp_path / "id.json")}
+    client = WebClient(token="xoxb-test", base_url=fake_slack.url)
+
+    assert resolve_identity("xoxb-test", environ, client) == IDENTITY
+    assert resolve_identity("xoxb-test", environ, client) == IDENTITY
+    assert [method for method, _ in fake_slack.calls] == ["auth.test"]
+
+
+def test_forget_cached_identity(tmp_path):
+    path = tmp_path / "id.json"
+    save_identity(IDENTITY, str(path))
+
+    forget_cached_identity({"SLACK_IDENTITY_CACHE": str(path)})
+    forget_cached_identity({"SLACK_IDENTITY_CACHE": str(path)})
+
+    assert not path.exists()
+
+
+def test_is_token_error():
+    assert is_token_error(SlackApiError("", {"ok": False, "error": "invalid_auth"}))
+    assert not is_token_error(SlackApiError("", {"ok": False, "error": "ratelimited"}))
+    assert not is_token_error(ValueError())
+
+
+def build_app(fake_slack):
+    return create_app(
+        identity=IDENTITY,
+        token="xoxb-test",
+        client=WebClient(base_url=fake_slack.url),
+        signing_secret=SIGNING_SECRET,
+    )
+
+
+def test_app_with_identity_never_calls_auth_test(fake_slack):
+    app = build_app(fake_slack)
+
+    response = app.dispatch(signed_message_event("hey Symone"))
+
+    assert response.status == 200
+    assert [method for method, _ in fake_slack.calls] == ["chat.postMessage"]
+    assert fake_slack.calls[0][1]["text"] == "hey there <@U72P1S26N>"
+
+
+def test_app_with_identity_ignores_its_own_messages(fake_slack):
+    app = build_app(fake_slack)
+
+    app.dispatch(signed_message_event("hey Symone", user="UBOT"))
+
+    assert fake_slack.calls == []
+
+
+def test_invalid_token_fails_loudly(fake_slack, caplog, monkeypatch, tmp_path):
+    path = tmp_path / "id.json"
+    save_identity(IDENTITY, str(path))
+    monkeypatch.setenv("SLACK_IDENTITY_CACHE", str(path))
+    fake_slack.errors["chat.postMessage"] = "invalid_auth"
+    app = build_app(fake_slack)
+
+    with caplog.at_level(logging.CRITICAL), pytest.raises(SlackApiError):
+        app.dispatch(signed_message_event("hey Symone"))
+
+    assert "Slack rejected the bot token (invalid_auth)" in caplog.text
+    assert not path.exists()
+    assert "chat.postEphemeral" not in [method for method, _ in fake_slack.calls]
@@ -1,3 +1,11 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import main
 from symone_bot.bot_ingress import symone_message
 from symone_bot.commands import MESSAGE_RESPONSE_EPHEMERAL
 from symone_bot.handler_source import HandlerSource
@@ -24,3 +32,100 @@ def test_symone_message_no_user_id():
     actual = symone_message(None, None, None)
     assert actual["response_type"] == expected["response_type"]
     assert actual["text"] == expected["text"]
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Written by test_import_main_is_cheap and uploaded by CI, so changes in cold-start
+# import time show up in review.
+IMPORTTIME_REPORT = REPO_ROOT / "importtime.txt"
+DEFERRED_MODULES = {"slack_bolt", "slack_sdk", "pymongo", "google", "symone_bot"}
+
+
+def import_time_report(module: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env={key: value for key, value in os.environ.items() if key != "PYTHONPATH"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stderr
+
+
+def parse_import_times(report: str):
+    """Yields (module, self microseconds, cumulative microseconds) per import."""
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        yield name.strip(), int(self_us), int(cumulative_us)
+
+
+def test_import_main_is_cheap():
+    report = import_time_report("main")
+    imports = list(parse_import_times(report))
+
+    slowest = sorted(imports, key=lambda entry: entry[2], reverse=True)[:20]
+    summary = "\n".join(
+        f"{cumulative:>10} {own:>10}  {name}" for name, own, cumulative in slowest
+    )
+    IMPORTTIME_REPORT.write_text(
+        "`import main`, slowest 20 by cumulative time (microseconds)\n"
+        f"{'cumulative':>10} {'self':>10}  module\n{summary}\n\n"
+        f"-X importtime output\n{report}"
+    )
+
+    imported = {name.split(".")[0] for name, _, _ in imports}
+    assert not imported & DEFERRED_MODULES
+
+
+@pytest.fixture
+def fresh_main(monkeypatch):
+    monkeypatch.setattr(main, "_app", None)
+    monkeypatch.setattr(main, "_slack_handler", None)
+    return main
+
+
+def test_app_is_built_once(fresh_main, mocker):
+    create_app = mocker.patch("symone_bot.slack_app.create_app")
+    setup_logging = mocker.patch.object(fresh_main, "setup_logging")
+
+    assert fresh_main.app is fresh_main.get_app()
+    create_app.assert_called_once()
+    setup_logging.assert_called_once()
+
+
+def test_handler_reuses_one_request_handler(fresh_main, mocker):
+    mocker.patch.object(fresh_main, "get_app")
+    request_handler = mocker.patch(
+        "slack_bolt.adapter.google_cloud_functions.SlackRequestHandler"
+    )
+
+    request = mocker.Mock(**{"get_json.return_value": None})
+
+    fresh_main.handler(request)
+    fresh_main.handler(request)
+
+    request_handler.assert_called_once()
+    assert request_handler.return_value.handle.call_count == 2
+
+
+def test_unknown_module_attribute():
+    with pytest.raises(AttributeError):
+        main.not_an_attribute
+
+
+def test_handler_drops_unrelated_messages(fresh_main, mocker):
+    get_slack_handler = mocker.patch.object(fresh_main, "get_slack_handler")
+    request = mocker.Mock(
+        **{
+            "get_json.return_value": {
+                "type": "event_callback",
+                "event": {"type": "message", "text": "anyone up for tacos?"},
+            }
+        }
+    )
+
+    assert fresh_main.handler(request) == ("", 200)
+    get_slack_handler.assert_not_called()
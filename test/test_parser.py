@@ -1,9 +1,20 @@
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
-from symone_bot.commands import Command
-from symone_bot.parser import QueryEvaluator, Token, generate_tokens
+from symone_bot.aspects import Aspect, aspect_dict
+from symone_bot.commands import Command, command_dict, default_registry
+from symone_bot.parser import (
+    KeywordTokenizer,
+    ParseContext,
+    QueryEvaluator,
+    Token,
+    generate_tokens,
+    normalize_query,
+    split_statements,
+)
 from symone_bot.prepositions import PrepositionType, preposition_dict
 
 
@@ -13,9 +24,6 @@ def query_evaluator(test_commands, test_aspects):
 
 
 def test__evaluator_initial_state(query_evaluator, test_commands, test_aspects):
-    assert query_evaluator.tokens is None
-    assert query_evaluator.current_token is None
-    assert query_evaluator.next_token is None
     assert query_evaluator.commands == test_commands
     assert query_evaluator.prepositions == preposition_dict
     assert query_evaluator.aspects == test_aspects
@@ -67,11 +75,11 @@ def test_generate_tokens():
         ),
     ],
 )
-def test__generate_tokens_with_master_pattern(
+def test__generate_tokens_with_tokenizer(
     query_evaluator, input_string, expected_tokens
 ):
-    master_pattern = query_evaluator._get_master_pattern()
-    tokens = list(generate_tokens(input_string, master_pattern))
+    tokenizer = query_evaluator._get_tokenizer()
+    tokens = list(generate_tokens(input_string, tokenizer))
     assert tokens == expected_tokens
 
 
@@ -205,12 +213,10 @@ def test__get_value(input_string, expected):
 
 
 def test__get_preposition(query_evaluator):
-    query_evaluator.current_token = Token("PREP", "to")
-    query_evaluator.next_token = Token("ASPECT", "bar")
-    query_evaluator.tokens = iter(
-        [query_evaluator.current_token, query_evaluator.next_token]
-    )
-    prep, aspect = query_evaluator.get_preposition_then_aspect()
+    context = ParseContext(iter([Token("PREP", "to"), Token("ASPECT", "bar")]))
+    context.current_token = Token("PREP", "to")
+    context.next_token = Token("ASPECT", "bar")
+    prep, aspect = query_evaluator.get_preposition_then_aspect(context)
 
     assert aspect.name == "bar"
     assert prep.name == "to"
@@ -219,28 +225,369 @@ def test__get_preposition(query_evaluator):
 def test__get_preposition_raises_syntax_error_if_preposition_not_followed_by_aspect(
     query_evaluator,
 ):
-    query_evaluator.current_token = Token("PREP", "to")
-    query_evaluator.tokens = iter([query_evaluator.current_token])
+    context = ParseContext(iter([Token("PREP", "to")]))
+    context.current_token = Token("PREP", "to")
     with pytest.raises(SyntaxError):
-        query_evaluator.get_preposition_then_aspect()
+        query_evaluator.get_preposition_then_aspect(context)
 
 
 def test__get_aspect(query_evaluator):
-    query_evaluator.current_token = Token("ASPECT", "bar")
-    query_evaluator.next_token = Token("VALUE", "3")
-    query_evaluator.tokens = iter(
-        [query_evaluator.current_token, query_evaluator.next_token]
-    )
-    aspect, value, _ = query_evaluator.get_aspect()
+    context = ParseContext(iter([Token("ASPECT", "bar"), Token("VALUE", "3")]))
+    context.current_token = Token("ASPECT", "bar")
+    context.next_token = Token("VALUE", "3")
+    aspect, value, _ = query_evaluator.get_aspect(context)
 
     assert aspect.name == "bar"
     assert value == 3
 
 
 def test__get_aspect_with_no_value(query_evaluator):
-    query_evaluator.current_token = Token("ASPECT", "bar")
-    query_evaluator.tokens = iter([query_evaluator.current_token])
-    aspect, value, _ = query_evaluator.get_aspect()
+    context = ParseContext(iter([Token("ASPECT", "bar")]))
+    context.current_token = Token("ASPECT", "bar")
+    aspect, value, _ = query_evaluator.get_aspect(context)
 
     assert aspect.name == "bar"
     assert value is None
+
+
+def test__parse_context_initial_state():
+    context = ParseContext(iter([]))
+
+    assert context.current_token is None
+    assert context.next_token is None
+
+
+def test__get_evaluator_returns_shared_default_evaluator(test_commands):
+    assert QueryEvaluator.get_evaluator() is QueryEvaluator.get_evaluator()
+    assert QueryEvaluator.get_evaluator(commands=test_commands).commands is (
+        test_commands
+    )
+
+
+def test__evaluator_is_safe_to_share_between_threads(query_evaluator):
+    queries = [(f"foo bar {i}", i) for i in range(2000)]
+    queries += [(f"foo {i} to bar", i) for i in range(2000)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            responses = list(
+                executor.map(lambda q: query_evaluator.parse(q[0]), queries)
+            )
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    for (query, expected_value), response in zip(queries, responses):
+        assert response.command.name == "foo", query
+        assert response.aspect.name == "bar", query
+        assert response.value == expected_value, query
+        assert (response.preposition is not None) == (" to " in query), query
+
+
+def test__tokenizer_is_cached_across_evaluators(test_commands, test_aspects):
+    first = QueryEvaluator(test_commands, preposition_dict, test_aspects)
+    second = QueryEvaluator(dict(test_commands), preposition_dict, test_aspects)
+
+    assert first._get_tokenizer() is second._get_tokenizer()
+
+
+def test__tokenizer_is_rebuilt_when_registry_changes(query_evaluator):
+    before = query_evaluator._get_tokenizer()
+    query_evaluator.aspects["baz"] = Aspect("baz", "a baz aspect", "baz")
+    after = query_evaluator._get_tokenizer()
+
+    assert before is not after
+    assert query_evaluator.parse("foo baz").aspect.name == "baz"
+
+
+@pytest.fixture
+def tokenizer():
+    return KeywordTokenizer(
+        ["add", "set", "set the number to"], ["to", "from"], ["xp", "xp_target"]
+    )
+
+
+@pytest.mark.parametrize(
+    "input_string,expected_tokens",
+    [
+        (
+            "set the number to 1000",
+            [Token("CMD", "set the number to"), Token("VALUE", "1000")],
+        ),
+        (
+            "set xp_target to 5",
+            [
+                Token("CMD", "set"),
+                Token("ASPECT", "xp_target"),
+                Token("PREP", "to"),
+                Token("VALUE", "5"),
+            ],
+        ),
+        (
+            "ADD Xp -5",
+            [Token("CMD", "ADD"), Token("ASPECT", "Xp"), Token("VALUE", "-5")],
+        ),
+        (
+            'set "rise of the runelords"',
+            [Token("CMD", "set"), Token("STRING_VALUE", '"rise of the runelords"')],
+        ),
+        ("add xpx 5", [Token("CMD", "add")]),
+        ("add 30 chickens", [Token("CMD", "add"), Token("VALUE", "30")]),
+        ("foo+bar", []),
+    ],
+)
+def test__keyword_tokenizer(tokenizer, input_string, expected_tokens):
+    assert list(generate_tokens(input_string, tokenizer)) == expected_tokens
+
+
+def test__keyword_tokenizer_matches_regex_scanner(tokenizer):
+    pattern = re.compile(
+        "|".join(
+            [
+                r"(?P<CMD>\bset the number to\b|\badd\b|\bset\b)",
+                r"(?P<ASPECT>\bxp_target\b|\bxp\b)",
+                r"(?P<PREP>\bto\b|\bfrom\b)",
+                r"(?P<VALUE>(-|)\d+)",
+                r"(?P<WS>\s+)",
+                r'(?P<STRING_VALUE>"(.*?)")',
+            ]
+        ),
+        re.IGNORECASE,
+    )
+    for query in [
+        "add 1000 to xp",
+        "Set XP_TARGET 5",
+        'set "the runelords" from xp',
+        "add xp - 5",
+        "remove xp 5",
+        'set "unterminated',
+    ]:
+        assert list(generate_tokens(query, tokenizer)) == list(
+            generate_tokens(query, pattern)
+        )
+
+
+def test__keyword_tokenizer_with_thousands_of_keywords():
+    aspect_names = [f"aspect_{i}" for i in range(5000)]
+    tokenizer = KeywordTokenizer(["add"], ["to"], aspect_names)
+
+    tokens = list(generate_tokens("add 5 to aspect_4999", tokenizer))
+
+    assert tokens[-1] == Token("ASPECT", "aspect_4999")
+
+
+def test__parse_memoizes_repeated_queries(query_evaluator):
+    first = query_evaluator.parse("foo bar 3")
+    second = query_evaluator.parse("  foo   bar 3 ")
+
+    assert query_evaluator.cache_info().misses == 1
+    assert query_evaluator.cache_info().hits == 1
+    assert first is not second
+    assert (second.command, second.aspect, second.value) == (
+        first.command,
+        first.aspect,
+        first.value,
+    )
+
+
+def test__parse_cache_does_not_share_metadata(query_evaluator):
+    first = query_evaluator.parse("foo bar 3")
+    first.metadata = "user-1"
+    second = query_evaluator.parse("foo bar 3")
+
+    assert second.metadata is None
+
+
+def test__parse_cache_keeps_whitespace_in_string_values(query_evaluator):
+    query_evaluator.commands["set name to"] = Command(
+        "set name to", "", lambda **kwargs: None, is_modifier=True
+    )
+    first = query_evaluator.parse('set name to "the  runelords"')
+    second = query_evaluator.parse('set name to "the runelords"')
+
+    assert first.value == "the  runelords"
+    assert second.value == "the runelords"
+
+
+def test__parse_cache_is_bounded(test_commands, test_aspects):
+    evaluator = QueryEvaluator(
+        test_commands, preposition_dict, test_aspects, cache_size=2
+    )
+    for value in range(5):
+        evaluator.parse(f"foo bar {value}")
+
+    assert evaluator.cache_info().size == 2
+
+
+@pytest.mark.parametrize("query", ["normalize   me ", "normalize me"])
+def test__normalize_query(query):
+    assert normalize_query(query) == "normalize me"
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("add xp 300", ["add xp 300"]),
+        (
+            "add xp 300; add gold 50;add xp_target 200",
+            ["add xp 300", "add gold 50", "add xp_target 200"],
+        ),
+        ("add xp 300\nadd gold 50\n", ["add xp 300", "add gold 50"]),
+        (
+            'switch campaign to "a; b"; current xp',
+            ['switch campaign to "a; b"', "current xp"],
+        ),
+        (" ; ", []),
+    ],
+)
+def test__split_statements(query, expected):
+    assert split_statements(query) == expected
+
+
+def test__parse_statements(query_evaluator):
+    responses = query_evaluator.parse_statements("foo bar 3; foo 4 to bar")
+
+    assert [response.value for response in responses] == [3, 4]
+
+
+def test__parse_statements_rejects_all_statements_on_syntax_error(query_evaluator):
+    with pytest.raises(SyntaxError):
+        query_evaluator.parse_statements("foo bar 3; bar foo 3")
+
+
+@pytest.mark.parametrize("query", ["ADD XP 5", "Add Xp 5", "add xp 5"])
+def test_parse_resolves_names_in_any_case(query):
+    response = QueryEvaluator.get_evaluator().parse(query)
+
+    assert response.command.name == "add"
+    assert response.aspect.name == "xp"
+    assert response.value == 5
+
+
+def test__canonical_tokenizer_lowercases_keywords(tokenizer):
+    canonical = KeywordTokenizer(
+        ["add"], ["to"], ["xp", "xp_target"], canonical_values=True
+    )
+
+    assert list(generate_tokens("ADD 5 To Xp_Target", canonical)) == [
+        Token("CMD", "add"),
+        Token("VALUE", "5"),
+        Token("PREP", "to"),
+        Token("ASPECT", "xp_target"),
+    ]
+
+
+def test__default_evaluator_shares_the_default_registry():
+    assert QueryEvaluator.get_evaluator().registry is default_registry.get()
+
+
+@pytest.mark.parametrize(
+    "query, aspect_name, value",
+    [
+        ("add 100 to experience points", "xp", 100),
+        ("current Experience", "xp", None),
+        ("current xp target", "xp_target", None),
+        ("set xp for level up 900", "xp_target", 900),
+        ("remove credits 50", "gold", 50),
+        ("current party size", "party_size", None),
+    ],
+)
+def test_parse_resolves_aspect_aliases(query, aspect_name, value):
+    response = QueryEvaluator.get_evaluator().parse(query)
+
+    assert response.aspect.name == aspect_name
+    assert response.value == value
+
+
+@pytest.mark.parametrize(
+    "query, command_name, aspect_name, value",
+    [
+        ("curent gold", "current", "gold", None),
+        ("add xpp 100", "add", "xp", 100),
+        ("current experince points", "current", "xp", None),
+    ],
+)
+def test_parse_corrects_misspelled_keywords(query, command_name, aspect_name, value):
+    response = QueryEvaluator.get_evaluator().parse(query)
+
+    assert response.command.name == command_name
+    assert (response.aspect and response.aspect.name) == aspect_name
+    assert response.value == value
+
+
+def test__fuzzy_tokenizer_leaves_ambiguous_words_alone():
+    tokenizer = KeywordTokenizer(["add"], ["to"], ["gold", "goad"], fuzzy=True)
+
+    assert list(generate_tokens("add gosd", tokenizer)) == [Token("CMD", "add")]
+
+
+def test__fuzzy_tokenizer_prefers_the_longer_span():
+    tokenizer = KeywordTokenizer(["add"], ["to"], ["party", "party size"], fuzzy=True)
+
+    assert list(generate_tokens("add 3 to prty size", tokenizer))[-1] == Token(
+        "ASPECT", "party size"
+    )
+
+
+def test__tokenizer_without_fuzzy_stops_at_typos(tokenizer):
+    assert list(generate_tokens("ad xp 5", tokenizer)) == []
+
+
+@pytest.mark.parametrize(
+    "spaced_query, query, command_name, aspect_name",
+    [
+        ("current xp  target", "current xp target", "current", "xp_target"),
+        ("current party \t size", "current party size", "current", "party_size"),
+        (
+            'switch  campaign to "Rise of Tiamat"',
+            'switch campaign to "Rise of Tiamat"',
+            "switch campaign to",
+            None,
+        ),
+    ],
+)
+def test_parse_multi_word_keywords_whatever_the_spacing(
+    spaced_query, query, command_name, aspect_name
+):
+    query_evaluator = QueryEvaluator(command_dict, preposition_dict, aspect_dict)
+
+    # the spaced query first, as both share a cache entry
+    for text in (spaced_query, query):
+        response = query_evaluator.parse(text)
+
+        assert response.command.name == command_name
+        assert (response.aspect and response.aspect.name) == aspect_name
+
+
+def test__tokenizer_matches_keywords_across_whitespace_runs():
+    tokenizer = KeywordTokenizer(["add"], ["to"], ["xp target"], canonical_values=True)
+
+    assert list(generate_tokens("add 5 to xp   target", tokenizer))[-1] == Token(
+        "ASPECT", "xp target"
+    )
+
+
+@pytest.mark.parametrize(
+    "query, suggestion",
+    [
+        ("get xp 500", "set"),
+        ("remote gold 100", "remove"),
+        ("remov gold 5", "remove"),
+        ('swich campaign to "Rise of Tiamat"', "switch campaign to"),
+    ],
+)
+def test_parse_suggests_misspelled_modifier_commands(query, suggestion):
+    response = QueryEvaluator.get_evaluator().parse(query)
+
+    assert response.command.name == "default"
+    assert response.suggestion == suggestion
+    assert (response.aspect, response.value) == (None, None)
+
+
+def test__fuzzy_tokenizer_suggests_strict_keywords():
+    tokenizer = KeywordTokenizer(["set"], [], ["xp"], fuzzy=True, strict_names=["set"])
+
+    assert list(generate_tokens("sett xp", tokenizer)) == [
+        Token("SUGGEST", "set"),
+        Token("ASPECT", "xp"),
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+
+from symone_bot.commands import Command
+from symone_bot.policies import Policy, compile_pipeline
+
+
+def recording_policy(calls, name, rejection=None, pure=True):
+    def check(command, kwargs):
+        calls.append(name)
+        return rejection
+
+    return Policy(check, pure=pure)
+
+
+def test_pure_checks_run_before_io_checks():
+    calls = []
+    command = Command(
+        "foo",
+        "",
+        lambda **kwargs: calls.append("command") or "done",
+        policies=(
+            recording_policy(calls, "io", pure=False),
+            recording_policy(calls, "first"),
+            recording_policy(calls, "second"),
+        ),
+    )
+
+    assert compile_pipeline(command)({}) == "done"
+    assert calls == ["first", "second", "io", "command"]
+
+
+def test_first_rejection_answers_the_request():
+    calls = []
+    command = Command(
+        "foo",
+        "",
+        lambda **kwargs: calls.append("command"),
+        policies=(
+            recording_policy(calls, "io", pure=False),
+            recording_policy(calls, "rejects", rejection={"text": "no"}),
+            recording_policy(calls, "after"),
+        ),
+    )
+
+    assert compile_pipeline(command)({}) == {"text": "no"}
+    assert calls == ["rejects"]
+
+
+def test_pipeline_passes_kwargs_to_command():
+    command = Command("foo", "", lambda value, **kwargs: value * 2)
+
+    assert compile_pipeline(command)({"value": 21, "aspect": None}) == 42
+
+
+def test_async_pipeline_returns_pure_rejection_directly():
+    async def function(**kwargs):
+        return "done"
+
+    command = Command(
+        "foo", "", function, policies=(recording_policy([], "rejects", "no"),)
+    )
+
+    assert compile_pipeline(command)({}) == "no"
+
+
+def test_async_pipeline_awaits_io_checks():
+    calls = []
+
+    async def check(command, kwargs):
+        calls.append("io")
+        return {"text": "no"} if kwargs["reject"] else None
+
+    async def function(**kwargs):
+        return "done"
+
+    pipeline = compile_pipeline(
+        Command("foo", "", function, policies=(Policy(check, pure=False),))
+    )
+
+    assert asyncio.run(pipeline({"reject": True})) == {"text": "no"}
+    assert asyncio.run(pipeline({"reject": False})) == "done"
+    assert calls == ["io", "io"]
@@ -0,0 +1,132 @@
+import pytest
+
+from symone_bot.aspects import Aspect
+from symone_bot.commands import Command, add, default_response
+from symone_bot.prepositions import preposition_dict
+from symone_bot.registry import Derived, Registry, RegistryDict
+from symone_bot.tokenizer import Token, generate_tokens
+
+
+@pytest.fixture
+def registry():
+    return RegistryDict({"foo": 1})
+
+
+@pytest.fixture
+def builds(registry):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return sorted(registry)
+
+    return calls, Derived(build)
+
+
+def test_derived_is_built_once(builds):
+    calls, derived = builds
+
+    assert derived.get() == ["foo"]
+    assert derived.get() is derived.get()
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda r: r.__setitem__("bar", 2),
+        lambda r: r.__delitem__("foo"),
+        lambda r: r.update(bar=2),
+        lambda r: r.__ior__({"bar": 2}),
+        lambda r: r.pop("foo"),
+        lambda r: r.popitem(),
+        lambda r: r.setdefault("bar", 2),
+        lambda r: r.clear(),
+    ],
+)
+def test_registry_changes_rebuild_derived(registry, builds, change):
+    calls, derived = builds
+    derived.get()
+
+    change(registry)
+
+    assert derived.get() == sorted(registry)
+    assert len(calls) == 2
+
+
+def test_registry_is_a_dict(registry):
+    assert registry == {"foo": 1}
+    assert isinstance(registry, dict)
+
+
+@pytest.fixture
+def compiled(test_commands, test_aspects):
+    commands = {"default": Command("default", "", default_response), **test_commands}
+    return Registry(commands, preposition_dict, test_aspects)
+
+
+def test_registry_resolves_lowercased_names(compiled):
+    assert compiled.command("foo").name == "foo"
+    assert compiled.aspect("bar").name == "bar"
+    assert compiled.preposition("to").name == "to"
+    assert compiled.command("baz") is None
+
+
+def test_registry_indexes_names_in_lowercase(test_aspects):
+    compiled = Registry({"Roll": Command("Roll", "", add)}, {}, test_aspects)
+
+    assert compiled.command("roll").name == "Roll"
+    assert compiled.command("Roll") is None
+
+
+def test_registry_help(compiled):
+    assert compiled.default_command.name == "default"
+    assert dict(compiled.command_help) == {"foo": "`foo`: does foo stuff."}
+    assert compiled.aspect_listing == "bar"
+    assert compiled.help_text == (
+        "`foo`: does foo stuff.\n\nI am also tracking the following aspects: bar"
+    )
+
+
+def test_registry_is_immutable(compiled):
+    with pytest.raises(AttributeError):
+        compiled.help_text = "nope"
+    with pytest.raises(AttributeError):
+        del compiled.tokenizer
+    with pytest.raises(TypeError):
+        compiled.command_help["foo"] = "nope"
+
+
+def test_registry_resolves_aspect_aliases(test_commands):
+    aspect = Aspect("bar", "", "bar", aliases=["Bar Pieces", "bp"])
+    compiled = Registry(test_commands, preposition_dict, {"bar": aspect})
+
+    assert compiled.aspect("bar pieces") is aspect
+    assert compiled.aspect("bp") is aspect
+    assert list(generate_tokens("foo BAR  pieces", compiled.tokenizer)) == [
+        Token("CMD", "foo"),
+        Token("ASPECT", "bar pieces"),
+    ]
+    assert list(generate_tokens("foo Bar Pieces", compiled.tokenizer)) == [
+        Token("CMD", "foo"),
+        Token("ASPECT", "bar pieces"),
+    ]
+
+
+def test_registry_rejects_shared_aliases(test_commands):
+    aspects = {
+        "bar": Aspect("bar", "", "bar", aliases=["shared"]),
+        "baz": Aspect("baz", "", "baz", aliases=["Shared"]),
+    }
+
+    with pytest.raises(ValueError, match="already taken by aspect 'bar'"):
+        Registry(test_commands, preposition_dict, aspects)
+
+
+def test_registry_compiles_command_pipelines(test_aspects):
+    command = Command("roll", "", lambda value, **kwargs: value)
+    compiled = Registry({"roll": command}, {}, test_aspects)
+
+    assert compiled.pipeline(command) is compiled.pipeline(command)
+    assert compiled.pipeline(command)({"value": 4}) == 4
+    assert compiled.pipeline(Command("other", "", lambda **kwargs: 1))({}) == 1
@@ -4,7 +4,8 @@ from flask import Response
 from symone_bot.aspects import Aspect, aspect_dict
 from symone_bot.commands import Command, command_dict, current
 from symone_bot.metadata import QueryMetaData
-from symone_bot.prepositions import Preposition, PrepositionType
+from symone_bot.prepositions import Preposition, PrepositionType, preposition_dict
+from symone_bot.registry import Registry
 from symone_bot.response import SymoneResponse
 
 
@@ -155,3 +156,34 @@ def test_create_response_with_current_command():
     expected = Response()
     assert result.status_code == expected.status_code
     assert result.data == expected.data
+
+
+def test_invalid_value_falls_back_to_the_registry_default(test_aspects):
+    default = Command("default", "", lambda **kwargs: None)
+    command = Command("foo", "", lambda **kwargs: None, is_modifier=True)
+    registry = Registry(
+        {"default": default, "foo": command}, preposition_dict, test_aspects
+    )
+
+    response = SymoneResponse(
+        command, aspect=test_aspects["bar"], value="x", registry=registry
+    )
+
+    assert response.command is default
+
+
+def test_registry_without_default_falls_back_to_the_bot_default(test_aspects):
+    command = Command("foo", "", lambda **kwargs: None, is_modifier=True)
+    registry = Registry({"foo": command}, preposition_dict, test_aspects)
+
+    response = SymoneResponse(
+        command, aspect=test_aspects["bar"], value="x", registry=registry
+    )
+
+    assert response.command is command_dict["default"]
+
+
+def test_response_has_no_instance_dict():
+    response = SymoneResponse(command_dict["add"])
+
+    assert not hasattr(response, "__dict__")
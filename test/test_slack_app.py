@@ -0,0 +1,152 @@
+import json
+import time
+
+import pytest
+from slack_bolt.request import BoltRequest
+from slack_sdk import WebClient
+from slack_sdk.signature import SignatureVerifier
+
+from symone_bot import slack_app
+from symone_bot.slack_app import create_app
+
+SIGNING_SECRET = "secret"
+SLOW_QUERY_SECONDS = 1.0
+
+
+def signed_message_event(
+    text: str, user: str = "U72P1S26N", event_id: str = "Ev1", retry_num: int = 0
+) -> BoltRequest:
+    body = json.dumps(
+        {
+            "type": "event_callback",
+            "team_id": "T1",
+            "api_app_id": "A1",
+            "event_id": event_id,
+            "event_time": int(time.time()),
+            "event": {
+                "type": "message",
+                "channel": "C1",
+                "channel_type": "channel",
+                "user": user,
+                "text": text,
+                "ts": "1666000000.000100",
+            },
+        }
+    )
+    timestamp = str(int(time.time()))
+    signature = SignatureVerifier(SIGNING_SECRET).generate_signature(
+        timestamp=timestamp, body=body
+    )
+    headers = {
+        "content-type": ["application/json"],
+        "x-slack-signature": [signature],
+        "x-slack-request-timestamp": [timestamp],
+    }
+    if retry_num:
+        headers["x-slack-retry-num"] = [str(retry_num)]
+        headers["x-slack-retry-reason"] = ["http_timeout"]
+    return BoltRequest(body=body, headers=headers)
+
+
+def build_app(fake_slack, fast_ack):
+    return create_app(
+        fast_ack=fast_ack,
+        client=WebClient(token="xoxb-test", base_url=fake_slack.url),
+        signing_secret=SIGNING_SECRET,
+    )
+
+
+@pytest.fixture
+def slow_query(mocker):
+    def symone_message(input_text, user_id, handler_source):
+        time.sleep(SLOW_QUERY_SECONDS)
+        return {"response_type": "in_channel", "text": f"did {input_text}"}
+
+    return mocker.patch.object(slack_app, "symone_message", side_effect=symone_message)
+
+
+def test_fast_ack_responds_before_the_query_runs(fake_slack, slow_query):
+    app = build_app(fake_slack, fast_ack=True)
+
+    start = time.perf_counter()
+    response = app.dispatch(signed_message_event("Symone, current xp"))
+    ack_latency = time.perf_counter() - start
+
+    assert response.status == 200
+    assert ack_latency < SLOW_QUERY_SECONDS / 2
+    posted = fake_slack.wait_for("chat.postMessage")
+    assert posted["channel"] == "C1"
+    assert posted["text"] == "did current xp"
+
+
+def test_default_mode_replies_before_responding(fake_slack, slow_query):
+    app = build_app(fake_slack, fast_ack=False)
+
+    start = time.perf_counter()
+    response = app.dispatch(signed_message_event("Symone, current xp"))
+
+    assert response.status == 200
+    assert time.perf_counter() - start >= SLOW_QUERY_SECONDS
+    assert any(method == "chat.postMessage" for method, _ in fake_slack.calls)
+
+
+def test_fast_ack_delivers_query_reply(fake_slack, database_client):
+    app = build_app(fake_slack, fast_ack=True)
+
+    response = app.dispatch(signed_message_event("Symone, current xp"))
+
+    assert response.status == 200
+    assert fake_slack.wait_for("chat.postMessage")["text"] == "xp is currently 0"
+
+
+def test_fast_ack_delivers_help(fake_slack):
+    app = build_app(fake_slack, fast_ack=True)
+
+    app.dispatch(signed_message_event("what can you do Symone?"))
+
+    assert "help" in fake_slack.wait_for("chat.postMessage")["text"]
+
+
+def test_cheap_listeners_run_before_responding(fake_slack):
+    app = build_app(fake_slack, fast_ack=True)
+
+    app.dispatch(signed_message_event("hey Symone"))
+
+    assert fake_slack.wait_for("chat.postMessage")["text"] == "hey there <@U72P1S26N>"
+
+
+def test_unrelated_messages_skip_the_listeners(fake_slack, mocker):
+    handle_message_events = mocker.spy(slack_app, "handle_message_events")
+    app = build_app(fake_slack, fast_ack=False)
+
+    response = app.dispatch(signed_message_event("anyone up for tacos?"))
+
+    assert response.status == 200
+    handle_message_events.assert_not_called()
+    assert [method for method, _ in fake_slack.calls] == ["auth.test"]
+
+
+def test_retried_queries_run_once(fake_slack, database_client, mongodb):
+    app = build_app(fake_slack, fast_ack=False)
+
+    app.dispatch(signed_message_event("Symone, add xp 100"))
+    response = app.dispatch(signed_message_event("Symone, add xp 100", retry_num=1))
+
+    assert response.status == 200
+    posted = [args for method, args in fake_slack.calls if method == "chat.postMessage"]
+    assert len(posted) == 1
+    assert (
+        mongodb.game_context.find_one({"name": "Against the Aeon Throne"})["party"][
+            "xp"
+        ]
+        == 100
+    )
+
+
+def test_distinct_events_all_run(fake_slack, slow_query):
+    app = build_app(fake_slack, fast_ack=False)
+
+    app.dispatch(signed_message_event("Symone, current xp", event_id="Ev1"))
+    app.dispatch(signed_message_event("Symone, current xp", event_id="Ev2"))
+
+    assert slow_query.call_count == 2
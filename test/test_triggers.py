@@ -0,0 +1,78 @@
+import pytest
+
+from symone_bot.triggers import LISTENER_PATTERNS, TRIGGER_PATTERN, is_for_symone
+
+
+def message_event(text, **event):
+    return {
+        "type": "event_callback",
+        "event": {"type": "message", "text": text, **event},
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "hey Symone",
+        "Hello symone!",
+        "what can you do Symone?",
+        "did we level up?",
+        "DID WE LEVEL",
+        "Symone, add xp 100",
+        "symone, add xp 100;\nadd gold 5",
+    ],
+)
+def test_trigger_phrases_pass(text):
+    assert is_for_symone(message_event(text))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "anyone up for tacos?",
+        "we leveled the dungeon",
+        "symone is great",
+        "",
+        None,
+    ],
+)
+def test_ordinary_messages_are_dropped(text):
+    assert not is_for_symone(message_event(text))
+
+
+def test_edited_messages_are_dropped():
+    body = message_event(None, subtype="message_changed")
+
+    assert not is_for_symone(body)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"type": "url_verification", "challenge": "abc"},
+        {"type": "event_callback", "event": {"type": "app_mention", "text": "hi"}},
+        {"type": "block_actions"},
+        {},
+    ],
+)
+def test_other_requests_pass(body):
+    assert is_for_symone(body)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "hey Symone",
+        "what can you do Symone?",
+        "did we level",
+        "Symone, current xp",
+        "say hi Symone",
+        "symone is great",
+        "what can you do symone",
+        "Did we win?",
+    ],
+)
+def test_combined_pattern_agrees_with_listeners(text):
+    expected = any(pattern.search(text) for pattern in LISTENER_PATTERNS)
+
+    assert (TRIGGER_PATTERN.search(text) is not None) == expected